@@ -0,0 +1,101 @@
+"""
+Element-by-element vs bulk construction in BpmnBuilder.
+
+Adds the same nodes, flows and shapes of a synthetic process once through
+add_node / add_flow / add_shape and once through add_nodes / add_flows /
+add_shapes, and reports elements per second:
+
+    python -m benchmarks.builder_benchmark --nodes 100000
+"""
+
+import argparse
+import time
+
+from src.assemblers.xml.bpmn import BpmnBuilder
+
+TYPES = ("task", "userTask", "serviceTask", "exclusiveGateway")
+
+
+def make_columns(size: int) -> dict:
+    """Columnar process data: a chain of nodes laid out in a grid"""
+    ids = [f"Node_{i}" for i in range(size)]
+    return {
+        "types": [TYPES[i % len(TYPES)] for i in range(size)],
+        "ids": ids,
+        "names": [f"Step {i}" for i in range(size)],
+        "flow_ids": [f"Flow_{i}" for i in range(size - 1)],
+        "sources": ids[:-1],
+        "targets": ids[1:],
+        "xs": [150.0 + (i % 100) * 150 for i in range(size)],
+        "ys": [100.0 + (i // 100) * 120 for i in range(size)],
+    }
+
+
+def _builder() -> BpmnBuilder:
+    builder = BpmnBuilder().create_definitions("Definitions_1")
+    builder.start_process("Process_1", "Benchmark")
+    builder.init_diagram("Process_1")
+    return builder
+
+
+def build_single(c: dict) -> dict:
+    builder, times = _builder(), {}
+    started = time.perf_counter()
+    for node_type, node_id, name in zip(c["types"], c["ids"], c["names"]):
+        builder.add_node(node_type, node_id, name)
+    times["nodes"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for flow_id, source, target in zip(c["flow_ids"], c["sources"], c["targets"]):
+        builder.add_flow(flow_id, source, target, None)
+    times["flows"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for node_id, x, y in zip(c["ids"], c["xs"], c["ys"]):
+        builder.add_shape(node_id, x, y, 100, 80)
+    times["shapes"] = time.perf_counter() - started
+    return times
+
+
+def build_bulk(c: dict) -> dict:
+    builder, times = _builder(), {}
+    started = time.perf_counter()
+    builder.add_nodes(zip(c["types"], c["ids"], c["names"]))
+    times["nodes"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    builder.add_flows(
+        (flow_id, source, target, None)
+        for flow_id, source, target in zip(c["flow_ids"], c["sources"], c["targets"])
+    )
+    times["flows"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    builder.add_shapes(
+        (node_id, x, y, 100, 80) for node_id, x, y in zip(c["ids"], c["xs"], c["ys"])
+    )
+    times["shapes"] = time.perf_counter() - started
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk BpmnBuilder throughput")
+    parser.add_argument("--nodes", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    columns = make_columns(args.nodes)
+    for name, build in (("single", build_single), ("bulk", build_bulk)):
+        runs = [build(columns) for _ in range(args.repeat)]
+        best = {key: min(run[key] for run in runs) for key in runs[0]}
+        print(
+            f"{name:<6} "
+            + "  ".join(
+                f"{key} {args.nodes / value / 1000:>6.0f}k/s"
+                for key, value in best.items()
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
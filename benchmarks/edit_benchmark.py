@@ -0,0 +1,99 @@
+"""
+Incremental edit vs regenerating the whole diagram, across diagram sizes.
+
+The edit is a real /api/edit call path against the mock upstream: compact
+outline in, a few patch operations out, applied locally. Regeneration is
+estimated from the size of the XML the model would have to write again
+(XML mode) at the same output speed:
+
+    python -m benchmarks.edit_benchmark --sizes 10 50 200 1000
+"""
+
+import argparse
+import asyncio
+import math
+import time
+
+import httpx
+from openai import AsyncOpenAI
+
+from benchmarks.layout_benchmark import make_process_graph
+from benchmarks.mock_openrouter import MockConfig, running_mock_server
+from src.ai_generation.bpmn_agent.simple.diagram_edit import edit_diagram
+from src.ai_generation.llm_client import AsyncLLMClient
+from src.assemblers.xml.director import BpmnDirector
+from src.metrics import COMPLETION_TOKENS, PROMPT_TOKENS
+
+CHANGE_REQUEST = "Add a review step after the first task"
+
+
+def make_diagram(size: int) -> str:
+    nodes, flows = make_process_graph(size)
+    director = BpmnDirector()
+    director.construct_from_json(
+        {"process": {"id": "Process_1", "nodes": nodes}, "flow": {"flows": flows}}
+    )
+    return director.to_string()
+
+
+async def run(args: argparse.Namespace) -> list[dict]:
+    config = MockConfig(
+        latency=args.latency,
+        latency_mean=args.latency_mean,
+        tokens_per_second=args.tokens_per_second,
+        seed=0,
+    )
+    report = []
+    async with running_mock_server(config) as base_url:
+        client = AsyncOpenAI(
+            api_key="mock",
+            base_url=base_url,
+            http_client=httpx.AsyncClient(timeout=None),
+        )
+        llm = AsyncLLMClient(client, "mock-model")
+        for size in args.sizes:
+            xml = make_diagram(size)
+            prompt_before = PROMPT_TOKENS.value(model="mock-model")
+            completion_before = COMPLETION_TOKENS.value(model="mock-model")
+            started = time.perf_counter()
+            result = await edit_diagram(xml, CHANGE_REQUEST, use_cache=False, llm=llm)
+            edit_time = time.perf_counter() - started
+
+            regenerate_tokens = math.ceil(len(xml) / config.chars_per_token)
+            report.append(
+                {
+                    "size": size,
+                    "operations": len(result["operations"]),
+                    "edit_prompt": PROMPT_TOKENS.value(model="mock-model")
+                    - prompt_before,
+                    "edit_output": COMPLETION_TOKENS.value(model="mock-model")
+                    - completion_before,
+                    "edit_time": edit_time,
+                    "regenerate_output": regenerate_tokens,
+                    "regenerate_time": config.latency_mean
+                    + regenerate_tokens / config.tokens_per_second,
+                }
+            )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental edit vs regeneration")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200, 1000])
+    parser.add_argument("--latency", default="fixed")
+    parser.add_argument("--latency-mean", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    args = parser.parse_args()
+
+    for row in asyncio.run(run(args)):
+        print(
+            f"nodes {row['size']:>5}  ops {row['operations']}  "
+            f"edit in {row['edit_prompt']:>6.0f} out {row['edit_output']:>4.0f} "
+            f"tokens {row['edit_time']:>6.2f}s  "
+            f"regenerate out {row['regenerate_output']:>7} tokens "
+            f"~{row['regenerate_time']:>7.1f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+XML mode vs compact JSON graph (IR) mode of the agent.
+
+Reports output tokens, latency and the share of structurally valid diagrams.
+Runs against the local mock upstream by default, or a real OpenAI-compatible
+endpoint with --base-url (the API key is taken from settings):
+
+    python -m benchmarks.ir_benchmark --runs 20
+    python -m benchmarks.ir_benchmark --runs 10 --base-url https://openrouter.ai/api/v1 --model <model>
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+from lxml import etree
+from openai import AsyncOpenAI
+
+from benchmarks.load_test import percentile
+from benchmarks.mock_openrouter import MockConfig, running_mock_server
+from settings import get_settings
+from src.ai_generation.bpmn_agent.simple.agent import build_bpmn_agent
+from src.ai_generation.bpmn_agent.simple.streaming import USE_CACHE_KEY
+from src.ai_generation.llm_client import AsyncLLMClient
+from src.metrics import COMPLETION_TOKENS
+
+BPMN_NS = {
+    "bpmn": "http://www.omg.org/spec/BPMN/20100524/MODEL",
+    "bpmndi": "http://www.omg.org/spec/BPMN/20100524/DI",
+}
+PROMPTS = [
+    "Customer places an order, warehouse checks stock and ships it or notifies the customer",
+    "Employee submits a vacation request, manager approves or rejects it, HR records it",
+    "Applicant sends a loan application, bank scores it and approves or declines",
+]
+
+
+def is_valid_diagram(xml: str | None) -> bool:
+    """
+    Well-formed BPMN with a start and end event, flows between existing
+    nodes and a DI shape for every flow node.
+    """
+    if not xml:
+        return False
+    try:
+        root = etree.fromstring(xml.strip().encode("utf-8"))
+    except etree.XMLSyntaxError:
+        return False
+    process = root.find("bpmn:process", BPMN_NS)
+    if process is None:
+        return False
+
+    flows = process.findall("bpmn:sequenceFlow", BPMN_NS)
+    nodes = {el.get("id") for el in process if el not in flows}
+    if not process.findall("bpmn:startEvent", BPMN_NS):
+        return False
+    if not process.findall("bpmn:endEvent", BPMN_NS):
+        return False
+    if any(
+        f.get("sourceRef") not in nodes or f.get("targetRef") not in nodes
+        for f in flows
+    ):
+        return False
+    shapes = {
+        s.get("bpmnElement") for s in root.iterfind(".//bpmndi:BPMNShape", BPMN_NS)
+    }
+    return nodes <= shapes
+
+
+@asynccontextmanager
+async def upstream(args: argparse.Namespace):
+    """Yield (base_url, api_key, model) of the endpoint to benchmark"""
+    if args.base_url:
+        settings = get_settings()
+        yield args.base_url, settings.OPENROUTER_API_KEY, args.model
+        return
+    config = MockConfig(
+        latency=args.latency,
+        latency_mean=args.latency_mean,
+        tokens_per_second=args.tokens_per_second,
+        seed=0,
+    )
+    async with running_mock_server(config) as base_url:
+        yield base_url, "mock", "mock-model"
+
+
+async def measure(agent, model: str, runs: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    config = {"configurable": {USE_CACHE_KEY: False}}
+    tokens_before = COMPLETION_TOKENS.value(model=model)
+
+    async def one(i: int) -> tuple[float, bool]:
+        state = {"user_input": PROMPTS[i % len(PROMPTS)], "previous_stage": ""}
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                result = await agent.ainvoke(state, config=config)
+            except Exception:
+                return time.monotonic() - started, False
+            valid = is_valid_diagram(result.get("previous_answer"))
+            return time.monotonic() - started, valid
+
+    results = await asyncio.gather(*(one(i) for i in range(runs)))
+    latencies = [latency for latency, _ in results]
+    tokens = COMPLETION_TOKENS.value(model=model) - tokens_before
+    return {
+        "output_tokens": tokens / runs,
+        "mean": statistics.fmean(latencies),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "valid_rate": sum(valid for _, valid in results) / runs,
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    report = {}
+    async with upstream(args) as (base_url, api_key, model):
+        client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=httpx.AsyncClient(timeout=None),
+            max_retries=2,
+        )
+        llm = AsyncLLMClient(client, model)
+        for output_format in ("xml", "ir"):
+            agent = build_bpmn_agent(llm=llm, output_format=output_format).compile()
+            report[output_format] = await measure(
+                agent, model, args.runs, args.concurrency
+            )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="XML vs compact JSON graph mode")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--base-url", default=None, help="Real upstream to use")
+    parser.add_argument("--model", default=get_settings().OPENROUTER_MODEL_NAME)
+    parser.add_argument("--latency", default="fixed")
+    parser.add_argument("--latency-mean", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    for mode, stats in report.items():
+        print(
+            f"{mode:<4} output tokens {stats['output_tokens']:.0f}  "
+            f"mean {stats['mean']:.3f}s  p50 {stats['p50']:.3f}s  "
+            f"p95 {stats['p95']:.3f}s  valid {stats['valid_rate']:.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
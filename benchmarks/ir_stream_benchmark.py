@@ -0,0 +1,67 @@
+"""
+Assembly latency after the last token: streamed vs complete IR answers.
+
+Splits the compact JSON graph (IR) of a synthetic process into model-sized
+chunks. The batch path decodes the complete answer and builds the document
+after the last chunk (``ir_to_xml``), the streaming path feeds every chunk
+to IrStreamAssembler as it arrives, so only the layout is left at the end:
+
+    python -m benchmarks.ir_stream_benchmark --sizes 1000 10000
+"""
+
+import argparse
+import json
+import time
+
+from benchmarks.layout_benchmark import make_process_graph
+from src.assemblers.json.ir import IrStreamAssembler, ir_to_xml
+
+
+def make_answer(size: int) -> str:
+    nodes, flows = make_process_graph(size)
+    return json.dumps(
+        {
+            "name": "Benchmark",
+            "nodes": [{**n, "name": f"Step {i}"} for i, n in enumerate(nodes)],
+            "flows": [
+                {"from": f["sourceRef"], "to": f["targetRef"], "name": ""}
+                for f in flows
+            ],
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streamed IR assembly")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--chunk", type=int, default=16, help="characters per chunk")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        answer = make_answer(size)
+        chunks = [answer[i : i + args.chunk] for i in range(0, len(answer), args.chunk)]
+
+        started = time.perf_counter()
+        batch_xml = ir_to_xml("".join(chunks))
+        batch_time = time.perf_counter() - started
+
+        assembler = IrStreamAssembler()
+        started = time.perf_counter()
+        for chunk in chunks:
+            assembler.feed(chunk)
+        feed_time = time.perf_counter() - started
+        started = time.perf_counter()
+        stream_xml = assembler.finish()
+        finish_time = time.perf_counter() - started
+
+        assert stream_xml == batch_xml
+        print(
+            f"nodes {size:>6}  chunks {len(chunks):>7}  "
+            f"batch after last token {batch_time * 1000:>6.0f}ms  "
+            f"stream after last token {finish_time * 1000:>6.0f}ms  "
+            f"(spread over the stream {feed_time * 1000:>6.0f}ms)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Layered auto layout and orthogonal edge routing on synthetic process graphs.
+
+Graphs are chains of tasks with gateway splits, joins of nearby branches
+and a few loops back, similar to what the agent generates but much larger:
+
+    python -m benchmarks.layout_benchmark --sizes 100 1000 5000 --repeat 5
+"""
+
+import argparse
+import random
+import statistics
+import time
+from typing import Any, Dict, List, Tuple
+
+from src.assemblers.xml.layout import GATEWAY_TYPES, LayeredLayout
+from src.assemblers.xml.routing import route_edges
+
+NODE_TYPES = ["task"] * 6 + ["userTask", "exclusiveGateway", "parallelGateway"]
+
+
+def make_process_graph(
+    size: int, loop_rate: float = 0.05, seed: int = 0
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Random connected process of `size` nodes in the BpmnDirector format"""
+    rng = random.Random(seed)
+    nodes = [{"id": "Start", "type": "startEvent", "name": "Start"}]
+    flows: List[Dict[str, Any]] = []
+
+    def connect(source: str, target: str) -> None:
+        flows.append(
+            {"id": f"Flow_{len(flows) + 1}", "sourceRef": source, "targetRef": target}
+        )
+
+    for i in range(1, size):
+        node_type = "endEvent" if i == size - 1 else rng.choice(NODE_TYPES)
+        nodes.append({"id": f"Node_{i}", "type": node_type, "name": f"Node {i}"})
+        # Mostly continue from a recent node, sometimes a branch further back
+        source = max(0, i - 1 - int(rng.expovariate(0.5)))
+        connect(nodes[source]["id"], nodes[i]["id"])
+        if i > 5 and rng.random() < loop_rate:
+            connect(nodes[i]["id"], nodes[i - rng.randint(1, 5)]["id"])
+    return nodes, flows
+
+
+def measure(size: int, repeat: int) -> dict:
+    nodes, flows = make_process_graph(size)
+    gateways = [n["id"] for n in nodes if n["type"] in GATEWAY_TYPES]
+    timings, routing = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        layout = LayeredLayout(nodes, flows)
+        bounds = layout.compute()
+        timings.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        route_edges(bounds, flows, gateways, layout.bend_points)
+        routing.append(time.perf_counter() - started)
+    return {
+        "flows": len(flows),
+        "mean": statistics.fmean(timings),
+        "max": max(timings),
+        "routing": statistics.fmean(routing),
+        "crossings": layout.crossings,
+        "reversed": len(layout.reversed_flows),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Layout and routing benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        stats = measure(size, args.repeat)
+        print(
+            f"{size:>6} nodes {stats['flows']:>6} flows  "
+            f"layout mean {stats['mean'] * 1000:.1f}ms  max {stats['max'] * 1000:.1f}ms  "
+            f"routing mean {stats['routing'] * 1000:.1f}ms  "
+            f"crossings {stats['crossings']}  loops reversed {stats['reversed']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
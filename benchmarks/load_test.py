@@ -0,0 +1,237 @@
+"""
+End-to-end load generator for the BPMN generation API.
+
+Fixed concurrency (closed loop) or fixed request rate (open loop) against a
+running server, or in process against ``main.app``:
+
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --concurrency 16 --duration 60
+    python -m benchmarks.load_test --in-process --rps 5 --requests 200 --unique-prompts
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+import httpx
+
+PROMPTS = [
+    "Customer places an order, warehouse checks stock and ships it",
+    "Employee submits a vacation request, manager approves or rejects it",
+    "Patient books an appointment, clinic confirms and sends a reminder",
+    "Applicant sends a loan application, bank scores it and decides",
+    "User reports a bug, support triages it and developers fix it",
+]
+
+
+@dataclass
+class LoadResult:
+    latencies: list[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    errors: Counter = field(default_factory=Counter)
+    started: float = 0.0
+    finished: float = 0.0
+
+    def record(self, latency: float, status: int | None, error: str | None = None):
+        self.latencies.append(latency)
+        if status is not None:
+            self.statuses[status] += 1
+        if error is not None:
+            self.errors[error] += 1
+
+    @property
+    def total(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def failed(self) -> int:
+        ok = sum(n for status, n in self.statuses.items() if status < 400)
+        return self.total - ok
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile, ``p`` in [0, 100]"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(result: LoadResult) -> dict:
+    elapsed = max(result.finished - result.started, 1e-9)
+    return {
+        "requests": result.total,
+        "duration_seconds": round(elapsed, 3),
+        "throughput_rps": round(result.total / elapsed, 3),
+        "latency_seconds": {
+            "p50": round(percentile(result.latencies, 50), 4),
+            "p95": round(percentile(result.latencies, 95), 4),
+            "p99": round(percentile(result.latencies, 99), 4),
+            "max": round(max(result.latencies, default=0.0), 4),
+        },
+        "error_rate": round(result.failed / result.total, 4) if result.total else 0.0,
+        "statuses": {str(k): v for k, v in sorted(result.statuses.items())},
+        "errors": dict(result.errors),
+    }
+
+
+class LoadGenerator:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        path: str = "/api/generate",
+        unique_prompts: bool = False,
+        use_cache: bool = True,
+    ):
+        self.client = client
+        self.path = path
+        self.unique_prompts = unique_prompts
+        self.use_cache = use_cache
+        self.result = LoadResult()
+        self._sent = 0
+
+    def _next_params(self) -> dict:
+        n = self._sent
+        self._sent += 1
+        prompt = PROMPTS[n % len(PROMPTS)]
+        if self.unique_prompts:
+            prompt = f"{prompt} (variant {n})"
+        return {"user_input": prompt, "use_cache": str(self.use_cache).lower()}
+
+    async def _one(self) -> None:
+        params = self._next_params()
+        started = time.monotonic()
+        try:
+            response = await self.client.get(self.path, params=params)
+            # Streaming endpoints are measured until the last byte
+            await response.aread()
+        except httpx.HTTPError as e:
+            self.result.record(time.monotonic() - started, None, type(e).__name__)
+            return
+        error = None if response.status_code < 400 else f"HTTP {response.status_code}"
+        self.result.record(time.monotonic() - started, response.status_code, error)
+
+    async def run_concurrency(
+        self,
+        concurrency: int,
+        duration: float | None = None,
+        requests: int | None = None,
+    ) -> LoadResult:
+        """Closed loop: ``concurrency`` workers send requests back to back"""
+        self.result.started = time.monotonic()
+        deadline = self.result.started + duration if duration else math.inf
+
+        def has_budget() -> bool:
+            within_count = requests is None or self._sent < requests
+            return within_count and time.monotonic() < deadline
+
+        async def worker():
+            while has_budget():
+                await self._one()
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        self.result.finished = time.monotonic()
+        return self.result
+
+    async def run_rate(
+        self,
+        rps: float,
+        duration: float | None = None,
+        requests: int | None = None,
+    ) -> LoadResult:
+        """
+        Open loop: requests start on a fixed schedule regardless of how long
+        earlier ones take, so queueing shows up as latency, not as lower load.
+        """
+        if duration is None and requests is None:
+            raise ValueError("Either duration or requests is required")
+        total = requests if requests is not None else math.floor(rps * duration)
+        self.result.started = time.monotonic()
+        tasks = []
+        for i in range(total):
+            delay = self.result.started + i / rps - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(self._one()))
+        await asyncio.gather(*tasks)
+        self.result.finished = time.monotonic()
+        return self.result
+
+
+def format_report(summary: dict) -> str:
+    latency = summary["latency_seconds"]
+    lines = [
+        f"Requests:    {summary['requests']} in {summary['duration_seconds']}s",
+        f"Throughput:  {summary['throughput_rps']} req/s",
+        f"Latency:     p50 {latency['p50']}s  p95 {latency['p95']}s  "
+        f"p99 {latency['p99']}s  max {latency['max']}s",
+        f"Error rate:  {summary['error_rate']:.2%}",
+        f"Statuses:    {summary['statuses']}",
+    ]
+    if summary["errors"]:
+        lines.append(f"Errors:      {summary['errors']}")
+    return "\n".join(lines)
+
+
+def _build_client(args: argparse.Namespace) -> httpx.AsyncClient:
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    if args.in_process:
+        from main import app
+
+        transport = httpx.ASGITransport(app=app)
+        return httpx.AsyncClient(
+            transport=transport, base_url="http://app", timeout=timeout
+        )
+    return httpx.AsyncClient(base_url=args.url, timeout=timeout, limits=limits)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    async with _build_client(args) as client:
+        generator = LoadGenerator(
+            client,
+            path=args.path,
+            unique_prompts=args.unique_prompts,
+            use_cache=not args.no_cache,
+        )
+        if args.rps:
+            result = await generator.run_rate(args.rps, args.duration, args.requests)
+        else:
+            result = await generator.run_concurrency(
+                args.concurrency, args.duration, args.requests
+            )
+    return summarize(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the generation API")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default="http://127.0.0.1:8000")
+    target.add_argument(
+        "--in-process", action="store_true", help="Drive main.app via ASGI transport"
+    )
+    parser.add_argument("--path", default="/api/generate")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rps", type=float, default=None, help="Fixed request rate")
+    parser.add_argument("--duration", type=float, default=None)
+    parser.add_argument("--requests", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument(
+        "--unique-prompts", action="store_true", help="Defeat caches and coalescing"
+    )
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--json", action="store_true", help="Print a JSON report")
+    args = parser.parse_args()
+    if args.duration is None and args.requests is None:
+        args.duration = 30.0
+
+    summary = asyncio.run(run(args))
+    print(json.dumps(summary, indent=2) if args.json else format_report(summary))
+
+
+if __name__ == "__main__":
+    main()
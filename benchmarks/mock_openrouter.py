@@ -0,0 +1,366 @@
+"""
+OpenAI-compatible stand-in for OpenRouter, for offline benchmarks.
+
+Run it and point the app at it:
+
+    python -m benchmarks.mock_openrouter --port 8001 --latency lognormal
+    OPENROUTER_BASE_URL=http://127.0.0.1:8001/v1 uvicorn main:app
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+XML_BASE_BPMN_PATH = (
+    Path(__file__).parent.parent / "data" / "XMLs" / "base_bpmn_diagram.xml"
+)
+
+PROCESS_TEXT = (
+    "1. DOMAIN: Order fulfilment\n"
+    "2. POOLS: Customer, Warehouse\n"
+    "3. FLOW:\n"
+    "  - [Customer] -> (Place order) -> [Warehouse]\n"
+    "  - [Warehouse] -> (Check stock) -> (Gateway: in stock?)\n"
+    "  - IF in stock THEN (Ship order) ELSE (Notify customer)\n"
+    "4. MESSAGE_EXCHANGES:\n"
+    "  - Warehouse -> Customer: order confirmation\n"
+    "  - Warehouse -> Customer: shipping notice with tracking number\n"
+    "  - Warehouse -> Customer: out of stock notification\n"
+)
+
+# Answer of the compact JSON graph (IR) mode for the same process
+SAMPLE_IR = {
+    "name": "Order fulfilment",
+    "nodes": [
+        {"id": "s1", "type": "startEvent", "name": "Order placed"},
+        {"id": "t1", "type": "task", "name": "Check stock"},
+        {"id": "g1", "type": "exclusiveGateway", "name": "In stock?"},
+        {"id": "t2", "type": "task", "name": "Ship order"},
+        {"id": "t3", "type": "task", "name": "Notify customer"},
+        {"id": "g2", "type": "exclusiveGateway", "name": ""},
+        {"id": "e1", "type": "endEvent", "name": "Order handled"},
+    ],
+    "flows": [
+        {"from": "s1", "to": "t1", "name": ""},
+        {"from": "t1", "to": "g1", "name": ""},
+        {"from": "g1", "to": "t2", "name": "Yes"},
+        {"from": "g1", "to": "t3", "name": "No"},
+        {"from": "t2", "to": "g2", "name": ""},
+        {"from": "t3", "to": "g2", "name": ""},
+        {"from": "g2", "to": "e1", "name": ""},
+    ],
+}
+
+
+@dataclass
+class MockConfig:
+    """Behaviour of the mock upstream"""
+
+    # Time to first token distribution: fixed | uniform | normal | lognormal
+    latency: str = "lognormal"
+    latency_mean: float = 1.0
+    latency_spread: float = 0.5
+    # Output speed, 0 sends the whole completion at once
+    tokens_per_second: float = 80.0
+    chars_per_token: int = 4
+    # Input processing time, cached prompt prefixes are not charged
+    prefill_seconds_per_1k_tokens: float = 0.0
+    # Share of requests answered with 429
+    error_rate: float = 0.0
+    retry_after: float = 1.0
+    seed: int | None = None
+
+
+class LatencySampler:
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self._rng = random.Random(config.seed)
+
+    def first_token_delay(self) -> float:
+        c = self.config
+        if c.latency == "fixed":
+            value = c.latency_mean
+        elif c.latency == "uniform":
+            value = self._rng.uniform(
+                c.latency_mean - c.latency_spread, c.latency_mean + c.latency_spread
+            )
+        elif c.latency == "normal":
+            value = self._rng.gauss(c.latency_mean, c.latency_spread)
+        elif c.latency == "lognormal":
+            # Parametrized by the mean of the distribution, long right tail
+            sigma = c.latency_spread
+            mu = math.log(max(c.latency_mean, 1e-6)) - sigma**2 / 2
+            value = self._rng.lognormvariate(mu, sigma)
+        else:
+            raise ValueError(f"Unknown latency distribution: {c.latency}")
+        return max(value, 0.0)
+
+    def should_fail(self) -> bool:
+        return self._rng.random() < self.config.error_rate
+
+
+def _message_text(message: dict) -> str:
+    """Text of a message, content may be a string or a list of content blocks"""
+    content = message.get("content") or ""
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content)
+
+
+def _cacheable_prefix(body: dict) -> str:
+    """Text up to the last ``cache_control`` breakpoint of the request"""
+    prefix, cached = "", ""
+    for message in body.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            prefix += content
+            continue
+        for block in content or []:
+            prefix += block.get("text", "")
+            if block.get("cache_control"):
+                cached = prefix
+    return cached
+
+
+_OUTLINE_FLOW_RE = re.compile(r"^([\w.\-]+): ([\w.\-]+) -> ([\w.\-]+)", re.M)
+
+
+def _edit_operations(body: dict) -> dict:
+    """Patch inserting a task into the first flow of the outlined diagram"""
+    prompt = _message_text(body.get("messages", [{}])[-1])
+    match = _OUTLINE_FLOW_RE.search(prompt)
+    if match is None:
+        return {"operations": []}
+    flow_id, _, target = match.groups()
+    node_id = f"Task_edit_{len(prompt)}"
+    blank = {"id": "", "type": "", "name": "", "from": "", "to": ""}
+    return {
+        "operations": [
+            {
+                **blank,
+                "op": "add_node",
+                "id": node_id,
+                "type": "task",
+                "name": "Review order",
+            },
+            {**blank, "op": "reconnect_flow", "id": flow_id, "to": node_id},
+            {**blank, "op": "add_flow", "from": node_id, "to": target},
+        ]
+    }
+
+
+def _completion_text(body: dict) -> str:
+    """Plausible answer for the agent stage the request belongs to"""
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        schema = response_format.get("json_schema", {}).get("schema", {})
+        if {"nodes", "flows"} <= set(schema.get("properties", {})):
+            return json.dumps(SAMPLE_IR, ensure_ascii=False)
+        if "operations" in schema.get("properties", {}):
+            return json.dumps(_edit_operations(body), ensure_ascii=False)
+        return "{}"
+    system_prompt = next(
+        (
+            _message_text(m)
+            for m in body.get("messages", [])
+            if m.get("role") == "system"
+        ),
+        "",
+    )
+    if "BPMN 2.0 XML" in system_prompt:
+        return XML_BASE_BPMN_PATH.read_text(encoding="utf-8")
+    return PROCESS_TEXT
+
+
+def _split_tokens(text: str, chars_per_token: int) -> list[str]:
+    return [text[i : i + chars_per_token] for i in range(0, len(text), chars_per_token)]
+
+
+def _usage(
+    body: dict, completion_tokens: int, cached_tokens: int, chars_per_token: int
+) -> dict:
+    prompt_chars = sum(len(_message_text(m)) for m in body.get("messages", []))
+    prompt_tokens = math.ceil(prompt_chars / chars_per_token)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": cached_tokens},
+    }
+
+
+def create_mock_app(config: MockConfig | None = None) -> FastAPI:
+    config = config or MockConfig()
+    sampler = LatencySampler(config)
+    app = FastAPI(title="Mock OpenRouter")
+    app.state.config = config
+    app.state.stats = {"requests": 0, "rate_limited": 0}
+    # Prompt prefixes marked with cache_control that were already processed
+    cached_prefixes: set[str] = set()
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.stats["requests"] += 1
+
+        if sampler.should_fail():
+            app.state.stats["rate_limited"] += 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit exceeded", "code": 429}},
+                status_code=429,
+                headers={"Retry-After": f"{config.retry_after:g}"},
+            )
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        model = body.get("model", "mock-model")
+        tokens = _split_tokens(_completion_text(body), config.chars_per_token)
+        token_delay = 1 / config.tokens_per_second if config.tokens_per_second else 0
+        prefix = _cacheable_prefix(body)
+        cached_tokens = 0
+        if prefix in cached_prefixes:
+            cached_tokens = len(prefix) // config.chars_per_token
+        elif prefix:
+            cached_prefixes.add(prefix)
+        usage = _usage(body, len(tokens), cached_tokens, config.chars_per_token)
+        uncached_tokens = usage["prompt_tokens"] - cached_tokens
+
+        await asyncio.sleep(
+            sampler.first_token_delay()
+            + uncached_tokens / 1000 * config.prefill_seconds_per_1k_tokens
+        )
+
+        if not body.get("stream"):
+            await asyncio.sleep(token_delay * max(len(tokens) - 1, 0))
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "".join(tokens)},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": usage,
+            }
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage")
+
+        def chunk(delta: dict, finish_reason=None, chunk_usage=None) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": (
+                    []
+                    if chunk_usage
+                    else [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                ),
+            }
+            if chunk_usage:
+                payload["usage"] = chunk_usage
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def stream():
+            yield chunk({"role": "assistant", "content": ""})
+            for i, token in enumerate(tokens):
+                if i and token_delay:
+                    await asyncio.sleep(token_delay)
+                yield chunk({"content": token})
+            yield chunk({}, finish_reason="stop")
+            if include_usage:
+                yield chunk({}, chunk_usage=usage)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "mock-model", "object": "model"}]}
+
+    @app.get("/stats")
+    async def stats():
+        return app.state.stats
+
+    return app
+
+
+@asynccontextmanager
+async def running_mock_server(
+    config: MockConfig | None = None, host: str = "127.0.0.1", port: int = 0
+):
+    """
+    Serve the mock on a real socket inside the current event loop and yield
+    its OpenAI base URL. Unlike the ASGI test transport, which buffers whole
+    responses, a socket delivers streamed tokens as they are produced.
+    """
+    import uvicorn
+
+    server = uvicorn.Server(
+        uvicorn.Config(
+            create_mock_app(config), host=host, port=port, log_level="warning"
+        )
+    )
+    task = asyncio.create_task(server.serve())
+    try:
+        while not server.started:
+            if task.done():
+                task.result()
+            await asyncio.sleep(0.01)
+        bound_port = server.servers[0].sockets[0].getsockname()[1]
+        yield f"http://{host}:{bound_port}/v1"
+    finally:
+        server.should_exit = True
+        await task
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenRouter server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument(
+        "--latency",
+        default="lognormal",
+        choices=["fixed", "uniform", "normal", "lognormal"],
+    )
+    parser.add_argument("--latency-mean", type=float, default=1.0)
+    parser.add_argument("--latency-spread", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--prefill-seconds-per-1k-tokens", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = MockConfig(
+        latency=args.latency,
+        latency_mean=args.latency_mean,
+        latency_spread=args.latency_spread,
+        tokens_per_second=args.tokens_per_second,
+        prefill_seconds_per_1k_tokens=args.prefill_seconds_per_1k_tokens,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    uvicorn.run(create_mock_app(config), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
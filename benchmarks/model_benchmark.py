@@ -0,0 +1,59 @@
+"""
+Typed process graph: build time, memory and integrity checks at scale.
+
+Builds ProcessGraph from BpmnDirector data of synthetic processes and runs
+the O(V + E) integrity checks (dangling flows, start/end reachability,
+orphans). Memory is compared with the nested dicts the graph replaces:
+
+    python -m benchmarks.model_benchmark --sizes 10000 100000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.layout_benchmark import make_process_graph
+from src.assemblers.xml.model import ProcessGraph
+
+
+def make_data(size: int) -> dict:
+    nodes, flows = make_process_graph(size)
+    return {"process": {"id": "Process_1", "nodes": nodes}, "flow": {"flows": flows}}
+
+
+def traced_size(build) -> int:
+    """Bytes held by the result of build (timed separately, tracing is slow)"""
+    tracemalloc.start()
+    result = build()  # noqa: F841 - kept alive while measured
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ProcessGraph at scale")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        data = make_data(size)
+        started = time.perf_counter()
+        graph = ProcessGraph.from_director_data(data)
+        build_time = time.perf_counter() - started
+        dict_bytes = traced_size(lambda: make_data(size))
+        graph_bytes = traced_size(lambda: ProcessGraph.from_director_data(data))
+
+        started = time.perf_counter()
+        issues = graph.validate()
+        validate_time = time.perf_counter() - started
+        print(
+            f"nodes {size:>7}  flows {len(graph.flows):>7}  "
+            f"build {build_time * 1000:>6.0f}ms  "
+            f"validate {validate_time * 1000:>6.0f}ms  issues {len(issues):>5}  "
+            f"graph {graph_bytes / 2**20:>5.1f}MiB  "
+            f"dicts {dict_bytes / 2**20:>5.1f}MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+End-to-end latency of the sequential agent graph vs the pipelined one.
+
+Both graphs run against the mock upstream served on a local socket, so only
+the overlap of the two stages differs between them:
+
+    python -m benchmarks.pipeline_benchmark --runs 20 --tokens-per-second 60
+
+The two modes do not do the same work: the pipelined XML call only gets the
+description up to AGENT_PIPELINE_SECTION. The input of the XML stage and
+the final answers of both modes are compared and the difference is printed
+with the timings.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from openai import AsyncOpenAI
+
+from benchmarks.load_test import percentile
+from benchmarks.mock_openrouter import MockConfig, running_mock_server
+from src.ai_generation.bpmn_agent.simple.agent import build_bpmn_agent
+from src.ai_generation.bpmn_agent.simple.streaming import USE_CACHE_KEY
+from src.ai_generation.llm_client import AsyncLLMClient
+
+
+USER_INPUT = "Customer orders goods, warehouse ships them"
+
+
+class RecordingLLMClient(AsyncLLMClient):
+    """Keeps the prompts of the XML stage (every prompt but the user input)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.xml_inputs: list[str] = []
+
+    async def generate_response_text_based(self, prompt: str, *args, **kwargs):
+        if prompt != USER_INPUT:
+            self.xml_inputs.append(prompt)
+        return await super().generate_response_text_based(prompt, *args, **kwargs)
+
+
+def build_mock_llm(base_url: str) -> RecordingLLMClient:
+    client = AsyncOpenAI(
+        api_key="mock",
+        base_url=base_url,
+        http_client=httpx.AsyncClient(timeout=None),
+        max_retries=0,
+    )
+    return RecordingLLMClient(client, "mock-model")
+
+
+async def measure(agent, runs: int, concurrency: int) -> tuple[list[float], list]:
+    semaphore = asyncio.Semaphore(concurrency)
+    state = {"user_input": USER_INPUT}
+    config = {"configurable": {USE_CACHE_KEY: False}}
+    answers = []
+
+    async def one() -> float:
+        async with semaphore:
+            started = time.monotonic()
+            result = await agent.ainvoke(state, config=config)
+            answers.append(result.get("previous_answer"))
+            return time.monotonic() - started
+
+    return await asyncio.gather(*(one() for _ in range(runs))), answers
+
+
+def compare(sequential: dict, pipelined: dict) -> dict:
+    """Whether both modes gave the XML stage the same input and answered the same"""
+    full, cut = sequential["xml_input"], pipelined["xml_input"]
+    return {
+        "same_xml_input": full == cut,
+        "dropped": full[len(cut) :].strip() if full.startswith(cut) else full,
+        "same_answers": sequential["answers"] == pipelined["answers"],
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    config = MockConfig(
+        latency=args.latency,
+        latency_mean=args.latency_mean,
+        latency_spread=args.latency_spread,
+        tokens_per_second=args.tokens_per_second,
+        seed=args.seed,
+    )
+    report = {}
+    async with running_mock_server(config) as base_url:
+        for name, pipelined in (("sequential", False), ("pipelined", True)):
+            llm = build_mock_llm(base_url)
+            agent = build_bpmn_agent(pipelined=pipelined, llm=llm).compile()
+            latencies, answers = await measure(agent, args.runs, args.concurrency)
+            report[name] = {
+                "mean": statistics.fmean(latencies),
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "xml_input": llm.xml_inputs[0] if llm.xml_inputs else "",
+                "answers": sorted(answers, key=str),
+            }
+    report["equivalence"] = compare(report["sequential"], report["pipelined"])
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs pipelined agent")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--latency", default="lognormal")
+    parser.add_argument("--latency-mean", type=float, default=0.5)
+    parser.add_argument("--latency-spread", type=float, default=0.3)
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    equivalence = report.pop("equivalence")
+    for name, stats in report.items():
+        print(
+            f"{name:<11} mean {stats['mean']:.3f}s  "
+            f"p50 {stats['p50']:.3f}s  p95 {stats['p95']:.3f}s"
+        )
+    saved = report["sequential"]["mean"] - report["pipelined"]["mean"]
+    print(f"Pipelining saves {saved:.3f}s per generation on average")
+    if equivalence["same_xml_input"]:
+        print("The XML stage got the same description in both modes")
+    else:
+        print(
+            "The pipelined XML stage did not get this part of the description:\n"
+            + equivalence["dropped"]
+        )
+    print(
+        "Final answers are "
+        + (
+            "identical (the mock answers every XML call with the same diagram)"
+            if equivalence["same_answers"]
+            else "different"
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+LLMConfigManager.get_call_config throughput.
+
+Compares the cached manager with rendering the whole file as a fresh Jinja
+template and parsing the result on every call (the previous behaviour),
+for every prompt of the agent, with and without template variables:
+
+    python -m benchmarks.prompt_config_benchmark --calls 2000
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import yaml
+from jinja2 import Template
+
+from src.ai_generation.managers.llm_config import LLMConfigManager
+
+PROMPTS_DIR = Path("data/prompts/simple")
+VARIABLES = {"UNIQUE_ID": "1", "PROCESS_ID": "1", "role": "Analyst"}
+
+
+def uncached_config(path: Path, **kwargs) -> dict:
+    return yaml.safe_load(Template(path.read_text(encoding="utf-8")).render(**kwargs))
+
+
+def throughput(call, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        call()
+    return calls / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt config throughput")
+    parser.add_argument("--calls", type=int, default=2_000)
+    args = parser.parse_args()
+
+    manager = LLMConfigManager(str(PROMPTS_DIR))
+    for path in sorted(PROMPTS_DIR.glob("*.yaml")):
+        for label, variables in (("static", {}), ("variables", VARIABLES)):
+            manager.get_call_config(path.stem, **variables)  # compile once
+            cached = throughput(
+                lambda: manager.get_call_config(path.stem, **variables), args.calls
+            )
+            uncached = throughput(
+                lambda: uncached_config(path, **variables), max(args.calls // 20, 1)
+            )
+            print(
+                f"{path.stem:<20} {label:<9}  cached {cached:>9.0f}/s  "
+                f"uncached {uncached:>7.0f}/s  x{cached / uncached:>6.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
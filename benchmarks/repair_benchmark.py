@@ -0,0 +1,152 @@
+"""
+Local repair of faulty BPMN XML vs asking the model to fix it.
+
+Valid documents are assembled from synthetic processes, then typical LLM
+faults are injected. Reports the share repaired locally, local repair time
+and the latency an LLM fix-up call would have cost instead, measured by
+sending a sample of the documents to the fix-up prompt on the mock upstream:
+
+    python -m benchmarks.repair_benchmark --documents 200
+"""
+
+import argparse
+import asyncio
+import random
+import re
+import statistics
+import time
+from collections import Counter
+
+import httpx
+from openai import AsyncOpenAI
+
+from benchmarks.layout_benchmark import make_process_graph
+from benchmarks.load_test import percentile
+from benchmarks.mock_openrouter import MockConfig, running_mock_server
+from src.ai_generation.llm_client import AsyncLLMClient
+from src.ai_generation.managers.llm_config import LLMConfigManager
+from src.assemblers.xml.director import BpmnDirector
+from src.assemblers.xml.validation import repair_bpmn
+
+
+def _drop_diagram(xml: str, rng: random.Random) -> str:
+    return re.sub(r"<bpmndi:BPMNDiagram[\s\S]*</bpmndi:BPMNDiagram>", "", xml)
+
+
+def _drop_shapes(xml: str, rng: random.Random) -> str:
+    shapes = re.findall(r"<bpmndi:BPMNShape[\s\S]*?</bpmndi:BPMNShape>", xml)
+    for shape in rng.sample(shapes, max(1, len(shapes) // 3)):
+        xml = xml.replace(shape, "")
+    return xml
+
+
+FAULTS = {
+    "fences": lambda xml, rng: f"Here is the diagram:\n```xml\n{xml}\n```",
+    "undeclared_prefix": lambda xml, rng: xml.replace(
+        ' xmlns:di="http://www.omg.org/spec/DD/20100524/DI"', ""
+    ),
+    "wrong_namespace": lambda xml, rng: xml.replace(
+        "20100524/MODEL", "20100524/MODEL/"
+    ),
+    "dangling_flow": lambda xml, rng: xml.replace(
+        "</bpmn:process>",
+        '<bpmn:sequenceFlow id="Flow_x" sourceRef="Node_1" targetRef="Ghost"/>'
+        "</bpmn:process>",
+    ),
+    "missing_diagram": _drop_diagram,
+    "missing_shapes": _drop_shapes,
+    "truncated": lambda xml, rng: xml[: xml.index("<bpmndi:BPMNDiagram")],
+    # Not repairable locally
+    "no_start_event": lambda xml, rng: xml.replace("startEvent", "task"),
+    "duplicate_id": lambda xml, rng: xml.replace('id="Node_2"', 'id="Node_1"', 1),
+}
+
+
+def make_documents(count: int, seed: int = 0) -> list[tuple[str, str]]:
+    """(fault name, faulty xml) pairs"""
+    rng = random.Random(seed)
+    documents = []
+    for i in range(count):
+        nodes, flows = make_process_graph(rng.randint(8, 40), seed=i)
+        director = BpmnDirector()
+        director.construct_from_json(
+            {
+                "process": {"id": "Process_1", "nodes": nodes},
+                "flow": {"flows": flows},
+            }
+        )
+        fault = rng.choice(list(FAULTS))
+        documents.append((fault, FAULTS[fault](director.to_string(), rng)))
+    return documents
+
+
+async def run(args: argparse.Namespace) -> dict:
+    documents = make_documents(args.documents)
+    outcomes, local_times, unrepaired = Counter(), [], []
+    for fault, xml in documents:
+        started = time.perf_counter()
+        result = repair_bpmn(xml)
+        local_times.append(time.perf_counter() - started)
+        outcomes[(fault, result.valid)] += 1
+        if not result.valid:
+            unrepaired.append(xml)
+
+    config = MockConfig(
+        latency=args.latency,
+        latency_mean=args.latency_mean,
+        tokens_per_second=args.tokens_per_second,
+        seed=0,
+    )
+    fixup = LLMConfigManager(r"data/prompts/simple").get_call_config("XML_repair")
+    llm_times = []
+    async with running_mock_server(config) as base_url:
+        client = AsyncOpenAI(
+            api_key="mock",
+            base_url=base_url,
+            http_client=httpx.AsyncClient(timeout=None),
+        )
+        llm = AsyncLLMClient(client, "mock-model")
+        for _, xml in documents[: args.llm_samples]:
+            started = time.perf_counter()
+            await llm.generate_response_text_based(xml, use_cache=False, **fixup)
+            llm_times.append(time.perf_counter() - started)
+
+    repaired = len(documents) - len(unrepaired)
+    llm_mean = statistics.fmean(llm_times)
+    return {
+        "outcomes": outcomes,
+        "repair_rate": repaired / len(documents),
+        "local_p50": percentile(local_times, 50),
+        "local_p95": percentile(local_times, 95),
+        "llm_mean": llm_mean,
+        "saved": repaired * llm_mean - sum(local_times),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local BPMN repair vs LLM fix-up")
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--llm-samples", type=int, default=10)
+    parser.add_argument("--latency", default="fixed")
+    parser.add_argument("--latency-mean", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    for fault in FAULTS:
+        ok, failed = (
+            report["outcomes"][(fault, True)],
+            report["outcomes"][(fault, False)],
+        )
+        print(f"{fault:<18} repaired {ok:>4}  unrepairable {failed:>4}")
+    print(
+        f"repaired locally {report['repair_rate']:.0%}  "
+        f"local p50 {report['local_p50'] * 1000:.1f}ms  "
+        f"p95 {report['local_p95'] * 1000:.1f}ms  "
+        f"llm fix-up mean {report['llm_mean']:.2f}s  "
+        f"latency saved {report['saved']:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Whole-document ``to_string`` vs chunked streaming serialization.
+
+Builds a large diagram with BpmnDirector and reports time, peak memory of
+the serialization (Python allocations, the lxml tree itself is shared by
+all variants) and bytes on the wire per content coding:
+
+    python -m benchmarks.serialization_benchmark --nodes 10000
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from benchmarks.layout_benchmark import make_process_graph
+from src.assemblers.xml.director import BpmnDirector
+from src.assemblers.xml.streaming import ENCODINGS
+
+
+def make_director(size: int) -> BpmnDirector:
+    nodes, flows = make_process_graph(size)
+    director = BpmnDirector()
+    director.construct_from_json(
+        {"process": {"id": "Process_1", "nodes": nodes}, "flow": {"flows": flows}}
+    )
+    return director
+
+
+def measure(run) -> dict:
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = run()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"time": elapsed, "peak": peak, "bytes": size}
+
+
+async def _stream_size(director: BpmnDirector, encoding, pretty_print: bool) -> int:
+    # Chunks are dropped as a socket would, only their size is kept
+    size = 0
+    async for chunk in director.builder.stream(encoding, pretty_print):
+        size += len(chunk)
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming XML serialization")
+    parser.add_argument("--nodes", type=int, default=10000)
+    args = parser.parse_args()
+
+    director = make_director(args.nodes)
+    elements = sum(1 for _ in director.builder.root.iter())
+    print(f"{args.nodes} nodes, {elements} XML elements")
+
+    variants = {
+        "to_string pretty": lambda: len(director.to_string().encode("utf-8")),
+        "stream pretty": lambda: asyncio.run(_stream_size(director, None, True)),
+        "stream compact": lambda: asyncio.run(_stream_size(director, None, False)),
+    }
+    for encoding in ENCODINGS:
+        variants[f"stream compact {encoding}"] = lambda encoding=encoding: asyncio.run(
+            _stream_size(director, encoding, False)
+        )
+    for name, run in variants.items():
+        stats = measure(run)
+        print(
+            f"{name:<22} {stats['time'] * 1000:>7.1f}ms  "
+            f"peak {stats['peak'] / 2**20:>6.1f}MiB  "
+            f"wire {stats['bytes'] / 2**10:>8.0f}KiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
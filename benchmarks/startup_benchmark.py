@@ -0,0 +1,93 @@
+"""
+Import-time report of the application and startup prewarm duration.
+
+Imports ``main`` in a fresh interpreter with ``-X importtime`` and lists
+the slowest top-level imports, the total and which heavy dependencies got
+loaded although /health and static files do not need them. With
+--prewarm the lifespan prewarm (graph, prompts, schemas, LLM client) is
+run and timed as well:
+
+    python -m benchmarks.startup_benchmark --top 15 --budget 1.0
+    OPENROUTER_API_KEY=mock-key-0000 python -m benchmarks.startup_benchmark --prewarm
+"""
+
+import argparse
+import asyncio
+import subprocess
+import sys
+from dataclasses import dataclass, field
+
+# Loaded on first use or by the prewarm, never by importing the app
+HEAVY_MODULES = ("langgraph", "langchain_core", "openai", "jinja2", "numpy", "scipy")
+# Seconds importing main may take (-X importtime, fresh interpreter)
+IMPORT_BUDGET_SECONDS = 1.0
+
+
+@dataclass
+class ImportReport:
+    total: float
+    # (seconds including children, module) of imports done by the module itself
+    top_level: list[tuple[float, str]] = field(default_factory=list)
+    loaded: set[str] = field(default_factory=set)
+
+    def heavy(self) -> list[str]:
+        return [name for name in HEAVY_MODULES if name in self.loaded]
+
+
+def import_report(module: str = "main", then: str = "") -> ImportReport:
+    """
+    Import the module in a fresh interpreter and parse -X importtime.
+    ``then`` is run after the import, modules it loads are in ``loaded``.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}\n{then}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    report = ImportReport(total=0.0)
+    children: list[tuple[float, str]] = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        seconds = int(cumulative) / 1_000_000
+        report.loaded.add(name.strip().split(".")[0])
+        # Two spaces of indentation per nesting level, children come first
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children.append((seconds, name.strip()))
+        elif depth == 0:
+            if name.strip() == module:
+                report.total = seconds
+                report.top_level = children
+            children = []
+    report.top_level.sort(reverse=True)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Application import-time report")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget", type=float, default=IMPORT_BUDGET_SECONDS)
+    parser.add_argument("--prewarm", action="store_true")
+    args = parser.parse_args()
+
+    report = import_report()
+    for seconds, name in report.top_level[: args.top]:
+        print(f"{seconds * 1000:>8.0f}ms  {name}")
+    print(f"{report.total * 1000:>8.0f}ms  total (budget {args.budget * 1000:.0f}ms)")
+    print(f"heavy modules loaded: {', '.join(report.heavy()) or 'none'}")
+
+    if args.prewarm:
+        from src.prewarm import prewarm
+
+        for step, seconds in asyncio.run(prewarm()).items():
+            print(f"{seconds * 1000:>8.0f}ms  prewarm {step}")
+
+    if report.total > args.budget or report.heavy():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
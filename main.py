@@ -1,23 +1,92 @@
+import asyncio
 import logging
-from fastapi import FastAPI
-from fastapi.responses import FileResponse
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
+from settings import get_settings
 from src.api_routes import router as api_router
+from src.jobs import get_job_queue
+from src.prewarm import prewarm
+from src.metrics import CONTENT_TYPE, HTTP_REQUEST_DURATION, get_metrics_registry
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Vibe BPMN")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Workers pick up jobs left queued by a previous run
+    await get_job_queue().start()
+    # Warm up in the background, /health and static files are served meanwhile
+    app.state.prewarm = (
+        asyncio.create_task(prewarm()) if get_settings().PREWARM_ON_STARTUP else None
+    )
+    yield
+    if app.state.prewarm is not None and not app.state.prewarm.done():
+        app.state.prewarm.cancel()
+    await get_job_queue().stop()
+    # Release pooled upstream connections on shutdown
+    from src.ai_generation.llm_client import close_async_llm_client
+
+    await close_async_llm_client()
+
+
+app = FastAPI(title="Vibe BPMN", lifespan=lifespan)
 app.include_router(api_router, prefix="/api")
 app.mount("/static", StaticFiles(directory="static", html=True), name="static")
 
 
+@app.middleware("http")
+async def record_request_duration(request: Request, call_next):
+    """
+    Time until the response starts, streamed bodies are not waited for.
+    Server-Sent Events streams run as long as the generation, their time to
+    headers says nothing, so they are left out of the histogram.
+    """
+    started = time.monotonic()
+    status = 500
+    event_stream = False
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        event_stream = response.headers.get("content-type", "").startswith(
+            "text/event-stream"
+        )
+        return response
+    finally:
+        if not event_stream:
+            # Route template keeps label cardinality low (no query / path params)
+            route = request.scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                time.monotonic() - started,
+                method=request.method,
+                route=getattr(route, "path", "unmatched"),
+                status=str(status),
+            )
+
+
 @app.get("/health")
 async def health():
     logger.info("Health check successful")
     return {"status": "OK"}
 
 
+@app.get("/ready")
+async def ready():
+    """503 until the startup prewarm is done, for readiness probes"""
+    task = getattr(app.state, "prewarm", None)
+    if task is not None and not task.done():
+        return JSONResponse({"status": "WARMING"}, status_code=503)
+    return {"status": "OK"}
+
+
 @app.get("/")
 async def read_root():
     return FileResponse("static/index.html")
+
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(get_metrics_registry().render(), media_type=CONTENT_TYPE)
@@ -6,6 +6,7 @@ from pydantic import (
 )
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from enum import Enum
+from typing import Literal
 
 
 class ENV_ENUM(str, Enum):
@@ -32,6 +33,208 @@ class Settings(BaseSettings):
         default="anthropic/claude-3-haiku",
         description="OpenRouter model name",
     )
+    OPENROUTER_BASE_URL: str = Field(
+        default="https://openrouter.ai/api/v1",
+        description="OpenAI-compatible API base URL",
+    )
+
+    # ==== LLM HTTP TRANSPORT ====
+    LLM_HTTP2: bool = Field(
+        default=True, description="Use HTTP/2 for upstream LLM connections"
+    )
+    LLM_MAX_CONNECTIONS: int = Field(
+        default=100, description="Max open upstream connections in the pool", ge=1
+    )
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = Field(
+        default=20, description="Max idle keep-alive connections in the pool", ge=0
+    )
+    LLM_KEEPALIVE_EXPIRY: float = Field(
+        default=30.0, description="Idle keep-alive connection lifetime, seconds", gt=0
+    )
+    LLM_TIMEOUT: float = Field(
+        default=120.0, description="Upstream LLM request timeout, seconds", gt=0
+    )
+
+    # ==== UPSTREAM SCHEDULER ====
+    UPSTREAM_RATE_LIMIT: float = Field(
+        default=5.0, description="Upstream requests per second, 0 disables", ge=0
+    )
+    UPSTREAM_BURST: int = Field(
+        default=10, description="Token bucket size for request bursts", ge=1
+    )
+    UPSTREAM_INITIAL_CONCURRENCY: int = Field(
+        default=8, description="Initial adaptive concurrency window", ge=1
+    )
+    UPSTREAM_MIN_CONCURRENCY: int = Field(
+        default=1, description="Lower bound of the concurrency window", ge=1
+    )
+    UPSTREAM_MAX_CONCURRENCY: int = Field(
+        default=32, description="Upper bound of the concurrency window", ge=1
+    )
+    UPSTREAM_MAX_QUEUE: int = Field(
+        default=100, description="Max requests waiting for an upstream slot", ge=0
+    )
+    UPSTREAM_MAX_RETRIES: int = Field(
+        default=4, description="Retries of 429/5xx/connection failures", ge=0
+    )
+    UPSTREAM_BACKOFF_BASE: float = Field(
+        default=0.5, description="Base delay of exponential backoff, seconds", gt=0
+    )
+    UPSTREAM_BACKOFF_MAX: float = Field(
+        default=20.0, description="Max delay of exponential backoff, seconds", gt=0
+    )
+
+    # ==== HEDGED REQUESTS ====
+    LLM_HEDGE_ENABLED: bool = Field(
+        default=False, description="Race slow requests against a fallback model"
+    )
+    LLM_HEDGE_MODEL: str = Field(
+        default="", description="Fallback OpenRouter model for hedged requests"
+    )
+    LLM_HEDGE_PERCENTILE: float = Field(
+        default=0.9,
+        description="Latency percentile of the primary model used as hedge delay",
+        gt=0,
+        le=1,
+    )
+    LLM_HEDGE_MIN_DELAY: float = Field(
+        default=1.0, description="Min hedge delay, seconds", ge=0
+    )
+    LLM_HEDGE_DEFAULT_DELAY: float = Field(
+        default=10.0, description="Hedge delay until enough samples, seconds", ge=0
+    )
+    LLM_HEDGE_MIN_SAMPLES: int = Field(
+        default=20, description="Samples needed to use the percentile delay", ge=1
+    )
+
+    # ==== PROVIDER PROMPT CACHING ====
+    LLM_PROMPT_CACHING: bool = Field(
+        default=True,
+        description="Send cache_control breakpoints for static system prompts",
+    )
+
+    # ==== PROMPT CONFIGS ====
+    PROMPT_BYTECODE_CACHE_DIR: str = Field(
+        default=".cache/jinja",
+        description="Directory of compiled prompt templates, empty to compile on every start",
+    )
+
+    # ==== LLM RESPONSE CACHE ====
+    LLM_CACHE_ENABLED: bool = Field(default=True, description="Cache LLM responses")
+    LLM_CACHE_PATH: str = Field(
+        default=".cache/llm_responses.sqlite3",
+        description="SQLite file of the on-disk cache tier, empty for memory only",
+    )
+    LLM_CACHE_MEMORY_SIZE: int = Field(
+        default=256, description="Max responses in the in-memory LRU tier", ge=1
+    )
+    LLM_CACHE_DISK_SIZE: int = Field(
+        default=10_000, description="Max responses in the on-disk tier", ge=1
+    )
+    LLM_CACHE_TTL: float = Field(
+        default=7 * 24 * 3600, description="Cached response lifetime, seconds", gt=0
+    )
+    LLM_CACHE_ALLOW_SAMPLED: bool = Field(
+        default=False,
+        description="Also cache responses of calls with temperature > 0",
+    )
+
+    # ==== SIMILAR PROMPT INDEX ====
+    PROMPT_INDEX_ENABLED: bool = Field(
+        default=False,
+        description="Serve stored diagrams for near-duplicate prompts, "
+        "only used when LLM_CACHE_ALLOW_SAMPLED is on: the diagrams come from "
+        "sampled (temperature > 0) calls",
+    )
+    PROMPT_INDEX_THRESHOLD: float = Field(
+        default=0.95,
+        description="Min Jaccard similarity of prompts to reuse a diagram, "
+        "a single changed word already scores about 0.87",
+        ge=0,
+        le=1,
+    )
+    PROMPT_INDEX_SIZE: int = Field(
+        default=5_000, description="Max prompts kept in the index", ge=1
+    )
+
+    # ==== AGENT ====
+    AGENT_OUTPUT_FORMAT: Literal["xml", "ir"] = Field(
+        default="xml",
+        description="xml: the model writes BPMN XML, "
+        "ir: the model writes a compact JSON graph and the XML is assembled locally",
+    )
+    AGENT_PIPELINED: bool = Field(
+        default=False,
+        description="Start XML generation while the process description streams, "
+        "the XML call does not get AGENT_PIPELINE_SECTION and later sections",
+    )
+    AGENT_PIPELINE_SECTION: str = Field(
+        default="MESSAGE_EXCHANGES",
+        description="Description section whose heading starts the XML generation. "
+        "This section and the ones after it are dropped from the XML input: "
+        "with the default, cross-pool message exchanges are left to the XML model. "
+        "They are only generated for the token stream, otherwise the description "
+        "call is cancelled at the heading",
+    )
+    AGENT_VALIDATE: bool = Field(
+        default=True,
+        description="Validate generated XML and repair common faults locally",
+    )
+    AGENT_LLM_FIXUP: bool = Field(
+        default=True,
+        description="Ask the model to fix documents the local repair cannot",
+    )
+    AGENT_ANALYZE: bool = Field(
+        default=True,
+        description="Return a structural analysis (deadlocks, loops, unreachable "
+        "nodes, unbalanced gateways) with generated diagrams",
+    )
+
+    # ==== BATCH GENERATION ====
+    BATCH_CONCURRENCY: int = Field(
+        default=4, description="Max agents running at once per batch", ge=1
+    )
+    BATCH_MAX_SIZE: int = Field(
+        default=100, description="Max inputs accepted in one batch", ge=1
+    )
+
+    # ==== JOB QUEUE ====
+    JOB_WORKERS: int = Field(
+        default=2, description="Background workers running generation jobs", ge=1
+    )
+    JOB_MAX_QUEUE: int = Field(
+        default=1_000, description="Max queued jobs before rejecting new ones", ge=1
+    )
+    JOB_STORE_PATH: str = Field(
+        default=".cache/jobs.sqlite3", description="SQLite job store location"
+    )
+    JOB_RETENTION: float = Field(
+        default=7 * 24 * 3600,
+        description="Seconds finished jobs are kept, 0 keeps them forever",
+    )
+
+    # ==== XML RESPONSES ====
+    XML_STREAM_CHUNK_SIZE: int = Field(
+        default=64 * 1024,
+        description="Bytes of XML serialized before a chunk is compressed and sent",
+        ge=1024,
+    )
+    XML_GZIP_LEVEL: int = Field(
+        default=6, description="gzip level of XML responses", ge=1, le=9
+    )
+    XML_BROTLI_QUALITY: int = Field(
+        default=5,
+        description="brotli quality of XML responses",
+        ge=0,
+        le=11,
+    )
+
+    # ==== STARTUP ====
+    PREWARM_ON_STARTUP: bool = Field(
+        default=True,
+        description="Load the agent graph, prompts, schemas and the LLM client "
+        "in the background at startup instead of on the first generation",
+    )
 
     # ==== SITE ====
     BASE_URL: str = Field(
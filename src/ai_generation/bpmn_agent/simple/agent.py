@@ -1,19 +1,108 @@
+import asyncio
+import inspect
+import json
+import logging
+import re
+import time
+from typing import AsyncIterator, Callable
 from langgraph.graph import START, END, StateGraph
-from functools import partial
+from functools import partial, wraps
 
-from src.ai_generation.llm_client import get_llm_client
+from settings import get_settings
+from src.ai_generation.llm_client import AsyncLLMClient, get_async_llm_client
+from src.ai_generation.prompt_index import PromptMatch, get_prompt_index
+from src.ai_generation.single_flight import get_in_flight
+from src.ai_generation.managers.json_schema import JsonSchemaManager
 from src.ai_generation.managers.llm_config import LLMConfigManager
 from src.ai_generation.bpmn_agent.simple.state import SimpleBPMNAgent
 from src.ai_generation.bpmn_agent.simple.get_bpmn_node import generate_bpmn
+from src.ai_generation.bpmn_agent.simple.get_bpmn_ir_node import generate_bpmn_from_ir
+from src.ai_generation.bpmn_agent.simple.validate_node import validate_bpmn_answer
+from src.metrics import NODE_DURATION
 from src.schemas import SUserInputData
 from src.ai_generation.bpmn_agent.simple.imagine_procces_node import generate_process
+from src.ai_generation.bpmn_agent.simple.pipelined_node import (
+    generate_process_and_bpmn,
+)
+from src.ai_generation.bpmn_agent.simple.streaming import (
+    STREAM_TOKENS_KEY,
+    USE_CACHE_KEY,
+)
 
+logger = logging.getLogger(__name__)
 
-def build_bpmn_agent() -> StateGraph:
+# Complete BPMN document inside the raw llm output (prolog is optional)
+_XML_DOCUMENT_RE = re.compile(
+    r"(<\?xml[\s\S]*?|<(?:\w+:)?definitions[\s\S]*?)</(?:\w+:)?definitions>"
+)
+
+
+def _timed_node(name: str, node: Callable) -> Callable:
+    """Wrap a graph node to record its duration (signature is kept for LangGraph)"""
+
+    @wraps(node)
+    async def timed(*args, **kwargs):
+        started = time.monotonic()
+        try:
+            result = node(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        finally:
+            NODE_DURATION.observe(time.monotonic() - started, node=name)
+
+    return timed
+
+
+def build_bpmn_agent(
+    pipelined: bool = False,
+    llm: AsyncLLMClient | None = None,
+    output_format: str = "xml",
+    validate: bool = True,
+    llm_fixup: bool = True,
+) -> StateGraph:
+    """
+    Build the agent graph.
+    Sequential: 'imagine' then 'generate'. Pipelined: one node that starts
+    the XML generation while the business description is still streamed.
+    With output_format 'ir' the 'generate' node asks for a compact JSON graph
+    and assembles the XML locally (the pipelined mode is XML only).
+    With validate the XML goes through a 'validate' node that repairs it,
+    llm_fixup lets it ask the model when the local repair is not enough.
+    """
     # Define managers and LLM client
-    llm = get_llm_client()
+    llm = llm or get_async_llm_client()
     prompt_manager = LLMConfigManager(r"data/prompts/simple")
     agent_builder = StateGraph(SimpleBPMNAgent)
+    last_node = END
+    if validate:
+        validate_with_config = partial(
+            validate_bpmn_answer,
+            llm=llm,
+            fixup_configuration=(
+                prompt_manager.get_call_config("XML_repair") if llm_fixup else None
+            ),
+        )
+        agent_builder.add_node(
+            "validate", _timed_node("validate", validate_with_config)
+        )
+        agent_builder.add_edge("validate", END)
+        last_node = "validate"
+
+    if pipelined and output_format == "xml":
+        pipeline_with_config = partial(
+            generate_process_and_bpmn,
+            llm=llm,
+            process_configuration=prompt_manager.get_call_config("business_generation"),
+            bpmn_configuration=prompt_manager.get_call_config("XML_generation"),
+            start_section=get_settings().AGENT_PIPELINE_SECTION,
+        )
+        agent_builder.add_node(
+            "pipeline", _timed_node("pipeline", pipeline_with_config)
+        )
+        agent_builder.add_edge(START, "pipeline")
+        agent_builder.add_edge("pipeline", last_node)
+        return agent_builder
 
     # Define node with partial
     generate_process_with_config = partial(
@@ -21,19 +110,34 @@ def build_bpmn_agent() -> StateGraph:
         llm=llm,
         configuration=prompt_manager.get_call_config("business_generation"),
     )
-    generate_bpmn_with_config = partial(
-        generate_bpmn,
-        llm=llm,
-        configuration=prompt_manager.get_call_config("XML_generation"),
-    )
+    if output_format == "ir":
+        generate_bpmn_with_config = partial(
+            generate_bpmn_from_ir,
+            llm=llm,
+            configuration=prompt_manager.get_call_config("IR_generation"),
+            json_schema=json.loads(
+                JsonSchemaManager(r"data/bpmn_schemas").get_schema("ir")
+            ),
+            fallback_configuration=prompt_manager.get_call_config("XML_generation"),
+        )
+    else:
+        generate_bpmn_with_config = partial(
+            generate_bpmn,
+            llm=llm,
+            configuration=prompt_manager.get_call_config("XML_generation"),
+        )
 
     # Build workflow
-    agent_builder.add_node("imagine", generate_process_with_config)
-    agent_builder.add_node("generate", generate_bpmn_with_config)
+    agent_builder.add_node(
+        "imagine", _timed_node("imagine", generate_process_with_config)
+    )
+    agent_builder.add_node(
+        "generate", _timed_node("generate", generate_bpmn_with_config)
+    )
 
     agent_builder.add_edge(START, "imagine")
     agent_builder.add_edge("imagine", "generate")
-    agent_builder.add_edge("generate", END)
+    agent_builder.add_edge("generate", last_node)
 
     return agent_builder
 
@@ -41,17 +145,182 @@ def build_bpmn_agent() -> StateGraph:
 _agent = None
 
 
-def get_agent_answer(initial_state: dict) -> dict:
+def get_compiled_agent():
     global _agent
     if _agent is None:
-        _agent = build_bpmn_agent().compile()
-    result = _agent.invoke(initial_state)
+        settings = get_settings()
+        _agent = build_bpmn_agent(
+            pipelined=settings.AGENT_PIPELINED,
+            output_format=settings.AGENT_OUTPUT_FORMAT,
+            validate=settings.AGENT_VALIDATE,
+            llm_fixup=settings.AGENT_LLM_FIXUP,
+        ).compile()
+    return _agent
+
+
+async def get_agent_answer(initial_state: dict, config: dict | None = None) -> dict:
+    result = await get_compiled_agent().ainvoke(initial_state, config=config)
     return result
 
 
-def invoke_agent(user_input: SUserInputData) -> str:
-    initial_state = {
+def _build_initial_state(user_input: SUserInputData) -> dict:
+    return {
         "user_input": user_input.user_input,
         "previous_stage": "",
     }
-    return get_agent_answer(initial_state)
+
+
+def _find_similar_answer(
+    user_input: SUserInputData, use_cache: bool
+) -> PromptMatch | None:
+    """Look up a stored diagram answered for a near-duplicate prompt"""
+    index = get_prompt_index()
+    if not use_cache or index is None:
+        return None
+    if match := index.lookup(user_input.user_input):
+        logger.info(
+            "Serving stored diagram of similar prompt (similarity %.2f)",
+            match.similarity,
+        )
+    return match
+
+
+def _remember_answer(user_input: SUserInputData, state: dict) -> None:
+    """Index the answer only if it holds a complete BPMN document"""
+    index = get_prompt_index()
+    answer = state.get("previous_answer")
+    if index is not None and answer and _XML_DOCUMENT_RE.search(answer):
+        index.add(user_input.user_input, answer)
+
+
+def _run_key(user_input: SUserInputData, use_cache: bool) -> tuple:
+    """
+    Key of a graph run: the prompt with case and whitespace folded only,
+    plus every setting that changes the answer
+    """
+    settings = get_settings()
+    return (
+        " ".join(user_input.user_input.casefold().split()),
+        use_cache,
+        settings.OPENROUTER_MODEL_NAME,
+        settings.LLM_HEDGE_MODEL if settings.LLM_HEDGE_ENABLED else None,
+        settings.AGENT_OUTPUT_FORMAT,
+        settings.AGENT_PIPELINED,
+        settings.AGENT_PIPELINE_SECTION,
+        settings.AGENT_VALIDATE,
+        settings.AGENT_LLM_FIXUP,
+    )
+
+
+async def invoke_agent(user_input: SUserInputData, use_cache: bool = True) -> dict:
+    """
+    Run the agent for the user input.
+    Near-duplicate prompts are answered from the prompt index without LLM calls,
+    the match is returned in the 'prompt_match' field.
+    Concurrent calls with the same input (up to case and whitespace) and
+    config share one run.
+    """
+    if match := _find_similar_answer(user_input, use_cache):
+        return {
+            **_build_initial_state(user_input),
+            "previous_answer": match.value,
+            "prompt_match": match,
+        }
+
+    async def run_graph() -> dict:
+        result = await get_agent_answer(
+            _build_initial_state(user_input),
+            config={"configurable": {USE_CACHE_KEY: use_cache}},
+        )
+        _remember_answer(user_input, result)
+        return result
+
+    # Identical concurrent generations share one graph run
+    return dict(await get_in_flight().run(_run_key(user_input, use_cache), run_graph))
+
+
+async def invoke_agent_batch(
+    user_inputs: list[SUserInputData], concurrency: int, use_cache: bool = True
+) -> AsyncIterator[tuple[int, dict | None, Exception | None]]:
+    """
+    Run the agent for every input with at most ``concurrency`` runs at once.
+    Yields (input index, result, error) in completion order, a failed input
+    does not stop the others. Pending runs are cancelled if the consumer stops.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(index: int, user_input: SUserInputData):
+        async with semaphore:
+            try:
+                return index, await invoke_agent(user_input, use_cache), None
+            except Exception as e:
+                logger.warning("Batch item %s failed: %s", index, e)
+                return index, None, e
+
+    tasks = [
+        asyncio.ensure_future(run_one(i, user_input))
+        for i, user_input in enumerate(user_inputs)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def stream_agent(
+    user_input: SUserInputData, use_cache: bool = True
+) -> AsyncIterator[dict]:
+    """
+    Run the agent and stream its progress as events.
+
+    Event kinds:
+    - ``stage``: a graph node started, ``stage`` holds the node name
+    - ``token``: a content delta of the current stage in ``data``
+    - ``xml``: the BPMN document is complete (closing tag arrived), sent
+      again by the 'validate' stage if the document had to be repaired
+    - ``done``: final output of the agent in ``output``, plus ``prompt_match``
+      when the answer was served from the prompt index
+    """
+    if match := _find_similar_answer(user_input, use_cache):
+        if xml := _XML_DOCUMENT_RE.search(match.value):
+            yield {"event": "xml", "data": xml.group(0)}
+        yield {
+            "event": "done",
+            "output": match.value,
+            "prompt_match": {
+                "similarity": match.similarity,
+                "matched_input": match.prompt,
+            },
+        }
+        return
+
+    xml_buffer = ""
+    xml_sent = False
+    final_state = {}
+
+    async for mode, chunk in get_compiled_agent().astream(
+        _build_initial_state(user_input),
+        config={"configurable": {STREAM_TOKENS_KEY: True, USE_CACHE_KEY: use_cache}},
+        stream_mode=["custom", "values"],
+    ):
+        if mode == "values":
+            final_state = chunk
+            continue
+
+        yield chunk
+        if chunk.get("event") != "token" or chunk.get("stage") != "generate":
+            continue
+        if xml_sent:
+            continue
+        xml_buffer += chunk["data"]
+        # Only rescan when the closing tag may just have been completed
+        if "definitions>" not in xml_buffer[-(len(chunk["data"]) + 16) :]:
+            continue
+        if match := _XML_DOCUMENT_RE.search(xml_buffer):
+            xml_sent = True
+            yield {"event": "xml", "data": match.group(0)}
+
+    _remember_answer(user_input, final_state)
+    yield {"event": "done", "output": final_state.get("previous_answer", "")}
@@ -0,0 +1,67 @@
+import json
+import logging
+
+from src.ai_generation.llm_client import AsyncLLMClient, get_async_llm_client
+from src.ai_generation.managers.json_schema import JsonSchemaManager
+from src.ai_generation.managers.llm_config import LLMConfigManager
+from src.assemblers.xml.patch import DiagramPatcher, PatchError
+from src.metrics import DIAGRAM_EDITS
+
+logger = logging.getLogger(__name__)
+
+_edit_call = None
+
+
+def get_edit_call() -> tuple[dict, dict]:
+    """Configuration and JSON schema of the edit call, loaded once"""
+    global _edit_call
+    if _edit_call is None:
+        _edit_call = (
+            LLMConfigManager(r"data/prompts/simple").get_call_config("edit_generation"),
+            json.loads(JsonSchemaManager(r"data/bpmn_schemas").get_schema("patch")),
+        )
+    return _edit_call
+
+
+async def edit_diagram(
+    xml: str,
+    change_request: str,
+    use_cache: bool = True,
+    llm: AsyncLLMClient | None = None,
+) -> dict:
+    """Apply a change request to an existing diagram
+
+    The model sees a compact outline of the diagram and answers with a few
+    patch operations, the XML is patched locally. Only new nodes are placed
+    and only touched flows are routed, the rest of the diagram is unchanged.
+
+    Args:
+        xml (str): current BPMN XML
+        change_request (str): requested change in natural language
+        use_cache (bool): allow cached llm answers
+        llm (AsyncLLMClient | None): llm client, the shared one by default
+
+    Raises:
+        PatchError: the diagram, the answer or the patched result is invalid
+
+    Returns:
+        dict: patched XML in 'output' and applied 'operations'
+    """
+    patcher = DiagramPatcher(xml)
+    configuration, json_schema = get_edit_call()
+    answer = await (llm or get_async_llm_client()).generate_response_json_based(
+        f"Diagram:\n{patcher.outline()}\n\nChange request:\n{change_request}",
+        json_schema,
+        use_cache=use_cache,
+        **configuration,
+    )
+    try:
+        operations = json.loads(answer or "")["operations"]
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        raise PatchError(f"Invalid edit answer: {e}") from e
+    logger.info("Applying %s edit operations", len(operations))
+
+    output = patcher.apply(operations).to_string()
+    for operation in operations:
+        DIAGRAM_EDITS.inc(op=operation["op"])
+    return {"output": output, "operations": operations}
@@ -0,0 +1,74 @@
+import logging
+from contextlib import aclosing
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.config import get_stream_writer
+
+from .state import SimpleBPMNAgent
+from .streaming import generate_stage_text, is_cache_allowed, is_token_streaming
+from ...llm_client import AsyncLLMClient
+from src.assemblers.json.ir import IRValidationError, IrStreamAssembler
+from src.metrics import IR_RESULTS
+
+logger = logging.getLogger(__name__)
+
+
+async def generate_bpmn_from_ir(
+    state: SimpleBPMNAgent,
+    llm: AsyncLLMClient,
+    configuration: dict,
+    json_schema: dict,
+    fallback_configuration: dict | None = None,
+    config: RunnableConfig | None = None,
+) -> SimpleBPMNAgent:
+    """Generate a compact JSON graph and assemble the XML locally
+
+    The model only emits nodes and flows under structured output, ids of
+    sequence flows, DI shapes, edges and namespaces are added by BpmnDirector.
+    The answer is streamed and every node and flow is added to the document
+    as soon as its JSON object closes, an invalid one stops the stream.
+
+    Args:
+        state (SimpleBPMNAgent): state of agent
+        llm (AsyncLLMClient): llm client for content generation
+        configuration (dict): configuration for the llm call (system_prompt, temperature, ...)
+        json_schema (dict): JSON schema of the intermediate representation
+        fallback_configuration (dict | None): XML generation config used if the
+            answer cannot be assembled, None raises the error instead
+        config (RunnableConfig | None): graph run config, enables token streaming
+
+    Returns:
+        SimpleBPMNAgent: modified state with generated XML in 'previous_answer' field
+    """
+    writer = get_stream_writer() if is_token_streaming(config) else None
+    if writer:
+        writer({"event": "stage", "stage": "generate"})
+
+    assembler = IrStreamAssembler()
+    try:
+        async with aclosing(
+            llm.stream_response_json_based(
+                state["previous_answer"],
+                json_schema,
+                use_cache=is_cache_allowed(config),
+                **configuration,
+            )
+        ) as stream:
+            async for delta in stream:
+                assembler.feed(delta)
+        xml = assembler.finish()
+    except IRValidationError as e:
+        IR_RESULTS.inc(result="invalid")
+        if fallback_configuration is None:
+            raise
+        logger.warning("Invalid IR (%s), falling back to XML generation", e)
+        xml = await generate_stage_text(
+            "generate", state["previous_answer"], llm, fallback_configuration, config
+        )
+        return {**state, "previous_answer": xml}
+
+    IR_RESULTS.inc(result="valid")
+    if writer:
+        # The document is complete at once, send it as a single token
+        writer({"event": "token", "stage": "generate", "data": xml})
+    return {**state, "previous_answer": xml}
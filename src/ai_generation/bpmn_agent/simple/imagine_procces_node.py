@@ -1,21 +1,30 @@
+from langchain_core.runnables import RunnableConfig
+
 from .state import SimpleBPMNAgent
-from ...llm_client import LLMClient
+from .streaming import generate_stage_text
+from ...llm_client import AsyncLLMClient
 
 
-def generate_process(
-    state: SimpleBPMNAgent, llm: LLMClient, configuration: dict
+async def generate_process(
+    state: SimpleBPMNAgent,
+    llm: AsyncLLMClient,
+    configuration: dict,
+    config: RunnableConfig | None = None,
 ) -> SimpleBPMNAgent:
     """Generate business process as plan for given instructions
 
     Args:
         state (SimpleBPMNAgent): state of agent
-        llm (LLMClient): llm client for content generation
+        llm (AsyncLLMClient): llm client for content generation
         configuration (dict): configuration for the llm call (system_prompt, temperature, ...)
+        config (RunnableConfig | None): graph run config, enables token streaming
 
     Returns:
         SimpleBPMNAgent: modified state with generated XML in 'previous_answer' field
     """
     user_prompt = state["user_input"]
-    result = llm.generate_response_text_based(user_prompt, **configuration)
+    result = await generate_stage_text(
+        "imagine", user_prompt, llm, configuration, config
+    )
 
     return {**state, "previous_answer": result}
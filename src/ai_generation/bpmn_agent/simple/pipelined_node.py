@@ -0,0 +1,104 @@
+import asyncio
+import re
+from typing import AsyncIterator
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.config import get_stream_writer
+
+from .state import SimpleBPMNAgent
+from .streaming import generate_stage_text, is_cache_allowed, is_token_streaming
+from ...llm_client import AsyncLLMClient
+
+
+def section_heading_re(section: str) -> re.Pattern:
+    """Numbered heading of the business description, e.g. '4. MESSAGE_EXCHANGES'"""
+    return re.compile(rf"^[ \t]*\d+\.[ \t]*{re.escape(section)}\b", re.MULTILINE)
+
+
+async def generate_process_and_bpmn(
+    state: SimpleBPMNAgent,
+    llm: AsyncLLMClient,
+    process_configuration: dict,
+    bpmn_configuration: dict,
+    start_section: str,
+    config: RunnableConfig | None = None,
+) -> SimpleBPMNAgent:
+    """Generate business process and XML with overlapping llm calls
+
+    The business description is streamed and the XML call starts as soon as
+    the ``start_section`` heading arrives, with the description written so far.
+    The ``start_section`` and every later section never reach the XML call, so
+    the result can differ from the sequential graph (with MESSAGE_EXCHANGES the
+    message flows between pools are left to the XML model). Those sections
+    only feed the UI: with token streaming they are forwarded while the XML
+    call runs, and the description stream is cancelled when the XML is ready.
+    Without token streaming the description stream is cancelled at the
+    heading. Without the heading the XML call starts when the description is
+    complete.
+
+    Args:
+        state (SimpleBPMNAgent): state of agent
+        llm (AsyncLLMClient): llm client for content generation
+        process_configuration (dict): configuration of the business description call
+        bpmn_configuration (dict): configuration of the XML generation call
+        start_section (str): section heading that starts the XML generation
+        config (RunnableConfig | None): graph run config, enables token streaming
+
+    Returns:
+        SimpleBPMNAgent: modified state with generated XML in 'previous_answer' field
+    """
+    streaming = is_token_streaming(config)
+    writer = get_stream_writer() if streaming else None
+    heading_re = section_heading_re(start_section)
+
+    def start_bpmn(description: str) -> asyncio.Task:
+        # The task copies the context, so the stage keeps the graph stream writer
+        return asyncio.create_task(
+            generate_stage_text(
+                "generate", description, llm, bpmn_configuration, config
+            )
+        )
+
+    async def forward_rest(deltas: AsyncIterator[str]) -> None:
+        async for delta in deltas:
+            writer({"event": "token", "stage": "imagine", "data": delta})
+
+    if writer:
+        writer({"event": "stage", "stage": "imagine"})
+
+    description = ""
+    scan_from = 0
+    bpmn_task = forward_task = None
+    deltas = llm.stream_response_text_based(
+        state["user_input"],
+        use_cache=is_cache_allowed(config),
+        **process_configuration,
+    )
+    try:
+        async for delta in deltas:
+            description += delta
+            if writer:
+                writer({"event": "token", "stage": "imagine", "data": delta})
+            # Rescan only from the line that may hold a partial heading
+            if match := heading_re.search(description, scan_from):
+                bpmn_task = start_bpmn(description[: match.start()].rstrip())
+                break
+            scan_from = description.rfind("\n", 0, len(description) - 1) + 1
+
+        if bpmn_task is None:
+            bpmn_task = start_bpmn(description)
+        elif writer:
+            forward_task = asyncio.create_task(forward_rest(deltas))
+        if forward_task is None:
+            await deltas.aclose()
+        result = await bpmn_task
+    finally:
+        if forward_task is not None:
+            # The stream can only be closed once nothing iterates it
+            forward_task.cancel()
+            await asyncio.gather(forward_task, return_exceptions=True)
+        await deltas.aclose()
+        if bpmn_task is not None and not bpmn_task.done():
+            bpmn_task.cancel()
+
+    return {**state, "previous_answer": result}
@@ -0,0 +1,58 @@
+from langchain_core.runnables import RunnableConfig
+from langgraph.config import get_stream_writer
+
+from ...llm_client import AsyncLLMClient
+
+STREAM_TOKENS_KEY = "stream_tokens"
+USE_CACHE_KEY = "use_cache"
+
+
+def is_token_streaming(config: RunnableConfig | None) -> bool:
+    """Check if the graph run asked nodes to stream LLM tokens"""
+    if not config:
+        return False
+    return bool(config.get("configurable", {}).get(STREAM_TOKENS_KEY))
+
+
+def is_cache_allowed(config: RunnableConfig | None) -> bool:
+    """Check if the graph run allows serving LLM responses from cache"""
+    if not config:
+        return True
+    return bool(config.get("configurable", {}).get(USE_CACHE_KEY, True))
+
+
+async def generate_stage_text(
+    stage: str,
+    prompt: str,
+    llm: AsyncLLMClient,
+    configuration: dict,
+    config: RunnableConfig | None = None,
+) -> str | None:
+    """Run one LLM stage, streaming its tokens to the graph if requested
+
+    Args:
+        stage (str): name of the graph node, sent with every stream event
+        prompt (str): user prompt for the llm call
+        llm (AsyncLLMClient): llm client for content generation
+        configuration (dict): configuration for the llm call (system_prompt, temperature, ...)
+        config (RunnableConfig | None): config of the current graph run
+
+    Returns:
+        str | None: full generated text of the stage
+    """
+    use_cache = is_cache_allowed(config)
+    if not is_token_streaming(config):
+        return await llm.generate_response_text_based(
+            prompt, use_cache=use_cache, **configuration
+        )
+
+    writer = get_stream_writer()
+    writer({"event": "stage", "stage": stage})
+
+    chunks = []
+    async for delta in llm.stream_response_text_based(
+        prompt, use_cache=use_cache, **configuration
+    ):
+        chunks.append(delta)
+        writer({"event": "token", "stage": stage, "data": delta})
+    return "".join(chunks)
@@ -0,0 +1,108 @@
+import logging
+import time
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.config import get_stream_writer
+
+from .state import SimpleBPMNAgent
+from .streaming import is_cache_allowed, is_token_streaming
+from ...llm_client import AsyncLLMClient
+from src.assemblers.xml.validation import BpmnIssue, RepairResult, repair_bpmn
+from src.metrics import BPMN_REPAIR_DURATION, BPMN_REPAIRS, BPMN_VALIDATION
+
+logger = logging.getLogger(__name__)
+
+
+def _fixup_prompt(answer: str, result: RepairResult) -> str:
+    problems = "\n".join(f"- {issue}" for issue in result.issues)
+    return f"Problems:\n{problems}\n\nDocument:\n{answer}"
+
+
+async def validate_bpmn_answer(
+    state: SimpleBPMNAgent,
+    llm: AsyncLLMClient,
+    fixup_configuration: dict | None = None,
+    config: RunnableConfig | None = None,
+) -> SimpleBPMNAgent:
+    """Validate the generated XML and repair it
+
+    Common faults are repaired locally. Only a document the local repair
+    cannot fix (or fails on) is sent back to the model together with the
+    found problems. If that fails too, the answer is left as generated.
+
+    Args:
+        state (SimpleBPMNAgent): state of agent
+        llm (AsyncLLMClient): llm client for the fix-up call
+        fixup_configuration (dict | None): configuration for the fix-up call,
+            None disables it
+        config (RunnableConfig | None): graph run config, enables token streaming
+
+    Returns:
+        SimpleBPMNAgent: state with the valid XML in 'previous_answer' field
+    """
+    answer = state.get("previous_answer")
+    if not answer:
+        return state
+    writer = get_stream_writer() if is_token_streaming(config) else None
+    if writer:
+        writer({"event": "stage", "stage": "validate"})
+
+    started = time.monotonic()
+    result = _repair(answer)
+    BPMN_REPAIR_DURATION.observe(time.monotonic() - started, method="local")
+    for fault in result.repairs:
+        BPMN_REPAIRS.inc(fault=fault)
+
+    if result.valid:
+        BPMN_VALIDATION.inc(result="repaired" if result.repairs else "valid")
+        xml = result.xml
+    else:
+        logger.warning(
+            "Generated XML cannot be repaired locally: %s",
+            "; ".join(map(str, result.issues)),
+        )
+        xml = await _fixup(answer, result, llm, fixup_configuration, config)
+        if xml is None:
+            BPMN_VALIDATION.inc(result="invalid")
+            return state
+        BPMN_VALIDATION.inc(result="llm_fixed")
+
+    if xml != answer and writer:
+        writer({"event": "xml", "data": xml})
+    return {**state, "previous_answer": xml}
+
+
+def _repair(answer: str) -> RepairResult:
+    """repair_bpmn that reports its own failure as an issue instead of raising"""
+    try:
+        return repair_bpmn(answer)
+    except Exception as e:
+        logger.exception("Local repair of generated XML failed")
+        return RepairResult(None, issues=[BpmnIssue("repair_failed", str(e))])
+
+
+async def _fixup(
+    answer: str,
+    result: RepairResult,
+    llm: AsyncLLMClient,
+    configuration: dict | None,
+    config: RunnableConfig | None,
+) -> str | None:
+    """One targeted llm call, its answer goes through the local repair again"""
+    if configuration is None:
+        return None
+    started = time.monotonic()
+    try:
+        fixed = await llm.generate_response_text_based(
+            _fixup_prompt(answer, result),
+            use_cache=is_cache_allowed(config),
+            **configuration,
+        )
+    except Exception as e:
+        logger.warning("LLM fix-up failed: %s", e)
+        return None
+    finally:
+        BPMN_REPAIR_DURATION.observe(time.monotonic() - started, method="llm")
+
+    fixed_result = _repair(fixed)
+    return fixed_result.xml if fixed_result.valid else None
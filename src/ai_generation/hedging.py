@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import time
+from collections import Counter, deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any
+
+from settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """
+    Sliding window of latencies with percentile queries.
+
+    A censored sample is a lower bound: the request was cancelled after
+    that long without answering (it lost a hedged race). Percentiles use
+    the Kaplan-Meier estimate, so the slow tail that triggered hedges is
+    kept in the distribution instead of being cut off.
+    """
+
+    def __init__(self, window: int = 200):
+        # (latency, censored)
+        self._samples: deque[tuple[float, bool]] = deque(maxlen=window)
+
+    def add(self, latency: float, censored: bool = False) -> None:
+        self._samples.append((latency, censored))
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> float | None:
+        if not self._samples:
+            return None
+        # Exact samples first on ties, a censored one is still running there
+        ordered = sorted(self._samples)
+        survival, at_risk = 1.0, len(ordered)
+        for latency, censored in ordered:
+            if not censored:
+                survival *= 1 - 1 / at_risk
+                if survival <= 1 - p + 1e-9:
+                    return latency
+            at_risk -= 1
+        # Percentile beyond the longest exact sample, the largest bound is known
+        return ordered[-1][0]
+
+    def expected_remaining(self, elapsed: float) -> float:
+        """
+        Mean remaining time of samples that were still running at ``elapsed``,
+        censored samples count at their lower bound.
+        """
+        slower = [s - elapsed for s, _ in self._samples if s > elapsed]
+        return sum(slower) / len(slower) if slower else 0.0
+
+
+class Hedger:
+    """
+    Hedged requests against a fallback model.
+
+    The primary request gets a head start equal to a percentile of its
+    recently observed latency (time to first token for streams). If it has
+    not answered by then, the same request is sent to the fallback model,
+    the first one to answer wins and the other one is cancelled.
+    """
+
+    def __init__(
+        self,
+        fallback_model: str,
+        percentile: float = 0.9,
+        min_delay: float = 1.0,
+        default_delay: float = 10.0,
+        min_samples: int = 20,
+    ):
+        self.fallback_model = fallback_model
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.default_delay = default_delay
+        self.min_samples = min_samples
+
+        self.response_latency = LatencyTracker()
+        self.first_token_latency = LatencyTracker()
+
+        self._requests = 0
+        self._hedged = 0
+        # Wins and participations in hedged races only
+        self._wins: Counter[str] = Counter()
+        self._races: Counter[str] = Counter()
+        self._latency_saved = 0.0
+
+    def hedge_delay(self, tracker: LatencyTracker) -> float:
+        """Head start of the primary request before hedging"""
+        if len(tracker) < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, tracker.percentile(self.percentile))
+
+    def _record(
+        self,
+        tracker: LatencyTracker,
+        primary: str,
+        winner: str,
+        elapsed: float,
+        hedged: bool,
+    ) -> None:
+        if hedged:
+            self._wins[winner] += 1
+        if winner != primary:
+            self._latency_saved += tracker.expected_remaining(elapsed)
+        # The primary lost after ``elapsed``, its latency is at least that
+        tracker.add(elapsed, censored=winner != primary)
+
+    async def race(
+        self,
+        primary_model: str,
+        primary: Callable[[], Awaitable[Any]],
+        hedge: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Await ``primary``, hedged with ``hedge`` after the percentile delay"""
+        self._requests += 1
+        started = time.monotonic()
+        tasks = {asyncio.ensure_future(primary()): primary_model}
+        tracker = self.response_latency
+
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay(tracker))
+            if not done:
+                self._start_hedge(primary_model)
+                tasks[asyncio.ensure_future(hedge())] = self.fallback_model
+
+            winner = await self._first_successful(tasks)
+            model = tasks[winner]
+            elapsed = time.monotonic() - started
+            self._record(tracker, primary_model, model, elapsed, len(tasks) > 1)
+            return winner.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def race_stream(
+        self,
+        primary_model: str,
+        primary: Callable[[], AsyncIterator[str]],
+        hedge: Callable[[], AsyncIterator[str]],
+    ) -> AsyncIterator[str]:
+        """Stream from ``primary`` or ``hedge``, whichever yields a token first"""
+        self._requests += 1
+        started = time.monotonic()
+        tracker = self.first_token_latency
+        primary_stream = primary()
+        streams = {asyncio.ensure_future(_first_item(primary_stream)): primary_stream}
+        tasks = {next(iter(streams)): primary_model}
+
+        winner = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay(tracker))
+            if not done:
+                self._start_hedge(primary_model)
+                hedge_stream = hedge()
+                task = asyncio.ensure_future(_first_item(hedge_stream))
+                streams[task] = hedge_stream
+                tasks[task] = self.fallback_model
+
+            winner = await self._first_successful(tasks)
+            elapsed = time.monotonic() - started
+            self._record(tracker, primary_model, tasks[winner], elapsed, len(tasks) > 1)
+        finally:
+            # Stop the losers (or everything on error) before closing their streams
+            for task, stream in streams.items():
+                if task is winner:
+                    continue
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                await stream.aclose()
+
+        first, exhausted = winner.result()
+        if exhausted:
+            return
+        try:
+            yield first
+            async for item in streams[winner]:
+                yield item
+        finally:
+            await streams[winner].aclose()
+
+    def _start_hedge(self, primary_model: str) -> None:
+        self._hedged += 1
+        self._races[primary_model] += 1
+        self._races[self.fallback_model] += 1
+        logger.info(
+            "Hedging slow %s request with %s", primary_model, self.fallback_model
+        )
+
+    @staticmethod
+    async def _first_successful(tasks: dict[asyncio.Future, str]) -> asyncio.Future:
+        """First task finished without error, or raise the first error"""
+        pending = set(tasks)
+        first_error = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task
+                first_error = first_error or task.exception()
+        raise first_error
+
+    def stats(self) -> dict:
+        """Hedge rate, wins and win rate per model, estimated latency saved"""
+        wins = dict(self._wins)
+        return {
+            "requests": self._requests,
+            "hedged": self._hedged,
+            "hedge_rate": self._hedged / self._requests if self._requests else 0.0,
+            "wins": wins,
+            "win_rate": {
+                model: self._wins[model] / races for model, races in self._races.items()
+            },
+            "latency_saved_seconds": self._latency_saved,
+        }
+
+
+async def _first_item(stream: AsyncIterator[str]) -> tuple[str | None, bool]:
+    """First item of the stream and whether the stream was already empty"""
+    try:
+        return await anext(stream), False
+    except StopAsyncIteration:
+        return None, True
+
+
+def build_hedger() -> Hedger | None:
+    """Build a hedger from settings, None if hedging is disabled"""
+    settings = get_settings()
+    if not settings.LLM_HEDGE_ENABLED or not settings.LLM_HEDGE_MODEL:
+        return None
+    return Hedger(
+        fallback_model=settings.LLM_HEDGE_MODEL,
+        percentile=settings.LLM_HEDGE_PERCENTILE,
+        min_delay=settings.LLM_HEDGE_MIN_DELAY,
+        default_delay=settings.LLM_HEDGE_DEFAULT_DELAY,
+        min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+    )
+
+
+_hedger = None
+
+
+def get_hedger() -> Hedger | None:
+    """Get the process-wide hedger, None if hedging is disabled"""
+    global _hedger
+
+    if _hedger is None:
+        _hedger = build_hedger()
+    return _hedger
@@ -0,0 +1,51 @@
+import logging
+
+import httpx
+
+from settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+_http_client: httpx.AsyncClient | None = None
+
+
+def build_http_client() -> httpx.AsyncClient:
+    """
+    Build a pooled async HTTP client for upstream LLM calls.
+
+    Pool size, keep-alive and HTTP/2 are taken from settings, so every
+    coroutine of the process shares the same set of upstream connections.
+    """
+    settings = get_settings()
+    limits = httpx.Limits(
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(settings.LLM_TIMEOUT, connect=10.0)
+    return httpx.AsyncClient(
+        http2=settings.LLM_HTTP2,
+        limits=limits,
+        timeout=timeout,
+        follow_redirects=True,
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the process-wide pooled HTTP client (created on first use)"""
+    global _http_client
+
+    if _http_client is None or _http_client.is_closed:
+        _http_client = build_http_client()
+        logger.info("Pooled LLM HTTP client created")
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the pooled HTTP client and release its connections"""
+    global _http_client
+
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+        logger.info("Pooled LLM HTTP client closed")
+    _http_client = None
@@ -1,12 +1,117 @@
-from typing import Literal
-from openai import OpenAI
+import time
+from typing import AsyncIterator, Literal
+from openai import AsyncOpenAI, OpenAI
 from settings import get_settings
+from src.metrics import UPSTREAM_DURATION, UPSTREAM_FIRST_TOKEN, record_usage
+from src.ai_generation.hedging import Hedger, get_hedger
+from src.ai_generation.http_transport import close_http_client, get_http_client
+from src.ai_generation.response_cache import ResponseCache, get_response_cache
+from src.ai_generation.upstream_scheduler import (
+    UpstreamScheduler,
+    get_upstream_scheduler,
+    is_overload_error,
+)
 
+ReasoningMode = Literal["none", "minimal", "low", "medium", "high"]
 
-class LLMClient:
-    def __init__(self, client: OpenAI, model_name: str):
+
+class BaseLLMClient:
+    """Shared request construction for the sync and async LLM clients."""
+
+    def __init__(
+        self,
+        client,
+        model_name: str,
+        cache: ResponseCache | None = None,
+        cache_sampled: bool = False,
+        prompt_caching: bool = True,
+    ):
         self.client = client
         self.model_name = model_name
+        self.cache = cache
+        # Allow caching of temperature > 0 calls for every request
+        self.cache_sampled = cache_sampled
+        # Send cache_control breakpoints for system prompts marked as static
+        self.prompt_caching = prompt_caching
+
+    def _build_request(
+        self,
+        prompt: str,
+        system_prompt: str,
+        temperature: float | None,
+        response_format: dict | None,
+        extra_body: dict | None,
+        cache_system_prompt: bool = False,
+    ) -> dict:
+        """Build keyword arguments for ``chat.completions.create``"""
+        return {
+            "model": self.model_name,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": self._system_content(system_prompt, cache_system_prompt),
+                },
+                {"role": "user", "content": prompt},
+            ],
+            "temperature": temperature,
+            "response_format": response_format if response_format else None,
+            "extra_body": extra_body if extra_body else None,
+        }
+
+    def _cache_key(
+        self, request: dict, use_cache: bool, cache_sampled: bool
+    ) -> str | None:
+        """
+        Cache key for the request, or None if the response must not be cached.
+        Calls with temperature > 0 (or provider default) are cached only
+        when explicitly allowed.
+        """
+        if self.cache is None or not use_cache:
+            return None
+        temperature = request["temperature"]
+        sampled = temperature is None or temperature > 0
+        if sampled and not (cache_sampled or self.cache_sampled):
+            return None
+        return self.cache.make_key(request)
+
+    def _system_content(self, system_prompt: str, cacheable: bool) -> str | list:
+        """
+        System message content. A static prompt is sent as a content block
+        with a ``cache_control`` breakpoint, so providers with prompt caching
+        (Anthropic, Gemini via OpenRouter) reuse the processed prefix.
+        Providers with automatic prefix caching ignore the breakpoint.
+        """
+        if not (cacheable and self.prompt_caching):
+            return system_prompt
+        return [
+            {
+                "type": "text",
+                "text": system_prompt,
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
+
+    @staticmethod
+    def _json_response_format(json_schema: dict) -> dict:
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "response_schema",
+                "schema": json_schema,
+            },
+        }
+
+
+class LLMClient(BaseLLMClient):
+    def __init__(
+        self,
+        client: OpenAI,
+        model_name: str,
+        cache: ResponseCache | None = None,
+        cache_sampled: bool = False,
+        prompt_caching: bool = True,
+    ):
+        super().__init__(client, model_name, cache, cache_sampled, prompt_caching)
 
     def _generate_response(
         self,
@@ -15,6 +120,9 @@ class LLMClient:
         temperature: float = 0.7,
         response_format: dict | None = None,
         extra_body: dict | None = None,
+        use_cache: bool = True,
+        cache_sampled: bool = False,
+        cache_system_prompt: bool = False,
     ) -> str | None:
         """
         Generate a response from the LLM using the provided prompt.
@@ -41,30 +149,47 @@ class LLMClient:
         extra_body : dict | None, optional
             Additional key/value pairs to be included in the request body.
             Example: {'reasoning': {'effort': 'high'}}.
+        use_cache : bool, optional
+            Set to False to bypass the response cache for this call. Default is True.
+        cache_sampled : bool, optional
+            Allow caching the response even if temperature > 0. Default is False.
+        cache_system_prompt : bool, optional
+            Mark the system prompt as a static prefix the provider may cache
+            (``cache_control`` content block). Default is False.
 
         Returns
         -------
         str | None
             Content of the first message in the model's response, or None if no content is present.
         """
-        response = self.client.chat.completions.create(
-            model=self.model_name,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=temperature,
-            response_format=response_format if response_format else None,
-            extra_body=extra_body if extra_body else None,
+        request = self._build_request(
+            prompt,
+            system_prompt,
+            temperature,
+            response_format,
+            extra_body,
+            cache_system_prompt,
         )
-        return response.choices[0].message.content
+        cache_key = self._cache_key(request, use_cache, cache_sampled)
+        if cache_key and (cached := self.cache.get(cache_key)) is not None:
+            return cached
+
+        response = self.client.chat.completions.create(**request)
+        content = response.choices[0].message.content
+        if cache_key and content is not None:
+            self.cache.set(cache_key, content)
+        return content
 
     def generate_response_json_based(
         self,
         prompt: str,
         json_schema: dict,
         system_prompt: str,
-        reasoning_mode: Literal["none", "minimal", "low", "medium", "high"] = "none",
+        reasoning_mode: ReasoningMode = "none",
+        temperature: float = 0.7,
+        use_cache: bool = True,
+        cache_sampled: bool = False,
+        cache_system_prompt: bool = False,
     ) -> str | None:
         """
         Generates a JSON-formatted response from the LLM based on the provided prompt and schema.
@@ -82,6 +207,14 @@ class LLMClient:
         reasoning_mode : Literal["none", "minimal", "low", "medium", "high"], optional
             The level of reasoning effort the model should apply when generating the response.
             Defaults to "none".
+        temperature : float, optional
+            Sampling temperature. Default is 0.7.
+        use_cache : bool, optional
+            Set to False to bypass the response cache for this call.
+        cache_sampled : bool, optional
+            Allow caching the response even if temperature > 0.
+        cache_system_prompt : bool, optional
+            Mark the system prompt as a static prefix the provider may cache.
 
         Returns
         -------
@@ -91,22 +224,23 @@ class LLMClient:
         return self._generate_response(
             prompt=prompt,
             system_prompt=system_prompt,
-            response_format={
-                "type": "json_schema",
-                "json_schema": {
-                    "name": "response_schema",
-                    "schema": json_schema,
-                },
-            },
+            temperature=temperature,
+            response_format=self._json_response_format(json_schema),
             extra_body={"reasoning": {"effort": reasoning_mode}},
+            use_cache=use_cache,
+            cache_sampled=cache_sampled,
+            cache_system_prompt=cache_system_prompt,
         )
 
     def generate_response_text_based(
         self,
         prompt: str,
         system_prompt: str,
-        reasoning_mode: Literal["none", "minimal", "low", "medium", "high"] = "none",
+        reasoning_mode: ReasoningMode = "none",
         temperature: float | None = None,
+        use_cache: bool = True,
+        cache_sampled: bool = False,
+        cache_system_prompt: bool = False,
     ) -> str:
         """
         Generates a text-formatted response from the LLM based on the provided prompt.
@@ -117,8 +251,275 @@ class LLMClient:
             system_prompt,
             extra_body={"reasoning": {"effort": reasoning_mode}},
             temperature=temperature,
+            use_cache=use_cache,
+            cache_sampled=cache_sampled,
+            cache_system_prompt=cache_system_prompt,
+        )
+
+
+class AsyncLLMClient(BaseLLMClient):
+    """
+    Non-blocking counterpart of ``LLMClient``.
+
+    Built on ``AsyncOpenAI`` over the process-wide pooled HTTP transport,
+    so concurrent generations wait on upstream without occupying threads.
+    Upstream calls go through ``scheduler`` (rate limit, adaptive
+    concurrency, retries) when it is given, and are hedged against a
+    fallback model by ``hedger`` when it is given.
+    """
+
+    def __init__(
+        self,
+        client: AsyncOpenAI,
+        model_name: str,
+        cache: ResponseCache | None = None,
+        cache_sampled: bool = False,
+        scheduler: UpstreamScheduler | None = None,
+        hedger: Hedger | None = None,
+        prompt_caching: bool = True,
+    ):
+        super().__init__(client, model_name, cache, cache_sampled, prompt_caching)
+        self.scheduler = scheduler
+        self.hedger = hedger
+
+    def _fallback_request(self, request: dict) -> dict:
+        return {**request, "model": self.hedger.fallback_model}
+
+    async def _create_hedged(self, request: dict):
+        """Send a completion request, hedged with the fallback model if enabled"""
+        if self.hedger is None:
+            return await self._create(request)
+        return await self.hedger.race(
+            self.model_name,
+            lambda: self._create(request),
+            lambda: self._create(self._fallback_request(request)),
+        )
+
+    def _stream_deltas_hedged(self, request: dict) -> AsyncIterator[str]:
+        """Stream deltas, hedged with the fallback model if enabled"""
+        if self.hedger is None:
+            return self._stream_deltas(request)
+        return self.hedger.race_stream(
+            self.model_name,
+            lambda: self._stream_deltas(request),
+            lambda: self._stream_deltas(self._fallback_request(request)),
+        )
+
+    async def _create(self, request: dict):
+        """Send a completion request through the scheduler if there is one"""
+        started = time.monotonic()
+        if self.scheduler is None:
+            response = await self.client.chat.completions.create(**request)
+        else:
+            response = await self.scheduler.call(
+                lambda: self.client.chat.completions.create(**request)
+            )
+        UPSTREAM_DURATION.observe(
+            time.monotonic() - started, model=request["model"], stream="false"
+        )
+        record_usage(request["model"], getattr(response, "usage", None))
+        return response
+
+    async def _stream_deltas(self, request: dict) -> AsyncIterator[str]:
+        """
+        Open a streaming completion and yield content deltas.
+        The scheduler slot is held until the stream is consumed.
+        """
+        model = request["model"]
+        stream_request = {
+            **request,
+            "stream": True,
+            # Final chunk carries token usage
+            "stream_options": {"include_usage": True},
+        }
+        started = time.monotonic()
+        first_token_at = None
+
+        permit = None
+        if self.scheduler is None:
+            stream = await self.client.chat.completions.create(**stream_request)
+        else:
+            stream, permit = await self.scheduler.open(
+                lambda: self.client.chat.completions.create(**stream_request)
+            )
+
+        success = overloaded = False
+        try:
+            async for chunk in stream:
+                record_usage(model, getattr(chunk, "usage", None))
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if first_token_at is None:
+                        first_token_at = time.monotonic()
+                        UPSTREAM_FIRST_TOKEN.observe(
+                            first_token_at - started, model=model
+                        )
+                    yield delta
+            success = True
+        except Exception as e:
+            # A 429 / 5xx in the middle of the stream shrinks the window too
+            overloaded = is_overload_error(e)
+            raise
+        finally:
+            if permit is not None:
+                permit.release(success=success, overloaded=overloaded)
+            UPSTREAM_DURATION.observe(
+                time.monotonic() - started, model=model, stream="true"
+            )
+
+    async def _generate_response(
+        self,
+        prompt: str,
+        system_prompt: str,
+        temperature: float = 0.7,
+        response_format: dict | None = None,
+        extra_body: dict | None = None,
+        use_cache: bool = True,
+        cache_sampled: bool = False,
+        cache_system_prompt: bool = False,
+    ) -> str | None:
+        """Async version of ``LLMClient._generate_response``"""
+        request = self._build_request(
+            prompt,
+            system_prompt,
+            temperature,
+            response_format,
+            extra_body,
+            cache_system_prompt,
+        )
+        cache_key = self._cache_key(request, use_cache, cache_sampled)
+        if cache_key and (cached := await self.cache.aget(cache_key)) is not None:
+            return cached
+
+        response = await self._create_hedged(request)
+        content = response.choices[0].message.content
+        if cache_key and content is not None:
+            await self.cache.aset(cache_key, content)
+        return content
+
+    async def generate_response_json_based(
+        self,
+        prompt: str,
+        json_schema: dict,
+        system_prompt: str,
+        reasoning_mode: ReasoningMode = "none",
+        temperature: float = 0.7,
+        use_cache: bool = True,
+        cache_sampled: bool = False,
+        cache_system_prompt: bool = False,
+    ) -> str | None:
+        """Async version of ``LLMClient.generate_response_json_based``"""
+        return await self._generate_response(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            response_format=self._json_response_format(json_schema),
+            extra_body={"reasoning": {"effort": reasoning_mode}},
+            use_cache=use_cache,
+            cache_sampled=cache_sampled,
+            cache_system_prompt=cache_system_prompt,
+        )
+
+    async def generate_response_text_based(
+        self,
+        prompt: str,
+        system_prompt: str,
+        reasoning_mode: ReasoningMode = "none",
+        temperature: float | None = None,
+        use_cache: bool = True,
+        cache_sampled: bool = False,
+        cache_system_prompt: bool = False,
+    ) -> str | None:
+        """Async version of ``LLMClient.generate_response_text_based``"""
+        return await self._generate_response(
+            prompt,
+            system_prompt,
+            extra_body={"reasoning": {"effort": reasoning_mode}},
+            temperature=temperature,
+            use_cache=use_cache,
+            cache_sampled=cache_sampled,
+            cache_system_prompt=cache_system_prompt,
         )
 
+    async def stream_response_text_based(
+        self,
+        prompt: str,
+        system_prompt: str,
+        reasoning_mode: ReasoningMode = "none",
+        temperature: float | None = None,
+        use_cache: bool = True,
+        cache_sampled: bool = False,
+        cache_system_prompt: bool = False,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a text response from the LLM chunk by chunk.
+
+        Uses the provider's streaming mode, so the first chunk arrives as
+        soon as the model emits it instead of after the whole answer.
+        A cached response is yielded as a single chunk.
+
+        Yields
+        ------
+        str
+            Non-empty content deltas in the order they were received.
+        """
+        request = self._build_request(
+            prompt,
+            system_prompt,
+            temperature,
+            None,
+            {"reasoning": {"effort": reasoning_mode}},
+            cache_system_prompt,
+        )
+        async for delta in self._stream_response(request, use_cache, cache_sampled):
+            yield delta
+
+    async def stream_response_json_based(
+        self,
+        prompt: str,
+        json_schema: dict,
+        system_prompt: str,
+        reasoning_mode: ReasoningMode = "none",
+        temperature: float = 0.7,
+        use_cache: bool = True,
+        cache_sampled: bool = False,
+        cache_system_prompt: bool = False,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a structured output response chunk by chunk, the chunks
+        joined are the JSON document ``generate_response_json_based``
+        returns. A cached response is yielded as a single chunk.
+        """
+        request = self._build_request(
+            prompt,
+            system_prompt,
+            temperature,
+            self._json_response_format(json_schema),
+            {"reasoning": {"effort": reasoning_mode}},
+            cache_system_prompt,
+        )
+        async for delta in self._stream_response(request, use_cache, cache_sampled):
+            yield delta
+
+    async def _stream_response(
+        self, request: dict, use_cache: bool, cache_sampled: bool
+    ) -> AsyncIterator[str]:
+        """Stream deltas of a request, the complete answer is cached"""
+        cache_key = self._cache_key(request, use_cache, cache_sampled)
+        if cache_key and (cached := await self.cache.aget(cache_key)) is not None:
+            yield cached
+            return
+
+        chunks = []
+        async for delta in self._stream_deltas_hedged(request):
+            chunks.append(delta)
+            yield delta
+
+        if cache_key and chunks:
+            await self.cache.aset(cache_key, "".join(chunks))
+
 
 _llm_client = None
 
@@ -135,7 +536,49 @@ def get_llm_client():
 
         _raw_client = OpenAI(
             api_key=AI_API_KEY,
-            base_url="https://openrouter.ai/api/v1",
+            base_url=settings.OPENROUTER_BASE_URL,
+        )
+        _llm_client = LLMClient(
+            _raw_client,
+            MODEL_NAME,
+            cache=get_response_cache(),
+            cache_sampled=settings.LLM_CACHE_ALLOW_SAMPLED,
+            prompt_caching=settings.LLM_PROMPT_CACHING,
         )
-        _llm_client = LLMClient(_raw_client, MODEL_NAME)
     return _llm_client
+
+
+_async_llm_client = None
+
+
+def get_async_llm_client() -> AsyncLLMClient:
+    global _async_llm_client
+
+    if _async_llm_client is None:
+        settings = get_settings()
+
+        _raw_client = AsyncOpenAI(
+            api_key=settings.OPENROUTER_API_KEY,
+            base_url=settings.OPENROUTER_BASE_URL,
+            http_client=get_http_client(),
+            # Retries are done by the upstream scheduler
+            max_retries=0,
+        )
+        _async_llm_client = AsyncLLMClient(
+            _raw_client,
+            settings.OPENROUTER_MODEL_NAME,
+            cache=get_response_cache(),
+            cache_sampled=settings.LLM_CACHE_ALLOW_SAMPLED,
+            scheduler=get_upstream_scheduler(),
+            hedger=get_hedger(),
+            prompt_caching=settings.LLM_PROMPT_CACHING,
+        )
+    return _async_llm_client
+
+
+async def close_async_llm_client() -> None:
+    """Drop the shared async client and close its pooled transport"""
+    global _async_llm_client
+
+    _async_llm_client = None
+    await close_http_client()
@@ -1,16 +1,103 @@
 import yaml
-from jinja2 import Template
+from jinja2 import (
+    BaseLoader,
+    Environment,
+    FileSystemBytecodeCache,
+    Template,
+    TemplateNotFound,
+    TemplateSyntaxError,
+)
 from pathlib import Path
 import logging
+import re
+import threading
+from dataclasses import dataclass, field
 from functools import lru_cache
+from typing import Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Config flag marking the system prompt as a static, provider-cacheable prefix
+CACHE_SYSTEM_PROMPT_KEY = "cache_system_prompt"
+
+# (mtime in ns, size) of a config file, None if it cannot be read
+FileVersion = Optional[Tuple[int, int]]
+
+_TEMPLATE_SYNTAX_RE = re.compile(r"\{[{%#]")
+_TRAILING_NEWLINE_RE = re.compile(r"\r?\n\Z")
+_KEY_LINE_RE = re.compile(r"([ \t]*)[\w-]+[ \t]*:(?:[ \t]|$)")
+
+
+class _SourceLoader(BaseLoader):
+    """
+    Serves the sources of templates being compiled, so the environment can
+    use its bytecode cache (it is only consulted for loader templates)
+    """
+
+    def __init__(self):
+        self.sources: dict[str, str] = {}
+
+    def get_source(self, environment: Environment, template: str):
+        if template not in self.sources:
+            raise TemplateNotFound(template)
+        return self.sources[template], None, lambda: True
+
+
+_environment = None
+# The loader serves one source per name, threads (the prewarm) compile in turn
+_compile_lock = threading.Lock()
+
+
+def get_template_environment() -> Environment:
+    """Jinja environment shared by all managers, with an on-disk bytecode cache"""
+    global _environment
+    if _environment is None:
+        from settings import get_settings
+
+        bytecode_cache = None
+        if directory := get_settings().PROMPT_BYTECODE_CACHE_DIR:
+            Path(directory).mkdir(parents=True, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(directory)
+        _environment = Environment(
+            loader=_SourceLoader(),
+            bytecode_cache=bytecode_cache,
+            keep_trailing_newline=True,
+        )
+    return _environment
+
+
+def _compile_template(name: str, source: str) -> Template:
+    environment = get_template_environment()
+    with _compile_lock:
+        environment.loader.sources[name] = source
+        try:
+            return environment.get_template(name)
+        finally:
+            del environment.loader.sources[name]
+
+
+@dataclass
+class _CompiledConfig:
+    """
+    Config file split into top-level fields: fields without template syntax
+    are parsed once, the others are compiled into one template rendered
+    per call. ``whole`` is set instead when the file cannot be split.
+    """
+
+    keys: list[str] = field(default_factory=list)
+    static: dict = field(default_factory=dict)
+    templated_keys: set[str] = field(default_factory=set)
+    templated: Optional[Template] = None
+    whole: Optional[Template] = None
+
 
 class LLMConfigManager:
     """Manages loading and rendering config templates
     (temperature / user | stystem prompts)
-    from YAML files."""
+    from YAML files.
+
+    Compiled templates and parsed configs are cached per file version
+    (mtime and size), an edited prompt is picked up on the next call."""
 
     def __init__(self, config_dir: str = r"data/prompts"):
         self.config_dir = Path(config_dir)
@@ -38,16 +125,54 @@ class LLMConfigManager:
         dict
             The rendered llm call configuration if the file and template were
             successfully loaded and rendered.
+
+        Notes
+        -----
+        ``cache_system_prompt: true`` in the YAML marks the system prompt as a
+        static prefix that the provider may cache between calls. It is only
+        effective if the prompt does not change with the template variables.
+
+        A config rendered without variables is parsed once per file version,
+        with variables only the templated fields are rendered and parsed.
         """
         file_path = self.config_dir / f"{prompt_name}.yaml"
+        version = self._file_version(file_path)
 
-        raw_data = self._load_file(file_path)
-        filled_data = self._render_yaml(raw_data, **kwargs)
-        return self._parse_yaml(filled_data)
+        if not kwargs:
+            return dict(self._static_config(file_path, version))
+
+        config = self._render_config(self._compile(file_path, version), kwargs)
+        if CACHE_SYSTEM_PROMPT_KEY in config:
+            config[CACHE_SYSTEM_PROMPT_KEY] = bool(config[CACHE_SYSTEM_PROMPT_KEY])
+            if config[CACHE_SYSTEM_PROMPT_KEY]:
+                static = self._static_config(file_path, version)
+                if static.get("system_prompt") != config.get("system_prompt"):
+                    logger.warning(
+                        "Cacheable system prompt of %s depends on template "
+                        "variables, provider prefix cache only hits for "
+                        "identical values",
+                        prompt_name,
+                    )
+        return config
+
+    @classmethod
+    def cache_clear(cls) -> None:
+        """Forget loaded, compiled and parsed configs"""
+        cls._load_file.cache_clear()
+        cls._compile.cache_clear()
+        cls._static_config.cache_clear()
+
+    @staticmethod
+    def _file_version(file_path: Path) -> FileVersion:
+        try:
+            stat = file_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
 
     @staticmethod
     @lru_cache(maxsize=32)
-    def _load_file(file_path: Path) -> str:
+    def _load_file(file_path: Path, version: FileVersion = None) -> str:
         try:
             with open(file_path, "r", encoding="utf-8") as file:
                 return file.read()
@@ -55,6 +180,95 @@ class LLMConfigManager:
             logger.error("Failed to load file at %s", file_path)
             return ""
 
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _compile(file_path: Path, version: FileVersion) -> _CompiledConfig:
+        # Rendering a whole file used to drop its last newline (the Jinja
+        # default), the split templates keep newlines and start without it
+        raw_data = _TRAILING_NEWLINE_RE.sub(
+            "", LLMConfigManager._load_file(file_path, version), count=1
+        )
+        name = f"{file_path}@{version}"
+        if not _TEMPLATE_SYNTAX_RE.search(raw_data):
+            static = LLMConfigManager._parse_yaml(raw_data)
+            if not isinstance(static, dict):
+                logger.error("Config %s is not a mapping", file_path)
+                static = {}
+            return _CompiledConfig(static=static)
+        try:
+            return LLMConfigManager._split(name, raw_data)
+        except (ValueError, TemplateSyntaxError, yaml.YAMLError):
+            return _CompiledConfig(whole=_compile_template(name, raw_data))
+
+    @staticmethod
+    def _split(name: str, raw_data: str) -> _CompiledConfig:
+        """
+        Split the file at its top-level keys. Raises ValueError if the file
+        has content before the first key or the static part does not parse
+        into the same keys, TemplateSyntaxError if a template tag spans
+        several fields.
+        """
+        blocks: list[tuple[str, list[str]]] = []
+        indent = None
+        for line in raw_data.splitlines(keepends=True):
+            match = _KEY_LINE_RE.match(line)
+            if match and (indent is None or match.group(1) == indent):
+                indent = match.group(1)
+                blocks.append((line.split(":", 1)[0].strip(), [line]))
+            elif blocks:
+                blocks[-1][1].append(line)
+            elif line.strip() and not line.lstrip().startswith("#"):
+                raise ValueError("Content before the first key")
+
+        compiled = _CompiledConfig()
+        static_text, templated_text = [], []
+        for key, lines in blocks:
+            text = "".join(lines)
+            compiled.keys.append(key)
+            if _TEMPLATE_SYNTAX_RE.search(text):
+                get_template_environment().parse(text)
+                compiled.templated_keys.add(key)
+                templated_text.append(text)
+            else:
+                static_text.append(text)
+
+        compiled.static = yaml.safe_load("".join(static_text)) or {}
+        static_keys = set(compiled.keys) - compiled.templated_keys
+        if (
+            not isinstance(compiled.static, dict)
+            or compiled.static.keys() != static_keys
+        ):
+            raise ValueError("Fields do not parse separately")
+        compiled.templated = _compile_template(name, "".join(templated_text))
+        return compiled
+
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _static_config(file_path: Path, version: FileVersion) -> dict:
+        """Config rendered without variables, parsed once per file version"""
+        config = LLMConfigManager._render_config(
+            LLMConfigManager._compile(file_path, version), {}
+        )
+        if CACHE_SYSTEM_PROMPT_KEY in config:
+            config[CACHE_SYSTEM_PROMPT_KEY] = bool(config[CACHE_SYSTEM_PROMPT_KEY])
+        return config
+
+    @staticmethod
+    def _render_config(compiled: _CompiledConfig, variables: dict) -> dict:
+        if compiled.whole is not None:
+            return LLMConfigManager._parse_yaml(compiled.whole.render(**variables))
+        if compiled.templated is None:
+            return dict(compiled.static)
+        rendered = LLMConfigManager._parse_yaml(compiled.templated.render(**variables))
+        if not compiled.templated_keys <= rendered.keys():
+            return {}
+        return {
+            key: rendered[key]
+            if key in compiled.templated_keys
+            else compiled.static[key]
+            for key in compiled.keys
+        }
+
     @staticmethod
     def _parse_yaml(data: str) -> dict:
         try:
@@ -63,15 +277,6 @@ class LLMConfigManager:
             logger.error("Failed to load YAML: %s", e)
             return {}
 
-    @staticmethod
-    def _render_yaml(data: str, **kwargs) -> dict:
-        """
-        Render a YAML dict as a Jinja2 template.
-
-        """
-        template = Template(data)
-        return template.render(**kwargs)
-
 
 manager = LLMConfigManager()
 
@@ -0,0 +1,195 @@
+import hashlib
+import logging
+import random
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Words that do not change the meaning of a generation request
+_STOP_WORDS = frozenset(
+    """
+    a an the please pls plz kindly me us my our i we you your for of to and
+    with can could would will should just some this that it is be
+    """.split()
+)
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+@dataclass(frozen=True)
+class PromptMatch:
+    """Stored answer of a previously seen prompt similar to the query"""
+
+    prompt: str
+    value: str
+    similarity: float
+
+
+def normalize_prompt(text: str) -> list[str]:
+    """Lowercase, drop punctuation and stop words, return word tokens"""
+    return [w for w in _WORD_RE.findall(text.lower()) if w not in _STOP_WORDS]
+
+
+def shingles(text: str, k: int = 4) -> frozenset[str]:
+    """Character k-shingles of the normalized prompt"""
+    normalized = " ".join(normalize_prompt(text))
+    if len(normalized) <= k:
+        return frozenset([normalized]) if normalized else frozenset()
+    return frozenset(normalized[i : i + k] for i in range(len(normalized) - k + 1))
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class PromptSimilarityIndex:
+    """
+    Near-duplicate index over answered prompts.
+
+    Prompts are turned into character shingles, signed with MinHash and
+    bucketed with LSH banding. Candidates from shared buckets are verified
+    with exact Jaccard similarity, so lookups stay fast on large indexes.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        max_entries: int = 5_000,
+        num_perm: int = 64,
+        bands: int = 16,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        # Fixed seed keeps signatures stable between restarts
+        rng = random.Random(num_perm)
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+        self._entries: OrderedDict[int, tuple[str, frozenset, str, list]] = (
+            OrderedDict()
+        )
+        self._buckets: dict[tuple, set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def _signature(self, grams: frozenset[str]) -> list[int]:
+        hashes = [
+            int.from_bytes(
+                hashlib.blake2b(g.encode(), digest_size=8).digest(), "little"
+            )
+            for g in grams
+        ]
+        if not hashes:
+            return [0] * len(self._perms)
+        return [
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._perms
+        ]
+
+    def _band_keys(self, signature: list[int]) -> list[tuple]:
+        r = self.rows
+        return [
+            (band, *signature[band * r : (band + 1) * r]) for band in range(self.bands)
+        ]
+
+    def add(self, prompt: str, value: str) -> None:
+        """Index the answer of a prompt"""
+        grams = shingles(prompt)
+        if not grams:
+            return
+        band_keys = self._band_keys(self._signature(grams))
+
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (prompt, grams, value, band_keys)
+            for key in band_keys:
+                self._buckets.setdefault(key, set()).add(entry_id)
+
+            while len(self._entries) > self.max_entries:
+                old_id, (_, _, _, old_keys) = self._entries.popitem(last=False)
+                for key in old_keys:
+                    bucket = self._buckets.get(key)
+                    if bucket is not None:
+                        bucket.discard(old_id)
+                        if not bucket:
+                            del self._buckets[key]
+
+    def lookup(self, prompt: str) -> PromptMatch | None:
+        """Return the most similar indexed prompt above the threshold"""
+        grams = shingles(prompt)
+        band_keys = self._band_keys(self._signature(grams)) if grams else []
+
+        best = None
+        with self._lock:
+            candidates = set()
+            for key in band_keys:
+                candidates |= self._buckets.get(key, set())
+
+            for entry_id in candidates:
+                stored_prompt, stored_grams, value, _ = self._entries[entry_id]
+                similarity = jaccard(grams, stored_grams)
+                if similarity >= self.threshold and (
+                    best is None or similarity > best.similarity
+                ):
+                    best = PromptMatch(stored_prompt, value, similarity)
+
+            self._stats["hits" if best else "misses"] += 1
+        return best
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and hit rate of lookups"""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["entries"] = len(self._entries)
+        return stats
+
+
+_prompt_index = None
+
+
+def get_prompt_index() -> PromptSimilarityIndex | None:
+    """
+    Get the process-wide prompt index, None if it is disabled.
+    A stored diagram replays the sampled business stage, so the index is
+    also off while caching of sampled responses is disallowed.
+    """
+    global _prompt_index
+
+    settings = get_settings()
+    if not (settings.PROMPT_INDEX_ENABLED and settings.LLM_CACHE_ALLOW_SAMPLED):
+        return None
+
+    if _prompt_index is None:
+        _prompt_index = PromptSimilarityIndex(
+            threshold=settings.PROMPT_INDEX_THRESHOLD,
+            max_entries=settings.PROMPT_INDEX_SIZE,
+        )
+    return _prompt_index
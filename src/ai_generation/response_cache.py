@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    Two-tier cache for LLM responses.
+
+    Memory tier: LRU dict limited by ``memory_size`` entries.
+    Disk tier: SQLite table with TTL and LRU eviction above ``disk_size`` entries.
+    Both tiers share the same TTL, expired entries are treated as misses.
+    """
+
+    def __init__(
+        self,
+        db_path: str | None = None,
+        memory_size: int = 256,
+        disk_size: int = 10_000,
+        ttl_seconds: float = 7 * 24 * 3600,
+    ):
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self.ttl_seconds = ttl_seconds
+
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+        self._db: sqlite3.Connection | None = None
+        if db_path:
+            self._db = self._open_db(db_path)
+
+    @staticmethod
+    def _open_db(db_path: str) -> sqlite3.Connection:
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        db.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)"
+        )
+        return db
+
+    @staticmethod
+    def make_key(request: dict) -> str:
+        """
+        Build a stable key from the request sent to the provider.
+        The request holds model, messages, temperature, response_format and
+        extra_body (reasoning effort), so all of them are part of the key.
+        """
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        """Look up a response, memory tier first, then disk"""
+        now = time.time()
+        with self._lock:
+            if entry := self._memory.get(key):
+                created_at, value = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row and now - row[1] <= self.ttl_seconds:
+                    self._db.execute(
+                        "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                        (now, key),
+                    )
+                    self._remember(key, row[1], row[0])
+                    self._stats["disk_hits"] += 1
+                    return row[0]
+                if row:
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        """Store a response in both tiers, evicting the least recently used"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            self._stats["stores"] += 1
+
+            if self._db is None:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._db.execute(
+                "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+            (count,) = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()
+            if count > self.disk_size:
+                self._db.execute(
+                    """
+                    DELETE FROM responses WHERE key IN (
+                        SELECT key FROM responses ORDER BY accessed_at LIMIT ?
+                    )
+                    """,
+                    (count - self.disk_size,),
+                )
+
+    async def aget(self, key: str) -> str | None:
+        """Non-blocking ``get``: disk lookups run off the event loop"""
+        if self._db is None or key in self._memory:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: str) -> None:
+        """Non-blocking ``set``: disk writes run off the event loop"""
+        if self._db is None:
+            self.set(key, value)
+            return
+        await asyncio.to_thread(self.set, key, value)
+
+    def _remember(self, key: str, created_at: float, value: str) -> None:
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        """Hit/miss counters and hit ratio"""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        stats["hit_ratio"] = hits / lookups if lookups else 0.0
+        return stats
+
+
+_response_cache = None
+
+
+def get_response_cache() -> ResponseCache | None:
+    """Get the process-wide response cache, None if caching is disabled"""
+    global _response_cache
+
+    settings = get_settings()
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            db_path=settings.LLM_CACHE_PATH or None,
+            memory_size=settings.LLM_CACHE_MEMORY_SIZE,
+            disk_size=settings.LLM_CACHE_DISK_SIZE,
+            ttl_seconds=settings.LLM_CACHE_TTL,
+        )
+        logger.info("LLM response cache initialized at %s", settings.LLM_CACHE_PATH)
+    return _response_cache
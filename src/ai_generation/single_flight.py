@@ -0,0 +1,72 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one in-flight task.
+
+    Every caller awaits the shared task through ``asyncio.shield``, so a
+    cancelled caller only detaches itself. The shared task is cancelled
+    when the last attached caller goes away.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, _Call] = {}
+        self._stats = {"started": 0, "coalesced": 0}
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Await the result of ``factory()``, sharing it with concurrent callers"""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(factory()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self._stats["started"] += 1
+        else:
+            self._stats["coalesced"] += 1
+            logger.debug("Attached to in-flight call %s", key)
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                logger.info("All callers left, cancelling in-flight call %s", key)
+                call.task.cancel()
+                self._forget(key, call)
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> dict:
+        return {**self._stats, "in_flight": self.in_flight()}
+
+
+_in_flight = None
+
+
+def get_in_flight() -> SingleFlight:
+    """Get the process-wide coalescer of agent generations"""
+    global _in_flight
+
+    if _in_flight is None:
+        _in_flight = SingleFlight()
+    return _in_flight
@@ -0,0 +1,315 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+from settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+# Seconds a client is asked to wait when the upstream queue is full
+QUEUE_FULL_RETRY_AFTER = 5.0
+
+
+class UpstreamQueueFull(Exception):
+    """Raised when too many requests already wait for an upstream slot"""
+
+    def __init__(self, message: str, retry_after: float = QUEUE_FULL_RETRY_AFTER):
+        super().__init__(message)
+        # Seconds the client should wait before retrying (Retry-After)
+        self.retry_after = retry_after
+
+
+class UpstreamThrottled(UpstreamQueueFull):
+    """Raised when the upstream asks to retry later than the max backoff"""
+
+
+class TokenBucket:
+    """Token bucket rate limiter. ``rate`` <= 0 disables limiting."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency window.
+
+    The window grows by ``increase`` per window of successful calls and is
+    multiplied by ``decrease`` on overload (429 / 5xx / timeouts).
+    Waiters are served in FIFO order.
+    """
+
+    def __init__(
+        self,
+        initial: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def has_slot(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    async def acquire(self) -> None:
+        if self.has_slot() and not self._waiters:
+            self.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was granted right before cancellation, give it back
+                self.in_flight -= 1
+                self._wake()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self, success: bool = True, overloaded: bool = False) -> None:
+        self.in_flight -= 1
+        if overloaded:
+            self.limit = max(self.min_limit, self.limit * self.decrease)
+            logger.warning("Upstream overloaded, concurrency window %.1f", self.limit)
+        elif success:
+            self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.has_slot():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+
+class UpstreamPermit:
+    """Held upstream slot, must be released exactly once"""
+
+    __slots__ = ("_limiter", "_released")
+
+    def __init__(self, limiter: AdaptiveConcurrencyLimiter):
+        self._limiter = limiter
+        self._released = False
+
+    def release(self, success: bool = True, overloaded: bool = False) -> None:
+        if not self._released:
+            self._released = True
+            self._limiter.release(success=success, overloaded=overloaded)
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """429, 5xx and timeouts mean upstream is saturated"""
+    import openai
+
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, openai.APITimeoutError)
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    import openai
+
+    return is_overload_error(error) or isinstance(error, openai.APIConnectionError)
+
+
+def parse_retry_after(error: BaseException) -> float | None:
+    """Seconds to wait from ``Retry-After`` / ``retry-after-ms`` headers"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+
+    if retry_after_ms := headers.get("retry-after-ms"):
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(float(retry_after), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class UpstreamScheduler:
+    """
+    Admission control for upstream LLM calls.
+
+    Requests pass a bounded waiting queue, a token bucket rate limit and an
+    adaptive concurrency window. Retryable failures are retried with full
+    jitter exponential backoff, never sooner than ``Retry-After`` says. A
+    ``Retry-After`` beyond ``backoff_max`` raises ``UpstreamThrottled``,
+    handled like a full queue (HTTP 503).
+    """
+
+    def __init__(
+        self,
+        rate: float = 5.0,
+        burst: int = 10,
+        limiter: AdaptiveConcurrencyLimiter | None = None,
+        max_queue: int = 100,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+    ):
+        self.bucket = TokenBucket(rate, burst)
+        self.limiter = limiter or AdaptiveConcurrencyLimiter()
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._queued = 0
+        self._stats = {"calls": 0, "retries": 0, "rejected": 0, "failures": 0}
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    async def acquire(self) -> UpstreamPermit:
+        """Wait for an upstream slot, fail fast if the queue is full"""
+        must_wait = self._queued > 0 or not self.limiter.has_slot()
+        if must_wait and self._queued >= self.max_queue:
+            self._stats["rejected"] += 1
+            raise UpstreamQueueFull(f"Upstream queue is full ({self.max_queue})")
+
+        self._queued += 1
+        try:
+            await self.bucket.acquire()
+            await self.limiter.acquire()
+        finally:
+            self._queued -= 1
+        return UpstreamPermit(self.limiter)
+
+    def _retry_delay(self, error: BaseException, attempt: int) -> float | None:
+        if attempt >= self.max_retries or not is_retryable_error(error):
+            return None
+        backoff = min(self.backoff_max, self.backoff_base * 2**attempt)
+        delay = random.uniform(0, backoff)
+        retry_after = parse_retry_after(error)
+        return max(delay, retry_after) if retry_after is not None else delay
+
+    async def open(
+        self, factory: Callable[[], Awaitable[Any]]
+    ) -> tuple[Any, UpstreamPermit]:
+        """
+        Run ``factory`` with retries and return its result with the held permit.
+        Use it for streams: release the permit once the stream is consumed.
+        """
+        attempt = 0
+        while True:
+            permit = await self.acquire()
+            self._stats["calls"] += 1
+            try:
+                result = await factory()
+            except Exception as e:
+                permit.release(success=False, overloaded=is_overload_error(e))
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    self._stats["failures"] += 1
+                    raise
+                if delay > self.backoff_max:
+                    # Only a Retry-After goes beyond it, fail fast instead
+                    self._stats["failures"] += 1
+                    raise UpstreamThrottled(
+                        f"Upstream asks to retry in {delay:.0f}s "
+                        f"(max {self.backoff_max:.0f}s)",
+                        retry_after=delay,
+                    ) from e
+                attempt += 1
+                self._stats["retries"] += 1
+                logger.warning(
+                    "Upstream call failed (%s), retry %s in %.2fs", e, attempt, delay
+                )
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                permit.release(success=False)
+                raise
+            return result, permit
+
+    async def call(self, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``factory`` under the scheduler and release the slot right after"""
+        result, permit = await self.open(factory)
+        permit.release(success=True)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "queued": self._queued,
+            "in_flight": self.limiter.in_flight,
+            "concurrency_limit": self.limiter.limit,
+        }
+
+
+_scheduler = None
+
+
+def get_upstream_scheduler() -> UpstreamScheduler:
+    """Get the process-wide upstream scheduler"""
+    global _scheduler
+
+    if _scheduler is None:
+        settings = get_settings()
+        _scheduler = UpstreamScheduler(
+            rate=settings.UPSTREAM_RATE_LIMIT,
+            burst=settings.UPSTREAM_BURST,
+            limiter=AdaptiveConcurrencyLimiter(
+                initial=settings.UPSTREAM_INITIAL_CONCURRENCY,
+                min_limit=settings.UPSTREAM_MIN_CONCURRENCY,
+                max_limit=settings.UPSTREAM_MAX_CONCURRENCY,
+            ),
+            max_queue=settings.UPSTREAM_MAX_QUEUE,
+            max_retries=settings.UPSTREAM_MAX_RETRIES,
+            backoff_base=settings.UPSTREAM_BACKOFF_BASE,
+            backoff_max=settings.UPSTREAM_BACKOFF_MAX,
+        )
+    return _scheduler
@@ -1,11 +1,41 @@
 import asyncio
+import json
 import logging
-from fastapi import APIRouter, HTTPException
+import math
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from lxml import etree
+from pydantic import BaseModel
 
 from src.get_example_diagram import get_example_diagramm
-from src.ai_generation.bpmn_agent.simple.agent import invoke_agent
-from .schemas import SExampleBPMN, SAgentOutput, SUserInputData
+from settings import get_settings
+from src.ai_generation.prompt_index import get_prompt_index
+from src.ai_generation.upstream_scheduler import UpstreamQueueFull
+from src.assemblers.xml.patch import PatchError
+from src.assemblers.xml.streaming import (
+    compress,
+    compress_stream,
+    negotiate_encoding,
+    parse_xml,
+    stream_xml,
+)
+from src.jobs import JobQueueFull, get_job_queue
+from .schemas import (
+    SExampleBPMN,
+    SAgentOutput,
+    SAnalysis,
+    SAnalyzeRequest,
+    SBatchItemResult,
+    SEditOutput,
+    SEditRequest,
+    SGenerationMeta,
+    SJob,
+    SUserInputData,
+)
 
+# The agent and the LLM client (langgraph, openai, jinja2) and the analysis
+# (numpy, scipy) are imported in the handlers: startup and /health do not
+# wait for them, the lifespan prewarm loads them in the background
 router = APIRouter(
     tags=["API"],
 )
@@ -13,16 +43,325 @@ router = APIRouter(
 logger = logging.getLogger(__name__)
 
 
-@router.get("/generate")
-async def generate_bpmn(user_input: str) -> SAgentOutput:
+def _build_generation_meta(result: dict) -> SGenerationMeta:
+    """Collect prompt index statistics for the generation response"""
+    index = get_prompt_index()
+    meta = SGenerationMeta(
+        prompt_cache_hit_rate=index.stats()["hit_rate"] if index is not None else 0.0
+    )
+    if match := result.get("prompt_match"):
+        meta.prompt_cache_hit = True
+        meta.similarity = match.similarity
+        meta.matched_input = match.prompt
+    return meta
+
+
+def _analyze_xml(xml: str):
+    from src.assemblers.xml.analysis import analyze_xml
+
+    return analyze_xml(xml)
+
+
+async def _analyze(xml: str) -> SAnalysis | None:
+    """Structural analysis of a generated diagram, None if it cannot be parsed"""
+    try:
+        report = await asyncio.to_thread(_analyze_xml, xml)
+    except ValueError as e:
+        logger.warning("Analysis skipped: %s", e)
+        return None
+    return SAnalysis.model_validate(report.to_dict())
+
+
+def _upstream_busy(error: UpstreamQueueFull) -> HTTPException:
+    """503 asking the client to come back when the upstream has room"""
+    return HTTPException(
+        status_code=503,
+        detail="Too many generations in progress. Please retry later.",
+        headers={"Retry-After": str(math.ceil(error.retry_after))},
+    )
+
+
+def _compression_level(encoding: str | None) -> int:
+    settings = get_settings()
+    return settings.XML_BROTLI_QUALITY if encoding == "br" else settings.XML_GZIP_LEVEL
+
+
+async def _json_response(request: Request, body: BaseModel) -> Response:
+    """JSON body compressed with the best coding the client accepts"""
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    content = body.model_dump_json().encode("utf-8")
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding is not None:
+        content = await asyncio.to_thread(
+            compress, content, encoding, _compression_level(encoding)
+        )
+        headers["Content-Encoding"] = encoding
+    return Response(content, media_type="application/json", headers=headers)
+
+
+@router.get("/generate", response_model=SAgentOutput)
+async def generate_bpmn(
+    request: Request, user_input: str, use_cache: bool = True
+) -> Response:
+    """
+    Generate BPMN XML code to render with bpmn-js.
+    gzip/brotli compressed if accepted.
+    """
+    from src.ai_generation.bpmn_agent.simple.agent import invoke_agent
+
+    user_data = SUserInputData(user_input=user_input)
+    try:
+        xml = await invoke_agent(user_data, use_cache=use_cache)
+    except UpstreamQueueFull as e:
+        logger.warning("Generation rejected: %s", e)
+        raise _upstream_busy(e)
+    output = xml.get("previous_answer")
+    body = SAgentOutput(
+        output=output or "Sorry, tech problem. Please retry later.",
+        metadata=_build_generation_meta(xml),
+        analysis=(
+            await _analyze(output) if output and get_settings().AGENT_ANALYZE else None
+        ),
+    )
+    return await _json_response(request, body)
+
+
+@router.post("/analyze")
+async def analyze_bpmn(request: SAnalyzeRequest) -> SAnalysis:
+    """
+    Find unreachable nodes, dead ends, deadlocks, infinite loops and
+    unbalanced gateways in every process of a BPMN XML
+    """
+    try:
+        report = await asyncio.to_thread(_analyze_xml, request.xml)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return SAnalysis.model_validate(report.to_dict())
+
+
+@router.post("/edit")
+async def edit_bpmn(request: SEditRequest, use_cache: bool = True) -> SEditOutput:
+    """
+    Apply a change request to an existing BPMN XML.
+    The model returns a few patch operations, the diagram is patched locally.
+    """
+    from src.ai_generation.bpmn_agent.simple.diagram_edit import edit_diagram
+
+    try:
+        result = await edit_diagram(
+            request.xml, request.change_request, use_cache=use_cache
+        )
+    except PatchError as e:
+        logger.warning("Edit rejected: %s", e)
+        raise HTTPException(status_code=422, detail=str(e))
+    except UpstreamQueueFull as e:
+        logger.warning("Edit rejected: %s", e)
+        raise _upstream_busy(e)
+    return result
+
+
+def _xml_response(
+    request: Request, root: etree.Element, compact: bool
+) -> StreamingResponse:
+    """Stream XML in chunks, compressed with the best coding the client accepts"""
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return StreamingResponse(
+        stream_xml(
+            root,
+            encoding,
+            pretty_print=not compact,
+            chunk_size=get_settings().XML_STREAM_CHUNK_SIZE,
+            level=_compression_level(encoding),
+        ),
+        media_type="application/xml",
+        headers=headers,
+    )
+
+
+@router.get("/generate/xml")
+async def generate_bpmn_xml(
+    request: Request, user_input: str, use_cache: bool = True, compact: bool = True
+) -> StreamingResponse:
     """
-    Generate BPMN XML code to render with bpmn-js
+    Generate BPMN XML and return the document itself.
+    Compact (not indented) by default, gzip/brotli compressed if accepted.
     """
+    from src.ai_generation.bpmn_agent.simple.agent import invoke_agent
+
     user_data = SUserInputData(user_input=user_input)
-    xml = await asyncio.to_thread(invoke_agent, user_data)
-    return {
-        "output": xml.get("previous_answer", "Sorry, tech problem. Please retry later.")
+    try:
+        result = await invoke_agent(user_data, use_cache=use_cache)
+    except UpstreamQueueFull as e:
+        logger.warning("Generation rejected: %s", e)
+        raise _upstream_busy(e)
+    if not result.get("previous_answer"):
+        raise HTTPException(
+            status_code=502, detail="Sorry, tech problem. Please retry later."
+        )
+    try:
+        # Parsed before the response starts, a broken answer is still a 502
+        root = await asyncio.to_thread(parse_xml, result["previous_answer"])
+    except ValueError as e:
+        logger.warning("Generated diagram rejected: %s", e)
+        raise HTTPException(
+            status_code=502, detail="Sorry, tech problem. Please retry later."
+        )
+    return _xml_response(request, root, compact)
+
+
+def _format_sse(event: dict) -> str:
+    """Serialize an agent event as a Server-Sent Events frame"""
+    payload = json.dumps(event, ensure_ascii=False)
+    return f"event: {event['event']}\ndata: {payload}\n\n"
+
+
+@router.get("/generate/stream")
+async def generate_bpmn_stream(
+    request: Request, user_input: str, use_cache: bool = True
+) -> StreamingResponse:
+    """
+    Stream BPMN generation as Server-Sent Events.
+    Emits stage markers, tokens, the XML as soon as it is complete and a final event.
+    gzip/brotli compressed if accepted, every event is flushed.
+    The stream has started when the upstream queue turns out to be full, so
+    that is an 'error' event with 'retry_after' instead of a 503.
+    """
+    from src.ai_generation.bpmn_agent.simple.agent import stream_agent
+
+    user_data = SUserInputData(user_input=user_input)
+
+    async def event_stream():
+        try:
+            async for event in stream_agent(user_data, use_cache=use_cache):
+                yield _format_sse(event).encode("utf-8")
+        except Exception as e:
+            logger.error("Error while streaming generation: %s", e)
+            event = {"event": "error", "detail": str(e)}
+            if isinstance(e, UpstreamQueueFull):
+                event["retry_after"] = math.ceil(e.retry_after)
+            yield _format_sse(event).encode("utf-8")
+
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    headers = {
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+        "Vary": "Accept-Encoding",
     }
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return StreamingResponse(
+        compress_stream(event_stream(), encoding, _compression_level(encoding)),
+        media_type="text/event-stream",
+        headers=headers,
+    )
+
+
+@router.post("/generate/batch")
+async def generate_bpmn_batch(
+    inputs: list[SUserInputData],
+    use_cache: bool = True,
+    concurrency: int | None = Query(default=None, ge=1),
+) -> StreamingResponse:
+    """
+    Generate BPMN XML for a list of inputs.
+    Streams NDJSON lines in completion order, each tagged with its input index.
+    Failed inputs are reported in their line and do not abort the batch, an
+    input rejected by the full upstream queue has 'retry_after' in its line
+    instead of a 503 for the whole batch.
+    """
+    from src.ai_generation.bpmn_agent.simple.agent import invoke_agent_batch
+
+    settings = get_settings()
+    if len(inputs) > settings.BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch is limited to {settings.BATCH_MAX_SIZE} inputs",
+        )
+    limit = min(concurrency or settings.BATCH_CONCURRENCY, settings.BATCH_CONCURRENCY)
+    logger.info("Batch of %s inputs, concurrency %s", len(inputs), limit)
+
+    async def results():
+        async for index, result, error in invoke_agent_batch(inputs, limit, use_cache):
+            if error is not None:
+                item = SBatchItemResult(
+                    index=index,
+                    status=False,
+                    error=str(error),
+                    retry_after=(
+                        math.ceil(error.retry_after)
+                        if isinstance(error, UpstreamQueueFull)
+                        else None
+                    ),
+                )
+            else:
+                item = SBatchItemResult(
+                    index=index,
+                    output=result.get(
+                        "previous_answer", "Sorry, tech problem. Please retry later."
+                    ),
+                    metadata=_build_generation_meta(result),
+                )
+            yield item.model_dump_json(exclude_none=True) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+def _job_output(job) -> dict:
+    data = job.to_dict()
+    data.pop("user_input")
+    data.pop("use_cache")
+    return data
+
+
+@router.post("/jobs", status_code=202)
+async def create_job(user_data: SUserInputData, use_cache: bool = True) -> SJob:
+    """
+    Queue a BPMN generation and return its job id right away
+    """
+    try:
+        job = await get_job_queue().submit(user_data, use_cache=use_cache)
+    except JobQueueFull as e:
+        logger.warning("Job rejected: %s", e)
+        raise HTTPException(
+            status_code=503,
+            detail="Too many queued jobs. Please retry later.",
+            headers={"Retry-After": "30"},
+        )
+    return _job_output(job)
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> SJob:
+    """
+    Get status and result of a generation job
+    """
+    job = await get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_output(job)
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str) -> StreamingResponse:
+    """
+    Stream job status changes as Server-Sent Events until the job is finished
+    """
+    queue = get_job_queue()
+    if await queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        async for job in queue.watch(job_id):
+            yield _format_sse({"event": "status", **_job_output(job)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/example-bpmn-xml")
@@ -37,3 +376,19 @@ async def get_example_bpmn_xml() -> SExampleBPMN:
         logger.error("Error getting example BPMN XML: " + str(e))
         raise HTTPException(status_code=500, detail=str(e))
     return {"xml": xml}
+
+
+@router.get("/example-bpmn-xml/raw")
+async def get_example_bpmn_xml_raw(
+    request: Request, compact: bool = True
+) -> StreamingResponse:
+    """
+    Get the base BPMN XML as a document, gzip/brotli compressed if accepted
+    """
+    xml = await asyncio.to_thread(get_example_diagramm)
+    try:
+        root = await asyncio.to_thread(parse_xml, xml)
+    except ValueError as e:
+        logger.error("Error parsing example BPMN XML: " + str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+    return _xml_response(request, root, compact)
@@ -0,0 +1,141 @@
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+# (member key, item index or None for a non-array member, decoded value)
+JsonEvent = Tuple[str, Optional[int], Any]
+
+_STRUCTURE_RE = re.compile(r'[{}\[\]",:]')
+_STRING_END_RE = re.compile(r'["\\]')
+
+
+class IncrementalJsonParser:
+    """
+    Push parser for a streamed JSON object.
+
+    Chunks are fed as they arrive, ``feed`` returns the values completed by
+    the chunk: each item of a top-level array as soon as the item closes,
+    other top-level members when they end. Only structural characters are
+    scanned, a completed value is decoded once with ``json.loads`` and
+    dropped from the buffer, which only holds the value in progress.
+
+    Text before the opening brace (e.g. a markdown code fence) and after
+    the closing one is ignored.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        # Top-level keys in document order
+        self.members: List[str] = []
+        self.done = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._string_start = 0
+        self._key: Optional[str] = None
+        self._expect_key = True
+        # Start of the pending member value / array item, None between values
+        self._value_start: Optional[int] = None
+        self._items = False
+        self._index = 0
+
+    def feed(self, chunk: str) -> List[JsonEvent]:
+        """Consume a chunk, returns the events it completes"""
+        text = self._buffer = self._buffer + chunk
+        events: List[JsonEvent] = []
+        while not self.done:
+            if self._in_string:
+                match = _STRING_END_RE.search(text, self._pos)
+                if match is None:
+                    self._pos = len(text)
+                    break
+                if match.group() == "\\":
+                    if match.end() >= len(text):
+                        self._pos = match.start()  # escaped char not arrived yet
+                        break
+                    self._pos = match.end() + 1
+                    continue
+                self._pos = match.end()
+                self._in_string = False
+                if self._depth == 1 and self._expect_key:
+                    self._key = json.loads(text[self._string_start : self._pos])
+                continue
+
+            match = _STRUCTURE_RE.search(text, self._pos)
+            if match is None:
+                self._pos = len(text)
+                break
+            char, at = match.group(), match.start()
+            self._pos = match.end()
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                continue
+            if char == '"':
+                self._in_string = True
+                self._string_start = at
+            elif char in "{[":
+                if (
+                    self._depth == 1
+                    and char == "["
+                    and not text[self._value_start : at].strip()
+                ):
+                    self._items = True
+                    self._index = 0
+                    self._value_start = self._pos
+                self._depth += 1
+            elif char == ":":
+                if self._depth == 1:
+                    self._expect_key = False
+                    self._value_start = self._pos
+                    self.members.append(self._key)
+            elif char == ",":
+                if self._items and self._depth == 2:
+                    self._emit_item(at, events)
+                elif self._depth == 1:
+                    self._emit_member(at, events)
+            else:  # closing bracket or brace
+                if self._items and self._depth == 2:
+                    self._emit_item(at, events)
+                    self._items = False
+                    self._value_start = None
+                elif self._depth == 1:
+                    self._emit_member(at, events)
+                    self.done = True
+                self._depth -= 1
+        self._trim()
+        return events
+
+    def close(self) -> None:
+        """Raise ValueError if the stream ended before the object closed"""
+        if not self.done:
+            raise ValueError("JSON object is incomplete")
+
+    def _trim(self) -> None:
+        """Drop the scanned text no pending value or string starts in"""
+        keep = self._pos
+        if self._value_start is not None:
+            keep = min(keep, self._value_start)
+        if self._in_string:
+            keep = min(keep, self._string_start)
+        if keep:
+            self._buffer = self._buffer[keep:]
+            self._pos -= keep
+            self._string_start -= keep
+            if self._value_start is not None:
+                self._value_start -= keep
+
+    def _emit_item(self, end: int, events: List[JsonEvent]) -> None:
+        raw = self._buffer[self._value_start : end].strip()
+        self._value_start = end + 1
+        if raw:
+            events.append((self._key, self._index, json.loads(raw)))
+            self._index += 1
+
+    def _emit_member(self, end: int, events: List[JsonEvent]) -> None:
+        if self._value_start is not None:
+            raw = self._buffer[self._value_start : end].strip()
+            if raw:
+                events.append((self._key, None, json.loads(raw)))
+        self._value_start = None
+        self._expect_key = True
@@ -0,0 +1,234 @@
+import json
+import logging
+import re
+from typing import Any, Dict, List
+
+from src.assemblers.xml.director import BpmnDirector
+from src.assemblers.xml.model import ProcessGraph
+
+from .incremental import IncrementalJsonParser
+
+logger = logging.getLogger(__name__)
+
+NODE_TYPES = {
+    "startEvent",
+    "endEvent",
+    "task",
+    "userTask",
+    "serviceTask",
+    "exclusiveGateway",
+    "parallelGateway",
+    "subProcess",
+}
+
+# XML ids must be NCNames
+_NCNAME_RE = re.compile(r"^[A-Za-z_][\w.\-]*$")
+_INVALID_ID_CHARS_RE = re.compile(r"[^\w.\-]")
+_CODE_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+# Ids the director generates itself: flows, process, diagram and DI elements
+_GENERATED_ID_RE = re.compile(
+    r"^(?:Flow_\d+|Process_1|Definitions_1|BPMNDiagram_1|BPMNPlane_1)$|_di$"
+)
+
+
+class IRValidationError(ValueError):
+    """The intermediate representation cannot be turned into a BPMN process"""
+
+
+def parse_ir(text: str | None) -> Dict[str, Any]:
+    """Parse the LLM answer, tolerating markdown code fences"""
+    if not text:
+        raise IRValidationError("Empty IR")
+    try:
+        data = json.loads(_CODE_FENCE_RE.sub("", text))
+    except json.JSONDecodeError as e:
+        raise IRValidationError(f"IR is not valid JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise IRValidationError("IR must be a JSON object")
+    return data
+
+
+def _xml_id(raw_id: str) -> str:
+    if _NCNAME_RE.match(raw_id):
+        xml_id = raw_id
+    else:
+        xml_id = "Node_" + _INVALID_ID_CHARS_RE.sub("_", raw_id)
+    if _GENERATED_ID_RE.search(xml_id):
+        # Renamed, the document would otherwise hold the id twice
+        xml_id += "_node"
+    return xml_id
+
+
+class _IrReader:
+    """
+    Checks IR nodes and flows one at a time and converts them into
+    BpmnDirector rows. Flow ids are generated, node ids are made XML-safe
+    and renamed when they clash with a generated id.
+    """
+
+    def __init__(self):
+        self.ids: Dict[str, str] = {}
+        self.used_ids: set[str] = set()
+        self.flow_count = 0
+        self.has_start = False
+
+    def node(self, node: Any) -> Dict[str, Any]:
+        if not isinstance(node, dict):
+            raise IRValidationError("Node must be an object")
+        raw_id, node_type = str(node.get("id", "")), node.get("type")
+        if not raw_id:
+            raise IRValidationError("Node without id")
+        if raw_id in self.ids:
+            raise IRValidationError(f"Duplicate node id '{raw_id}'")
+        if node_type not in NODE_TYPES:
+            raise IRValidationError(f"Unknown node type '{node_type}'")
+        xml_id = _xml_id(raw_id)
+        if xml_id in self.used_ids:
+            xml_id = f"{xml_id}_{len(self.used_ids)}"
+        self.ids[raw_id] = xml_id
+        self.used_ids.add(xml_id)
+        self.has_start = self.has_start or node_type == "startEvent"
+        return {"id": xml_id, "type": node_type, "name": node.get("name") or ""}
+
+    def flow(self, flow: Any) -> Dict[str, Any]:
+        if not isinstance(flow, dict):
+            raise IRValidationError("Flow must be an object")
+        source, target = str(flow.get("from", "")), str(flow.get("to", ""))
+        if source not in self.ids or target not in self.ids:
+            raise IRValidationError(f"Flow {source} -> {target} references no node")
+        self.flow_count += 1
+        return {
+            "id": f"Flow_{self.flow_count}",
+            "sourceRef": self.ids[source],
+            "targetRef": self.ids[target],
+            "name": flow.get("name") or None,
+        }
+
+    def resolves(self, flow: Any) -> bool:
+        """Both ends of the flow are known nodes"""
+        return (
+            isinstance(flow, dict)
+            and {
+                str(flow.get("from", "")),
+                str(flow.get("to", "")),
+            }
+            <= self.ids.keys()
+        )
+
+
+def ir_to_director_data(ir: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert the compact IR (nodes + flows) into the dictionary BpmnDirector
+    builds from. Flow ids are generated, node ids are made XML-safe and
+    renamed when they clash with a generated id (Flow_1, Process_1, ..._di).
+    Layout is left out, the director computes it.
+
+    Raises IRValidationError on unknown node types, duplicate ids
+    or flows referencing missing nodes.
+    """
+    nodes = ir.get("nodes")
+    flows = ir.get("flows")
+    if not isinstance(nodes, list) or not nodes:
+        raise IRValidationError("IR has no nodes")
+    if not isinstance(flows, list):
+        raise IRValidationError("IR has no flows")
+
+    reader = _IrReader()
+    director_nodes = [reader.node(node) for node in nodes]
+    if not reader.has_start:
+        raise IRValidationError("IR has no start event")
+    director_flows = [reader.flow(flow) for flow in flows]
+
+    return {
+        "process": {
+            "id": "Process_1",
+            "name": ir.get("name") or "Process",
+            "nodes": director_nodes,
+        },
+        "flow": {"flows": director_flows},
+    }
+
+
+def ir_to_xml(text: str | None) -> str:
+    """Build the BPMN XML document (with computed layout) from the IR answer"""
+    director = BpmnDirector()
+    director.construct_from_json(ir_to_director_data(parse_ir(text)))
+    return director.to_string()
+
+
+class IrStreamAssembler:
+    """
+    Assembles the BPMN document while the IR answer streams in.
+
+    Chunks go through an incremental JSON parser, every node and flow is
+    appended to the XML tree as soon as its object closes, so only the
+    layout is left when the last token arrives. Invalid nodes or flows
+    raise IRValidationError from ``feed``, the caller can stop the stream
+    early. The result is the same document ``ir_to_xml`` builds.
+    """
+
+    def __init__(self):
+        self._parser = IncrementalJsonParser()
+        self._reader = _IrReader()
+        self._graph = ProcessGraph("Process_1", "Process")
+        self._director = BpmnDirector()
+        self._started = False
+        # Flows that arrived before the nodes they connect, kept in order
+        self._pending: List[Any] = []
+
+    def feed(self, chunk: str) -> None:
+        try:
+            events = self._parser.feed(chunk)
+        except ValueError as e:
+            raise IRValidationError(f"IR is not valid JSON: {e}") from e
+        for key, index, value in events:
+            if key == "name" and index is None:
+                self._set_name(value or "Process")
+            elif key == "nodes" and index is not None:
+                self._start()
+                node = self._reader.node(value)
+                self._director.add_node(node["id"], node["type"], node["name"])
+            elif key == "flows" and index is not None:
+                self._pending.append(value)
+                self._add_pending_flows()
+
+    def finish(self) -> str:
+        """Lay out the diagram once the answer is complete, returns the XML"""
+        try:
+            self._parser.close()
+        except ValueError as e:
+            raise IRValidationError(f"IR is not valid JSON: {e}") from e
+        if not self._reader.ids:
+            raise IRValidationError("IR has no nodes")
+        if "flows" not in self._parser.members:
+            raise IRValidationError("IR has no flows")
+        if not self._reader.has_start:
+            raise IRValidationError("IR has no start event")
+        self._add_pending_flows(resolve=True)
+        self._director.finish()
+        return self._director.to_string()
+
+    def _start(self) -> None:
+        if not self._started:
+            self._started = True
+            self._director.begin(self._graph)
+
+    def _set_name(self, name: str) -> None:
+        self._graph.name = name
+        if self._started:
+            self._director.builder.rename_process(name)
+
+    def _add_pending_flows(self, resolve: bool = False) -> None:
+        """Add queued flows in order, up to the first one with unknown ends"""
+        while self._pending and (resolve or self._reader.resolves(self._pending[0])):
+            self._start()
+            self._director.add_flow(**self._flow_args(self._pending.pop(0)))
+
+    def _flow_args(self, flow: Any) -> Dict[str, Any]:
+        row = self._reader.flow(flow)
+        return {
+            "flow_id": row["id"],
+            "source": row["sourceRef"],
+            "target": row["targetRef"],
+            "name": row["name"],
+        }
@@ -0,0 +1,221 @@
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List
+
+import numpy as np
+from lxml import etree
+from scipy.sparse import csr_array
+from scipy.sparse.csgraph import breadth_first_order, connected_components
+
+from .layout import GATEWAY_TYPES
+from .model import ProcessGraph
+from .validation import NAMESPACES
+
+
+class CsrGraph:
+    """
+    Directed graph in compressed sparse row form: the successors of node i
+    are ``indices[indptr[i]:indptr[i + 1]]``. Nodes are 0..size-1, both
+    are NumPy arrays, every query is a batch operation over them.
+    Traversals run in ``scipy.sparse.csgraph`` on the same arrays, a
+    level-by-level frontier in NumPy needs one pass per level and long
+    chains of tasks have thousands of levels.
+    """
+
+    __slots__ = ("size", "indptr", "indices", "sources")
+
+    def __init__(self, size: int, sources: Iterable[int], targets: Iterable[int]):
+        sources = np.asarray(sources, dtype=np.int32)
+        targets = np.asarray(targets, dtype=np.int32)
+        self.size = size
+        order = np.argsort(sources, kind="stable")
+        # Source of every edge in CSR order
+        self.sources = sources[order]
+        self.indices = targets[order]
+        self.indptr = np.zeros(size + 1, dtype=np.int32)
+        np.cumsum(np.bincount(sources, minlength=size), out=self.indptr[1:])
+
+    def transpose(self) -> "CsrGraph":
+        return CsrGraph(self.size, self.indices, self.sources)
+
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def edges(self) -> tuple[np.ndarray, np.ndarray]:
+        return self.sources, self.indices
+
+    def matrix(self) -> csr_array:
+        data = np.ones(self.indices.size)
+        return csr_array((data, self.indices, self.indptr), shape=(self.size,) * 2)
+
+    def reachable(self, seeds: Iterable[int]) -> np.ndarray:
+        """True for every node reachable from the seeds (seeds included)"""
+        seeds = np.unique(np.asarray(seeds, dtype=np.int32))
+        seen = np.zeros(self.size, dtype=bool)
+        if not seeds.size:
+            return seen
+        # One search from a virtual source with an edge to every seed
+        indptr = np.append(self.indptr, self.indptr[-1] + seeds.size)
+        indices = np.concatenate([self.indices, seeds])
+        n = self.size + 1
+        graph = csr_array((np.ones(indices.size), indices, indptr), shape=(n, n))
+        order = breadth_first_order(graph, self.size, return_predecessors=False)
+        seen[order[1:]] = True
+        return seen
+
+    def strongly_connected_components(self) -> tuple[np.ndarray, int]:
+        """Component id of every node and the number of components"""
+        count, component = connected_components(
+            self.matrix(), directed=True, connection="strong"
+        )
+        return component, count
+
+
+@dataclass
+class GatewayFinding:
+    id: str
+    type: str
+    fan_in: int
+    fan_out: int
+    problem: str
+
+
+@dataclass
+class StructureReport:
+    """Structural problems of a process, ids are node ids"""
+
+    nodes: int
+    flows: int
+    # Not reachable from a start event
+    unreachable: List[str] = field(default_factory=list)
+    # Reachable, but no end event can be reached from them
+    dead_ends: List[str] = field(default_factory=list)
+    # Parallel joins waiting for a token that never arrives
+    deadlocks: List[str] = field(default_factory=list)
+    # Cycles no token can leave
+    infinite_loops: List[List[str]] = field(default_factory=list)
+    loops: int = 0
+    unbalanced_gateways: List[GatewayFinding] = field(default_factory=list)
+    # Gateway type -> number of splits and joins
+    gateway_balance: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not (
+            self.unreachable
+            or self.dead_ends
+            or self.deadlocks
+            or self.infinite_loops
+            or self.unbalanced_gateways
+        )
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "ok": self.ok}
+
+
+def analyze(graph: ProcessGraph) -> StructureReport:
+    """
+    Reachability from start and to end events, strongly connected
+    components and gateway fan-in/fan-out of a process graph.
+
+    The graph is converted once into CSR adjacency (and its transpose),
+    every check is an array operation over nodes or edges. Flows
+    referencing missing nodes are ignored, ``ProcessGraph.validate``
+    reports them.
+    """
+    ids = [node.id for node in graph.nodes]
+    types = np.array([node.type for node in graph.nodes], dtype=object)
+    position = dict(zip(ids, range(len(ids))))
+    sources = np.array([position.get(f.source, -1) for f in graph.flows], np.int32)
+    targets = np.array([position.get(f.target, -1) for f in graph.flows], np.int32)
+    known = (sources >= 0) & (targets >= 0)
+
+    csr = CsrGraph(len(ids), sources[known], targets[known])
+    reverse = csr.transpose()
+    fan_out, fan_in = csr.degrees(), reverse.degrees()
+    report = StructureReport(nodes=len(ids), flows=len(graph.flows))
+
+    reached = csr.reachable(np.flatnonzero(types == "startEvent"))
+    reaching = reverse.reachable(np.flatnonzero(types == "endEvent"))
+    report.unreachable = [ids[i] for i in np.flatnonzero(~reached)]
+    report.dead_ends = [ids[i] for i in np.flatnonzero(reached & ~reaching)]
+
+    component, count = csr.strongly_connected_components()
+    edge_sources, edge_targets = csr.edges()
+    source_component = component[edge_sources]
+    inside = source_component == component[edge_targets]
+    # A component is a loop if an edge stays inside it (self loops included)
+    cyclic = np.zeros(count, dtype=bool)
+    cyclic[source_component[inside]] = True
+    has_exit = np.zeros(count, dtype=bool)
+    has_exit[source_component[~inside]] = True
+    report.loops = int(cyclic.sum())
+    trapped: Dict[int, List[str]] = {}
+    for i in np.flatnonzero((cyclic & ~has_exit)[component] & reached):
+        trapped.setdefault(component[i], []).append(ids[i])
+    report.infinite_loops = list(trapped.values())
+
+    gateways = np.flatnonzero([node_type in GATEWAY_TYPES for node_type in types])
+    for node_type in dict.fromkeys(types[gateways]):
+        of_type = gateways[types[gateways] == node_type]
+        report.gateway_balance[node_type] = {
+            "splits": int((fan_out[of_type] > 1).sum()),
+            "joins": int((fan_in[of_type] > 1).sum()),
+        }
+    mixed = (fan_in > 1) & (fan_out > 1)
+    pass_through = (fan_in <= 1) & (fan_out <= 1)
+    for i in gateways[mixed[gateways] | pass_through[gateways]]:
+        report.unbalanced_gateways.append(
+            GatewayFinding(
+                ids[i],
+                types[i],
+                int(fan_in[i]),
+                int(fan_out[i]),
+                "mixed" if mixed[i] else "pass_through",
+            )
+        )
+
+    # A parallel join waits for a token on every incoming flow: it deadlocks
+    # when one of them is unreachable, or when one comes back from a loop
+    # through the join itself while another enters from outside the loop
+    size = len(ids)
+    unreached_in = np.bincount(
+        edge_targets, weights=~reached[edge_sources], minlength=size
+    )
+    inside_in = np.bincount(edge_targets, weights=inside, minlength=size)
+    joins = (types == "parallelGateway") & (fan_in > 1)
+    deadlocked = joins & ((unreached_in > 0) | ((inside_in > 0) & (inside_in < fan_in)))
+    report.deadlocks = [ids[i] for i in np.flatnonzero(deadlocked)]
+    return report
+
+
+def _merge(reports: List[StructureReport]) -> StructureReport:
+    """One report over several processes (pools) of a document"""
+    merged = StructureReport(
+        nodes=sum(r.nodes for r in reports), flows=sum(r.flows for r in reports)
+    )
+    for report in reports:
+        merged.unreachable += report.unreachable
+        merged.dead_ends += report.dead_ends
+        merged.deadlocks += report.deadlocks
+        merged.infinite_loops += report.infinite_loops
+        merged.loops += report.loops
+        merged.unbalanced_gateways += report.unbalanced_gateways
+        for node_type, balance in report.gateway_balance.items():
+            total = merged.gateway_balance.setdefault(
+                node_type, {"splits": 0, "joins": 0}
+            )
+            total["splits"] += balance["splits"]
+            total["joins"] += balance["joins"]
+    return merged
+
+
+def analyze_xml(text: str) -> StructureReport:
+    """Analyze every process (pool) of a BPMN document"""
+    try:
+        root = etree.fromstring(text.strip().encode("utf-8"))
+    except etree.XMLSyntaxError as e:
+        raise ValueError(f"Diagram is not valid XML: {e}") from e
+    processes = root.findall("bpmn:process", NAMESPACES)
+    if not processes:
+        raise ValueError("Diagram has no process")
+    return _merge([analyze(ProcessGraph.from_process(p)) for p in processes])
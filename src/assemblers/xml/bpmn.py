@@ -1,11 +1,14 @@
-from typing import Optional
+from typing import Dict, Iterable, Optional
 from lxml import etree
 import logging
-from .base_xml import BaseXmlBuilder
+from .base_xml import BaseXmlBuilder, check_tag_name, quote_attr
 
 
 logger = logging.getLogger(__name__)
 
+# Coordinates of these types are written as they are, others are escaped
+_NUMBER_TYPES = frozenset((int, float))
+
 
 class BpmnBuilder(BaseXmlBuilder):
     """
@@ -22,6 +25,7 @@ class BpmnBuilder(BaseXmlBuilder):
         <BPMNDiagram>
             <BPMNPlane>
                 <BPMNShape> <Bounds /> </BPMNShape>
+                <BPMNEdge> <waypoint /> <waypoint /> </BPMNEdge>
             </BPMNPlane>
         </BPMNDiagram>
     </definitions>
@@ -41,6 +45,49 @@ class BpmnBuilder(BaseXmlBuilder):
         # Builder state (cursors)
         self._current_process: Optional[etree.Element] = None
         self._current_plane: Optional[etree.Element] = None
+        # Index: id -> process element, bpmnElement -> DI element
+        self._elements: Dict[str, etree.Element] = {}
+        self._di: Dict[str, etree.Element] = {}
+
+    @classmethod
+    def from_root(cls, root: etree.Element) -> "BpmnBuilder":
+        """Continue building a parsed document, the first process and plane become current"""
+        builder = cls()
+        builder.root = root
+        builder.tree = etree.ElementTree(root)
+        builder._current_process = root.find("bpmn:process", cls._BPMN_NAMESPACES)
+        builder._current_plane = root.find(
+            "bpmndi:BPMNDiagram/bpmndi:BPMNPlane", cls._BPMN_NAMESPACES
+        )
+        for process in root.iterfind("bpmn:process", cls._BPMN_NAMESPACES):
+            for element in process:
+                if isinstance(element.tag, str) and element.get("id"):
+                    builder._elements.setdefault(element.get("id"), element)
+        if builder._current_plane is not None:
+            for di in builder._current_plane:
+                if isinstance(di.tag, str) and di.get("bpmnElement"):
+                    builder._di.setdefault(di.get("bpmnElement"), di)
+        return builder
+
+    def get_element(self, element_id: str) -> Optional[etree.Element]:
+        """Process element (node or flow) by id"""
+        return self._elements.get(element_id)
+
+    def get_di(self, element_id: str) -> Optional[etree.Element]:
+        """BPMNShape or BPMNEdge of a process element"""
+        return self._di.get(element_id)
+
+    def remove_element(self, element_id: str) -> "BpmnBuilder":
+        """Remove a process element together with its DI"""
+        if (element := self._elements.pop(element_id, None)) is not None:
+            element.getparent().remove(element)
+        return self.remove_di(element_id)
+
+    def remove_di(self, element_id: str) -> "BpmnBuilder":
+        """Remove the BPMNShape or BPMNEdge of a process element"""
+        if (di := self._di.pop(element_id, None)) is not None:
+            di.getparent().remove(di)
+        return self
 
     def create_definitions(self, def_id: str) -> "BpmnBuilder":
         self.create_root(
@@ -75,12 +122,19 @@ class BpmnBuilder(BaseXmlBuilder):
         )
         return self
 
+    def rename_process(self, name: str) -> "BpmnBuilder":
+        """Set the name of the current process"""
+        if self._current_process is None:
+            raise ValueError("Start a process before renaming it")
+        self._current_process.set("name", name)
+        return self
+
     def add_node(self, node_type: str, node_id: str, name: str) -> "BpmnBuilder":
         """Add a node to the current active process"""
         if self._current_process is None:
             raise ValueError("Start a process before adding nodes")
 
-        self.create_element(
+        self._elements[node_id] = self.create_element(
             self._current_process, node_type, "bpmn", id=node_id, name=name
         )
         return self
@@ -91,7 +145,7 @@ class BpmnBuilder(BaseXmlBuilder):
         if self._current_process is None:
             raise ValueError("Start a process before adding flows")
 
-        self.create_element(
+        self._elements[flow_id] = self.create_element(
             self._current_process,
             "sequenceFlow",
             "bpmn",
@@ -102,6 +156,59 @@ class BpmnBuilder(BaseXmlBuilder):
         )
         return self
 
+    def add_nodes(
+        self, nodes: Iterable[tuple[str, str, Optional[str]]]
+    ) -> "BpmnBuilder":
+        """
+        Add many nodes to the current process at once.
+
+        Args:
+            nodes: (node_type, node_id, name) rows, columnar data can be
+                passed as zip(types, ids, names); a None name is omitted
+        """
+        if self._current_process is None:
+            raise ValueError("Start a process before adding nodes")
+
+        checked = set()
+        ids, markup = [], []
+        for node_type, node_id, name in nodes:
+            if node_type not in checked:
+                checked.add(check_tag_name(node_type))
+            ids.append(node_id)
+            markup.append(
+                f'<bpmn:{node_type} id="{quote_attr(node_id)}"/>'
+                if name is None
+                else f'<bpmn:{node_type} id="{quote_attr(node_id)}" '
+                f'name="{quote_attr(name)}"/>'
+            )
+        children = self.append_markup(self._current_process, markup)
+        self._elements.update(zip(ids, children))
+        return self
+
+    def add_flows(
+        self, flows: Iterable[tuple[str, str, str, Optional[str]]]
+    ) -> "BpmnBuilder":
+        """
+        Add many sequence flows to the current process at once.
+
+        Args:
+            flows: (flow_id, source, target, name) rows, a None name is omitted
+        """
+        if self._current_process is None:
+            raise ValueError("Start a process before adding flows")
+
+        ids, markup = [], []
+        for flow_id, source, target, name in flows:
+            ids.append(flow_id)
+            name_attr = "" if name is None else f' name="{quote_attr(name)}"'
+            markup.append(
+                f'<bpmn:sequenceFlow id="{quote_attr(flow_id)}"{name_attr} '
+                f'sourceRef="{quote_attr(source)}" targetRef="{quote_attr(target)}"/>'
+            )
+        children = self.append_markup(self._current_process, markup)
+        self._elements.update(zip(ids, children))
+        return self
+
     def init_diagram(self, process_ref: str) -> "BpmnBuilder":
         diagram = self.create_element(
             self.root, "BPMNDiagram", "bpmndi", id="BPMNDiagram_1"
@@ -125,4 +232,78 @@ class BpmnBuilder(BaseXmlBuilder):
             bpmnElement=element_id,
         )
         self.create_element(shape, "Bounds", "dc", x=x, y=y, width=w, height=h)
+        self._di[element_id] = shape
+        return self
+
+    def add_shapes(
+        self, shapes: Iterable[tuple[str, float, float, float, float]]
+    ) -> "BpmnBuilder":
+        """
+        Add many shapes at once.
+
+        Args:
+            shapes: (element_id, x, y, w, h) rows
+        """
+        if self._current_plane is None:
+            raise ValueError("Init diagram before adding shapes")
+
+        ids, markup = [], []
+        for element_id, x, y, w, h in shapes:
+            ids.append(element_id)
+            quoted = quote_attr(element_id)
+            if not _NUMBER_TYPES.issuperset(map(type, (x, y, w, h))):
+                x, y, w, h = map(quote_attr, (x, y, w, h))
+            markup.append(
+                f'<bpmndi:BPMNShape id="{quoted}_di" bpmnElement="{quoted}">'
+                f'<dc:Bounds x="{x}" y="{y}" width="{w}" height="{h}"/>'
+                "</bpmndi:BPMNShape>"
+            )
+        children = self.append_markup(self._current_plane, markup)
+        self._di.update(zip(ids, children))
+        return self
+
+    def add_edge(
+        self, flow_id: str, waypoints: list[tuple[float, float]]
+    ) -> "BpmnBuilder":
+        if self._current_plane is None:
+            raise ValueError("Init diagram before adding edges")
+        if len(waypoints) < 2:
+            raise ValueError(f"Edge {flow_id} needs at least two waypoints")
+
+        edge = self.create_element(
+            self._current_plane,
+            "BPMNEdge",
+            "bpmndi",
+            id=f"{flow_id}_di",
+            bpmnElement=flow_id,
+        )
+        for x, y in waypoints:
+            self.create_element(edge, "waypoint", "di", x=x, y=y)
+        self._di[flow_id] = edge
+        return self
+
+    def add_edges(
+        self, waypoints: dict[str, list[tuple[float, float]]]
+    ) -> "BpmnBuilder":
+        """Add an edge for every flow id, e.g. the result of routing.route_edges"""
+        if self._current_plane is None:
+            raise ValueError("Init diagram before adding edges")
+
+        markup = []
+        for flow_id, points in waypoints.items():
+            if len(points) < 2:
+                raise ValueError(f"Edge {flow_id} needs at least two waypoints")
+            quoted = quote_attr(flow_id)
+            markup.append(
+                f'<bpmndi:BPMNEdge id="{quoted}_di" bpmnElement="{quoted}">'
+                + "".join(
+                    f'<di:waypoint x="{x}" y="{y}"/>'
+                    if _NUMBER_TYPES.issuperset(map(type, (x, y)))
+                    else f'<di:waypoint x="{quote_attr(x)}" y="{quote_attr(y)}"/>'
+                    for x, y in points
+                )
+                + "</bpmndi:BPMNEdge>"
+            )
+        children = self.append_markup(self._current_plane, markup)
+        self._di.update(zip(waypoints, children))
         return self
@@ -1,65 +1,100 @@
-from typing import Dict, Any
+from typing import Any, Dict, List
 from .bpmn import BpmnBuilder
+from .layout import GATEWAY_TYPES, LayeredLayout
+from .model import ProcessGraph
+from .routing import route_edges
 
 
 class BpmnDirector:
-    def __init__(self, builder: BpmnBuilder | None):
-        if builder is None:
-            self.builder = BpmnBuilder()
-        self.builder = builder
+    def __init__(self, builder: BpmnBuilder | None = None):
+        self.builder = builder if builder is not None else BpmnBuilder()
+        self._graph: ProcessGraph | None = None
 
     def construct_from_json(self, data: Dict[str, Any]):
         """
         Parses JSON data and creates a BPMN diagram in XNL
         """
+        self.construct(ProcessGraph.from_director_data(data))
+
+    def construct(self, graph: ProcessGraph):
+        """Creates a BPMN diagram in XML from a process graph"""
+        self.begin(graph)
+        self.finish()
+
+    # ==== INCREMENTAL CONSTRUCTION ====
+    def begin(self, graph: ProcessGraph):
+        """
+        Start the diagram of a graph that is still growing (e.g. parsed from
+        a streamed answer): add_node / add_flow append to the graph and the
+        XML tree right away, finish lays the diagram out.
+        """
+        self._graph = graph
         self._create_definitions()
-        self._handle_collaboration(data)
-        proc_id = self._handle_process(data)
-        self._handle_layout(data, proc_id)
+        self._handle_collaboration(graph)
+        self._handle_process(graph)
+
+    def add_node(self, node_id: str, node_type: str, name: str | None = None):
+        self._current_graph().add_node(node_id, node_type, name)
+        self.builder.add_nodes([(node_type, node_id, name)])
+
+    def add_flow(self, flow_id: str, source: str, target: str, name: str | None = None):
+        self._current_graph().add_flow(flow_id, source, target, name)
+        self.builder.add_flows([(flow_id, source, target, name)])
+
+    def finish(self):
+        self._handle_layout(self._current_graph())
+
+    def _current_graph(self) -> ProcessGraph:
+        if self._graph is None:
+            raise ValueError("Begin a diagram before adding to it")
+        return self._graph
 
     def _create_definitions(self):
         self.builder.create_definitions(def_id="Definitions_1")
 
-    def _handle_collaboration(self, data: Dict[str, Any]):
-        if collab_data := data.get("collaboration"):
-            collab_node = self.builder.add_collaboration(collab_data["id"])
-            for p in collab_data.get("participants", []):
-                self.builder.add_participant(
-                    collab_node, p["id"], p.get("name"), p["processRef"]
-                )
-
-    def _handle_process(self, data: Dict[str, Any]) -> str:
-        if proc_data := data.get("process"):
-            self.builder.start_process(proc_data["id"], proc_data.get("name"))
-            for node in proc_data.get("nodes", []):
-                self.builder.add_node(
-                    node_type=node["type"],
-                    node_id=node["id"],
-                    name=node.get("name"),
-                )
-            flows = data.get("flow", {}).get("flows", [])
-            for flow in flows:
-                self.builder.add_flow(
-                    flow_id=flow["id"],
-                    source=flow["sourceRef"],
-                    target=flow["targetRef"],
-                    name=flow.get("name"),
-                )
-            return proc_data["id"]
-        raise ValueError("Process data missing")
-
-    def _handle_layout(self, data: Dict[str, Any], proc_id: str):
-        if layout_data := data.get("layout"):
-            self.builder.init_diagram(proc_id)
-            for pos in layout_data.get("positions", []):
-                b = pos["bounds"]
-                self.builder.add_shape(
-                    element_id=pos["elementId"],
-                    x=b["x"],
-                    y=b["y"],
-                    w=b["width"],
-                    h=b["height"],
-                )
+    def _handle_collaboration(self, graph: ProcessGraph):
+        if graph.collaboration_id is not None:
+            collab_node = self.builder.add_collaboration(graph.collaboration_id)
+            for p in graph.participants:
+                self.builder.add_participant(collab_node, p.id, p.name, p.process_ref)
+
+    def _handle_process(self, graph: ProcessGraph):
+        self.builder.start_process(graph.id, graph.name)
+        self.builder.add_nodes((n.type, n.id, n.name) for n in graph.nodes)
+        self.builder.add_flows((f.id, f.source, f.target, f.name) for f in graph.flows)
+
+    def _handle_layout(self, graph: ProcessGraph):
+        if not graph.positions:
+            self._handle_auto_layout(graph)
+            return
+        self.builder.init_diagram(graph.id)
+        self.builder.add_shapes(
+            (element_id, *box) for element_id, box in graph.positions.items()
+        )
+        self._handle_edges(graph, graph.positions)
+
+    def _handle_auto_layout(self, graph: ProcessGraph):
+        """Compute shapes and edges when the data carries no layout"""
+        nodes, flows = graph.layout_input()
+        layout = LayeredLayout(nodes, flows)
+        bounds = layout.compute()
+
+        self.builder.init_diagram(graph.id)
+        self.builder.add_shapes((node.id, *bounds[node.id]) for node in graph.nodes)
+        self._handle_edges(graph, bounds, layout.bend_points, flows)
+
+    def _handle_edges(
+        self,
+        graph: ProcessGraph,
+        bounds: Dict[str, Any],
+        bend_points: Dict[str, Any] | None = None,
+        flows: List[Dict[str, Any]] | None = None,
+    ):
+        """Route every sequence flow between the placed shapes"""
+        gateways = [n.id for n in graph.nodes if n.type in GATEWAY_TYPES]
+        if flows is None:
+            flows = graph.layout_input()[1]
+        self.builder.add_edges(route_edges(bounds, flows, gateways, bend_points))
 
     def to_string(self) -> str:
         return self.builder.to_string()
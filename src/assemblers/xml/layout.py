@@ -0,0 +1,325 @@
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+Bounds = Tuple[float, float, float, float]
+
+# Shape sizes used by bpmn.io for the element types
+SHAPE_SIZES = {
+    "startEvent": (36, 36),
+    "endEvent": (36, 36),
+    "exclusiveGateway": (50, 50),
+    "parallelGateway": (50, 50),
+}
+DEFAULT_SIZE = (100, 80)
+GATEWAY_TYPES = {"exclusiveGateway", "parallelGateway"}
+
+ORIGIN_X, ORIGIN_Y = 150, 100
+# Horizontal gap between layers, wider next to gateways for branch labels
+LAYER_GAP, GATEWAY_LAYER_GAP = 50, 80
+# Vertical gap between nodes of a layer, wider between branches of a split
+NODE_GAP, BRANCH_GAP = 40, 60
+
+
+def shape_size(node_type: str) -> Tuple[float, float]:
+    return SHAPE_SIZES.get(node_type, DEFAULT_SIZE)
+
+
+class LayeredLayout:
+    """
+    Sugiyama-style layered layout of a process graph, left to right.
+
+    1. Cycle breaking: edges closing a cycle in DFS order are reversed.
+    2. Layering: longest path from the sources, long edges get dummy nodes.
+    3. Crossing reduction: barycenter sweeps down and up the layers,
+       the ordering with the fewest crossings is kept.
+    4. Coordinates: layers become columns, nodes are pulled to the mean
+       height of their predecessors without overlapping. Columns next to
+       gateways and branches of a split get wider gaps.
+
+    Nodes and flows use the BpmnDirector format
+    ({"id", "type"} and {"id", "sourceRef", "targetRef"}).
+    """
+
+    def __init__(
+        self,
+        nodes: List[Dict[str, Any]],
+        flows: List[Dict[str, Any]],
+        sweeps: int = 4,
+    ):
+        self.nodes = nodes
+        self.flows = flows
+        self.sweeps = sweeps
+
+        self.reversed_flows: set[str] = set()
+        # Where a long flow crosses the columns of its dummy nodes
+        # (left and right column edge per dummy), in flow direction
+        self.bend_points: Dict[str, List[Tuple[float, float]]] = {}
+        self.crossings = 0
+
+    def compute(self) -> Dict[str, Bounds]:
+        self._build_graph()
+        self._break_cycles()
+        self._assign_layers()
+        self._insert_dummies()
+        self._order_layers()
+        return self._assign_coordinates()
+
+    # ==== GRAPH ====
+    def _build_graph(self) -> None:
+        self._index = {node["id"]: i for i, node in enumerate(self.nodes)}
+        self._sizes = [shape_size(node["type"]) for node in self.nodes]
+        self._gateway = [node["type"] in GATEWAY_TYPES for node in self.nodes]
+        self._edges: List[Tuple[int, int, str]] = []
+        seen = set()
+        for flow in self.flows:
+            u = self._index.get(flow["sourceRef"])
+            v = self._index.get(flow["targetRef"])
+            if u is None or v is None or u == v or (u, v) in seen:
+                continue
+            seen.add((u, v))
+            self._edges.append((u, v, flow["id"]))
+
+    def _break_cycles(self) -> None:
+        """Iterative DFS from the sources, back edges are reversed"""
+        n = len(self.nodes)
+        out: List[List[int]] = [[] for _ in range(n)]
+        indegree = [0] * n
+        for i, (u, v, _) in enumerate(self._edges):
+            out[u].append(i)
+            indegree[v] += 1
+
+        state = [0] * n  # 0 new, 1 on stack, 2 done
+        roots = [i for i in range(n) if indegree[i] == 0] + list(range(n))
+        for root in roots:
+            if state[root]:
+                continue
+            state[root] = 1
+            stack = [(root, 0)]
+            while stack:
+                node, cursor = stack[-1]
+                if cursor == len(out[node]):
+                    state[node] = 2
+                    stack.pop()
+                    continue
+                stack[-1] = (node, cursor + 1)
+                u, v, flow_id = self._edges[out[node][cursor]]
+                if state[v] == 1:
+                    self.reversed_flows.add(flow_id)
+                elif state[v] == 0:
+                    state[v] = 1
+                    stack.append((v, 0))
+
+        self._dag = [
+            (v, u, flow_id) if flow_id in self.reversed_flows else (u, v, flow_id)
+            for u, v, flow_id in self._edges
+        ]
+
+    def _assign_layers(self) -> None:
+        """Longest path layering in topological (Kahn) order"""
+        n = len(self.nodes)
+        out: List[List[int]] = [[] for _ in range(n)]
+        indegree = [0] * n
+        for u, v, _ in self._dag:
+            out[u].append(v)
+            indegree[v] += 1
+
+        self._layer = [0] * n
+        queue = [i for i in range(n) if indegree[i] == 0]
+        for u in queue:
+            for v in out[u]:
+                self._layer[v] = max(self._layer[v], self._layer[u] + 1)
+                indegree[v] -= 1
+                if indegree[v] == 0:
+                    queue.append(v)
+
+    def _insert_dummies(self) -> None:
+        """Split edges spanning several layers into unit edges"""
+        layer = self._layer
+        self._chains: Dict[str, List[int]] = {}
+        self._unit_edges: List[Tuple[int, int]] = []
+        count = len(self.nodes)
+        for u, v, flow_id in self._dag:
+            chain = []
+            previous = u
+            for dummy_layer in range(layer[u] + 1, layer[v]):
+                layer.append(dummy_layer)
+                chain.append(count)
+                self._unit_edges.append((previous, count))
+                previous = count
+                count += 1
+            self._unit_edges.append((previous, v))
+            if chain:
+                self._chains[flow_id] = chain
+        self._vertex_count = count
+
+    # ==== ORDERING ====
+    def _order_layers(self) -> None:
+        layers: Dict[int, List[int]] = defaultdict(list)
+        for vertex in range(self._vertex_count):
+            layers[self._layer[vertex]].append(vertex)
+        self._layers = [layers[i] for i in range(len(layers))]
+
+        self._preds: List[List[int]] = [[] for _ in range(self._vertex_count)]
+        self._succs: List[List[int]] = [[] for _ in range(self._vertex_count)]
+        for u, v in self._unit_edges:
+            self._succs[u].append(v)
+            self._preds[v].append(u)
+
+        position = [0] * self._vertex_count
+        for layer in self._layers:
+            for i, vertex in enumerate(layer):
+                position[vertex] = i
+
+        best = [list(layer) for layer in self._layers]
+        best_crossings = self._count_crossings(position)
+        for sweep in range(self.sweeps):
+            if best_crossings == 0:
+                break
+            downward = sweep % 2 == 0
+            indices = range(1, len(self._layers))
+            if not downward:
+                indices = range(len(self._layers) - 2, -1, -1)
+            neighbours = self._preds if downward else self._succs
+            for i in indices:
+                self._reorder(self._layers[i], neighbours, position)
+            crossings = self._count_crossings(position)
+            if crossings < best_crossings:
+                best_crossings = crossings
+                best = [list(layer) for layer in self._layers]
+
+        self._layers = best
+        for layer in self._layers:
+            for i, vertex in enumerate(layer):
+                position[vertex] = i
+        self._position = position
+        self.crossings = best_crossings
+
+    @staticmethod
+    def _reorder(
+        layer: List[int], neighbours: List[List[int]], position: List[int]
+    ) -> None:
+        """Sort the layer by barycenter, vertices without neighbours stay put"""
+
+        def barycenter(vertex: int) -> float:
+            adjacent = neighbours[vertex]
+            if not adjacent:
+                return position[vertex]
+            return sum(position[a] for a in adjacent) / len(adjacent)
+
+        layer.sort(key=barycenter)
+        for i, vertex in enumerate(layer):
+            position[vertex] = i
+
+    def _count_crossings(self, position: List[int]) -> int:
+        """Crossings between adjacent layers, counted as inversions (Fenwick tree)"""
+        by_layer: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+        for u, v in self._unit_edges:
+            by_layer[self._layer[u]].append((position[u], position[v]))
+
+        total = 0
+        for layer, edges in by_layer.items():
+            size = len(self._layers[layer + 1]) + 1
+            tree = [0] * (size + 1)
+            edges.sort()
+            seen = 0
+            for _, target in edges:
+                # Edges already seen that end below this target cross it
+                i, not_below = target + 1, 0
+                while i > 0:
+                    not_below += tree[i]
+                    i -= i & -i
+                total += seen - not_below
+                seen += 1
+                i = target + 1
+                while i <= size:
+                    tree[i] += 1
+                    i += i & -i
+        return total
+
+    # ==== COORDINATES ====
+    def _assign_coordinates(self) -> Dict[str, Bounds]:
+        n = len(self.nodes)
+
+        def size(vertex: int) -> Tuple[float, float]:
+            return self._sizes[vertex] if vertex < n else (0, 0)
+
+        def is_gateway(vertex: int) -> bool:
+            return vertex < n and self._gateway[vertex]
+
+        # Columns
+        column_x, x = [], 0.0
+        column_width = []
+        for i, layer in enumerate(self._layers):
+            width = max((size(v)[0] for v in layer), default=0)
+            column_x.append(x)
+            column_width.append(width)
+            gateway_near = any(is_gateway(v) for v in layer) or (
+                i + 1 < len(self._layers)
+                and any(is_gateway(v) for v in self._layers[i + 1])
+            )
+            x += width + (GATEWAY_LAYER_GAP if gateway_near else LAYER_GAP)
+
+        # Rows: pull towards predecessors, keep order and gaps
+        center_y = [0.0] * self._vertex_count
+        for layer in self._layers:
+            previous = None
+            for vertex in layer:
+                preds = self._preds[vertex]
+                desired = sum(center_y[p] for p in preds) / len(preds) if preds else 0.0
+                if previous is not None:
+                    gap = NODE_GAP
+                    if self._share_split(previous, vertex):
+                        gap = BRANCH_GAP
+                    lowest = (
+                        center_y[previous]
+                        + size(previous)[1] / 2
+                        + gap
+                        + size(vertex)[1] / 2
+                    )
+                    desired = max(desired, lowest)
+                center_y[vertex] = desired
+                previous = vertex
+
+        top = min(
+            (center_y[v] - size(v)[1] / 2 for v in range(self._vertex_count)),
+            default=0.0,
+        )
+        offset_y = ORIGIN_Y - top
+
+        bounds: Dict[str, Bounds] = {}
+        for vertex, node in enumerate(self.nodes):
+            w, h = self._sizes[vertex]
+            column = self._layer[vertex]
+            bounds[node["id"]] = (
+                ORIGIN_X + column_x[column] + (column_width[column] - w) / 2,
+                center_y[vertex] + offset_y - h / 2,
+                w,
+                h,
+            )
+
+        for flow_id, chain in self._chains.items():
+            points = []
+            for d in chain:
+                left = ORIGIN_X + column_x[self._layer[d]]
+                y = center_y[d] + offset_y
+                points.extend([(left, y), (left + column_width[self._layer[d]], y)])
+            if flow_id in self.reversed_flows:
+                points.reverse()
+            self.bend_points[flow_id] = points
+        return bounds
+
+    def _share_split(self, a: int, b: int) -> bool:
+        """Both vertices leave the same gateway (neighbouring branches)"""
+        return any(
+            self._is_gateway_vertex(p) and p in self._preds[b] for p in self._preds[a]
+        )
+
+    def _is_gateway_vertex(self, vertex: int) -> bool:
+        return vertex < len(self.nodes) and self._gateway[vertex]
+
+
+def layout_process(
+    nodes: List[Dict[str, Any]], flows: List[Dict[str, Any]]
+) -> Dict[str, Bounds]:
+    """Bounds of every node, computed by ``LayeredLayout``"""
+    return LayeredLayout(nodes, flows).compute()
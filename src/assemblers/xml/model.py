@@ -0,0 +1,273 @@
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from lxml import etree
+
+from .validation import NAMESPACES, BpmnIssue, flow_nodes
+
+Bounds = Tuple[float, float, float, float]
+
+
+class ModelError(ValueError):
+    """The data cannot be turned into a process graph"""
+
+
+class Node:
+    """Flow node of a process, flows are kept as adjacency lists"""
+
+    __slots__ = ("id", "type", "name", "incoming", "outgoing")
+
+    def __init__(self, node_id: str, node_type: str, name: Optional[str] = None):
+        self.id = node_id
+        self.type = node_type
+        self.name = name
+        self.incoming: List["Flow"] = []
+        self.outgoing: List["Flow"] = []
+
+    def __repr__(self) -> str:
+        return f"Node({self.id!r}, {self.type!r})"
+
+
+class Flow:
+    """Sequence flow, source and target are node ids (resolved or not)"""
+
+    __slots__ = ("id", "source", "target", "name")
+
+    def __init__(
+        self, flow_id: str, source: str, target: str, name: Optional[str] = None
+    ):
+        self.id = flow_id
+        self.source = source
+        self.target = target
+        self.name = name
+
+    def __repr__(self) -> str:
+        return f"Flow({self.id!r}, {self.source!r} -> {self.target!r})"
+
+
+class Participant:
+    __slots__ = ("id", "name", "process_ref")
+
+    def __init__(self, participant_id: str, name: Optional[str], process_ref: str):
+        self.id = participant_id
+        self.name = name
+        self.process_ref = process_ref
+
+
+class ProcessGraph:
+    """
+    Typed in-memory BPMN process: nodes and flows in insertion order, an
+    id -> element index and incoming/outgoing adjacency on the nodes.
+    BpmnDirector builds the XML from it.
+
+    Flows may reference ids that are no node (e.g. a typo in an LLM
+    answer), they are kept and reported by ``validate``. Every check runs
+    in O(V + E).
+    """
+
+    __slots__ = (
+        "id",
+        "name",
+        "nodes",
+        "flows",
+        "collaboration_id",
+        "participants",
+        "positions",
+        "_index",
+    )
+
+    def __init__(self, process_id: str, name: Optional[str] = None):
+        self.id = process_id
+        self.name = name
+        self.nodes: List[Node] = []
+        self.flows: List[Flow] = []
+        self.collaboration_id: Optional[str] = None
+        self.participants: List[Participant] = []
+        # Shape bounds given with the data, None lets the director lay it out
+        self.positions: Optional[Dict[str, Bounds]] = None
+        self._index: Dict[str, Node | Flow] = {}
+
+    # ==== BUILDING ====
+    def add_node(
+        self, node_id: str, node_type: str, name: Optional[str] = None
+    ) -> Node:
+        if node_id in self._index:
+            raise ModelError(f"Duplicate id '{node_id}'")
+        node = self._index[node_id] = Node(node_id, node_type, name)
+        self.nodes.append(node)
+        return node
+
+    def add_flow(
+        self, flow_id: str, source: str, target: str, name: Optional[str] = None
+    ) -> Flow:
+        if flow_id in self._index:
+            raise ModelError(f"Duplicate id '{flow_id}'")
+        flow = self._index[flow_id] = Flow(flow_id, source, target, name)
+        self.flows.append(flow)
+        if isinstance(source_node := self._index.get(source), Node):
+            source_node.outgoing.append(flow)
+        if isinstance(target_node := self._index.get(target), Node):
+            target_node.incoming.append(flow)
+        return flow
+
+    def get(self, element_id: str) -> Optional[Node | Flow]:
+        return self._index.get(element_id)
+
+    def node(self, node_id: str) -> Optional[Node]:
+        element = self._index.get(node_id)
+        return element if isinstance(element, Node) else None
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    @classmethod
+    def from_director_data(cls, data: Dict[str, Any]) -> "ProcessGraph":
+        """
+        Build the graph from the BpmnDirector dictionary
+        (``BpmnJsonAssembler.get_data_for_director``). Missing keys raise
+        ModelError naming the element, before anything is built.
+        """
+        process = data.get("process")
+        if not process:
+            raise ValueError("Process data missing")
+        graph = cls(_required(process, "id", "process"), process.get("name"))
+
+        if collaboration := data.get("collaboration"):
+            graph.collaboration_id = _required(collaboration, "id", "collaboration")
+            for i, p in enumerate(collaboration.get("participants", [])):
+                graph.participants.append(
+                    Participant(
+                        _required(p, "id", f"participant #{i}"),
+                        p.get("name"),
+                        _required(p, "processRef", f"participant #{i}"),
+                    )
+                )
+
+        for i, node in enumerate(process.get("nodes", [])):
+            where = f"node #{i}"
+            graph.add_node(
+                _required(node, "id", where),
+                _required(node, "type", where),
+                node.get("name"),
+            )
+        for i, flow in enumerate((data.get("flow") or {}).get("flows", [])):
+            where = f"flow #{i}"
+            graph.add_flow(
+                _required(flow, "id", where),
+                _required(flow, "sourceRef", where),
+                _required(flow, "targetRef", where),
+                flow.get("name"),
+            )
+
+        if layout := data.get("layout"):
+            graph.positions = {}
+            for i, pos in enumerate(layout.get("positions", [])):
+                b = _required(pos, "bounds", f"position #{i}")
+                graph.positions[_required(pos, "elementId", f"position #{i}")] = (
+                    b["x"],
+                    b["y"],
+                    b["width"],
+                    b["height"],
+                )
+        return graph
+
+    @classmethod
+    def from_process(cls, process: etree.Element) -> "ProcessGraph":
+        """Build the graph from a parsed bpmn:process, other elements are skipped"""
+        graph = cls(process.get("id") or "Process_1", process.get("name"))
+        for node in flow_nodes(process):
+            if node.get("id") and node.get("id") not in graph._index:
+                graph.add_node(
+                    node.get("id"), etree.QName(node).localname, node.get("name")
+                )
+        for flow in process.iterfind("bpmn:sequenceFlow", NAMESPACES):
+            if flow.get("id") and flow.get("id") not in graph._index:
+                graph.add_flow(
+                    flow.get("id"),
+                    flow.get("sourceRef"),
+                    flow.get("targetRef"),
+                    flow.get("name"),
+                )
+        return graph
+
+    def layout_input(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Nodes and flows in the format LayeredLayout and route_edges take"""
+        nodes = [{"id": n.id, "type": n.type} for n in self.nodes]
+        flows = [
+            {"id": f.id, "sourceRef": f.source, "targetRef": f.target}
+            for f in self.flows
+        ]
+        return nodes, flows
+
+    # ==== INTEGRITY ====
+    def validate(self) -> List[BpmnIssue]:
+        """
+        Dangling flows, missing start/end events, orphan nodes (no flows),
+        nodes unreachable from a start and nodes that reach no end.
+        """
+        issues: List[BpmnIssue] = []
+        for flow in self.flows:
+            for attr in ("source", "target"):
+                ref = getattr(flow, attr)
+                if not isinstance(self._index.get(ref), Node):
+                    issues.append(
+                        BpmnIssue(
+                            "dangling_flow",
+                            f"Flow {flow.id} {attr} {ref} is no node",
+                            flow.id,
+                        )
+                    )
+
+        starts = [n for n in self.nodes if n.type == "startEvent"]
+        ends = [n for n in self.nodes if n.type == "endEvent"]
+        if not starts:
+            issues.append(
+                BpmnIssue("no_start_event", f"Process {self.id} has no start", self.id)
+            )
+        if not ends:
+            issues.append(
+                BpmnIssue("no_end_event", f"Process {self.id} has no end", self.id)
+            )
+
+        orphans = {n.id for n in self.nodes if not n.incoming and not n.outgoing}
+        reached = self.reachable(starts) if starts else set()
+        reaching = self.reachable(ends, forward=False) if ends else set()
+        for node in self.nodes:
+            if node.id in orphans:
+                issues.append(
+                    BpmnIssue("orphan", f"Node {node.id} has no flows", node.id)
+                )
+                continue
+            if starts and node.id not in reached:
+                issues.append(
+                    BpmnIssue(
+                        "unreachable", f"Node {node.id} is not reachable", node.id
+                    )
+                )
+            if ends and node.id not in reaching:
+                issues.append(
+                    BpmnIssue("dead_end", f"Node {node.id} reaches no end", node.id)
+                )
+        return issues
+
+    def reachable(self, sources: Iterable[Node], forward: bool = True) -> set[str]:
+        """Ids of the nodes reachable from sources (or reaching them backwards)"""
+        seen = {node.id for node in sources}
+        queue = deque(sources)
+        while queue:
+            node = queue.popleft()
+            for flow in node.outgoing if forward else node.incoming:
+                next_node = self._index.get(flow.target if forward else flow.source)
+                if isinstance(next_node, Node) and next_node.id not in seen:
+                    seen.add(next_node.id)
+                    queue.append(next_node)
+        return seen
+
+
+def _required(data: Dict[str, Any], key: str, where: str) -> Any:
+    try:
+        return data[key]
+    except KeyError:
+        raise ModelError(f"{where.capitalize()} has no '{key}'") from None
+    except TypeError:
+        raise ModelError(f"{where.capitalize()} must be an object") from None
@@ -0,0 +1,303 @@
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from lxml import etree
+
+from .bpmn import BpmnBuilder
+from .layout import GATEWAY_TYPES, LAYER_GAP, NODE_GAP, shape_size
+from .routing import EdgeRouter, SpatialIndex
+from .validation import NAMESPACES, repair_bpmn, shape_bounds
+from src.assemblers.json.ir import NODE_TYPES
+
+logger = logging.getLogger(__name__)
+
+PATCH_OPERATIONS = (
+    "add_node",
+    "remove_node",
+    "rename_node",
+    "add_flow",
+    "remove_flow",
+    "reconnect_flow",
+)
+_NCNAME_RE = re.compile(r"^[A-Za-z_][\w.\-]*$")
+_FLOW_ID_RE = re.compile(r"^Flow_(\d+)$")
+
+
+class PatchError(ValueError):
+    """The patch cannot be applied to the diagram"""
+
+
+class DiagramPatcher:
+    """
+    Apply small edit operations to an existing BPMN document.
+
+    Elements are found through the BpmnBuilder id index and a node -> flows
+    adjacency, so an operation touches only the elements it names. Only new
+    nodes are placed (next to a connected node) and only added or
+    reconnected flows are routed, the rest of the layout stays as it was.
+
+    Operations (dicts, unused fields may be empty):
+    - add_node: id, type, name
+    - remove_node: id, its flows are removed, a node with one incoming and
+      one outgoing flow is bridged (the incoming flow takes over the target)
+    - rename_node: id, name
+    - add_flow: from, to, name (id is generated when empty)
+    - remove_flow: id, or from and to
+    - reconnect_flow: id, new from and/or to
+    """
+
+    def __init__(self, xml: str):
+        try:
+            root = etree.fromstring(xml.strip().encode("utf-8"))
+        except etree.XMLSyntaxError as e:
+            raise PatchError(f"Diagram is not valid XML: {e}") from e
+        self.builder = BpmnBuilder.from_root(root)
+        if self.builder._current_process is None:
+            raise PatchError("Diagram has no process")
+
+        self._flows_of: Dict[str, set[str]] = {}
+        for element in self.builder._current_process:
+            if isinstance(element.tag, str) and element.get("id"):
+                if etree.QName(element).localname == "sequenceFlow":
+                    self._link(element)
+                else:
+                    self._flows_of.setdefault(element.get("id"), set())
+        self._new_nodes: List[str] = []
+        self._changed_flows: set[str] = set()
+
+    # ==== PROMPT ====
+    def outline(self) -> str:
+        """Compact listing of nodes and flows for the edit prompt"""
+        nodes, flows = [], []
+        for element in self.builder._current_process:
+            if not isinstance(element.tag, str) or not element.get("id"):
+                continue
+            kind = etree.QName(element).localname
+            name = element.get("name") or ""
+            if kind == "sequenceFlow":
+                flows.append(
+                    f"{element.get('id')}: {element.get('sourceRef')} -> "
+                    f'{element.get("targetRef")} "{name}"'
+                )
+            else:
+                nodes.append(f'{element.get("id")} {kind} "{name}"')
+        return "Nodes:\n" + "\n".join(nodes) + "\nFlows:\n" + "\n".join(flows)
+
+    # ==== OPERATIONS ====
+    def apply(self, operations: List[Dict[str, Any]]) -> "DiagramPatcher":
+        for operation in operations:
+            op = operation.get("op") if isinstance(operation, dict) else None
+            if op not in PATCH_OPERATIONS:
+                raise PatchError(f"Unknown operation '{op}'")
+            getattr(self, f"_{op}")(operation)
+        self._place_new_nodes()
+        self._route_changed_flows()
+        return self
+
+    def _add_node(self, operation: dict) -> None:
+        node_id, node_type = operation.get("id") or "", operation.get("type")
+        if not _NCNAME_RE.match(node_id):
+            raise PatchError(f"Invalid node id '{node_id}'")
+        if self.builder.get_element(node_id) is not None:
+            raise PatchError(f"Node '{node_id}' already exists")
+        if node_type not in NODE_TYPES:
+            raise PatchError(f"Unknown node type '{node_type}'")
+        self.builder.add_node(node_type, node_id, operation.get("name") or "")
+        self._flows_of[node_id] = set()
+        self._new_nodes.append(node_id)
+
+    def _remove_node(self, operation: dict) -> None:
+        node_id = self._node(operation.get("id"))
+        flows = [self.builder.get_element(f) for f in self._flows_of[node_id]]
+        incoming = [f for f in flows if f.get("targetRef") == node_id]
+        outgoing = [f for f in flows if f.get("sourceRef") == node_id]
+        if len(incoming) == 1 and len(outgoing) == 1:
+            target = outgoing[0].get("targetRef")
+            self._remove_flow({"id": outgoing[0].get("id")})
+            self._reconnect_flow({"id": incoming[0].get("id"), "to": target})
+        for flow_id in list(self._flows_of[node_id]):
+            self._remove_flow({"id": flow_id})
+        self.builder.remove_element(node_id)
+        del self._flows_of[node_id]
+        if node_id in self._new_nodes:
+            self._new_nodes.remove(node_id)
+
+    def _rename_node(self, operation: dict) -> None:
+        node = self.builder.get_element(self._node(operation.get("id")))
+        node.set("name", operation.get("name") or "")
+
+    def _add_flow(self, operation: dict) -> None:
+        source = self._node(operation.get("from"))
+        target = self._node(operation.get("to"))
+        flow_id = operation.get("id") or ""
+        if not _NCNAME_RE.match(flow_id) or self.builder.get_element(flow_id):
+            flow_id = self._new_flow_id()
+        self.builder.add_flow(flow_id, source, target, operation.get("name") or None)
+        flow = self.builder.get_element(flow_id)
+        self._link(flow)
+        self._add_ref(self.builder.get_element(source), "outgoing", flow_id)
+        self._add_ref(self.builder.get_element(target), "incoming", flow_id)
+        self._changed_flows.add(flow_id)
+
+    def _remove_flow(self, operation: dict) -> None:
+        flow = self._flow(operation)
+        flow_id = flow.get("id")
+        for attr, kind in (("sourceRef", "outgoing"), ("targetRef", "incoming")):
+            self._flows_of.get(flow.get(attr), set()).discard(flow_id)
+            if (node := self.builder.get_element(flow.get(attr))) is not None:
+                self._remove_ref(node, kind, flow_id)
+        self.builder.remove_element(flow_id)
+        self._changed_flows.discard(flow_id)
+
+    def _reconnect_flow(self, operation: dict) -> None:
+        flow = self._flow({"id": operation.get("id")})
+        flow_id = flow.get("id")
+        for key, attr, kind in (
+            ("from", "sourceRef", "outgoing"),
+            ("to", "targetRef", "incoming"),
+        ):
+            if not operation.get(key):
+                continue
+            new_node = self._node(operation[key])
+            old_node = flow.get(attr)
+            self._flows_of[old_node].discard(flow_id)
+            self._remove_ref(self.builder.get_element(old_node), kind, flow_id)
+            flow.set(attr, new_node)
+            self._flows_of[new_node].add(flow_id)
+            self._add_ref(self.builder.get_element(new_node), kind, flow_id)
+        self._changed_flows.add(flow_id)
+
+    # ==== INDEX ====
+    def _node(self, node_id: Optional[str]) -> str:
+        if node_id not in self._flows_of:
+            raise PatchError(f"Node '{node_id}' does not exist")
+        return node_id
+
+    def _flow(self, operation: dict) -> etree.Element:
+        if flow_id := operation.get("id"):
+            flow = self.builder.get_element(flow_id)
+            if flow is None or etree.QName(flow).localname != "sequenceFlow":
+                raise PatchError(f"Flow '{flow_id}' does not exist")
+            return flow
+        source = self._node(operation.get("from"))
+        for candidate in self._flows_of[source]:
+            flow = self.builder.get_element(candidate)
+            if flow.get("sourceRef") == source and flow.get(
+                "targetRef"
+            ) == operation.get("to"):
+                return flow
+        raise PatchError(f"No flow {source} -> {operation.get('to')}")
+
+    def _link(self, flow: etree.Element) -> None:
+        for attr in ("sourceRef", "targetRef"):
+            self._flows_of.setdefault(flow.get(attr), set()).add(flow.get("id"))
+
+    def _new_flow_id(self) -> str:
+        """Flow_N numbered after the highest Flow_N id of the document"""
+        numbers = [
+            int(match.group(1))
+            for element_id in self.builder._elements
+            if (match := _FLOW_ID_RE.match(element_id))
+        ]
+        return f"Flow_{max(numbers, default=0) + 1}"
+
+    def _add_ref(self, node: etree.Element, kind: str, flow_id: str) -> None:
+        """incoming/outgoing child, incoming ones stay before outgoing ones"""
+        ref = etree.Element(f"{{{NAMESPACES['bpmn']}}}{kind}")
+        ref.text = flow_id
+        outgoing = node.find("bpmn:outgoing", NAMESPACES)
+        if kind == "incoming" and outgoing is not None:
+            outgoing.addprevious(ref)
+        else:
+            node.append(ref)
+
+    @staticmethod
+    def _remove_ref(node: etree.Element, kind: str, flow_id: str) -> None:
+        for ref in node.findall(f"bpmn:{kind}", NAMESPACES):
+            if (ref.text or "").strip() == flow_id:
+                node.remove(ref)
+
+    # ==== DIAGRAM ====
+    def _bounds(self) -> Dict[str, tuple]:
+        bounds = {}
+        for node_id in self._flows_of:
+            di = self.builder.get_di(node_id)
+            if di is not None and (box := shape_bounds(di)):
+                bounds[node_id] = box
+        return bounds
+
+    def _place_new_nodes(self) -> None:
+        """Right of a predecessor (or left of a successor), below if occupied"""
+        if not self._new_nodes:
+            return
+        if self.builder._current_plane is None:
+            raise PatchError("Diagram has no BPMNPlane")
+        bounds = self._bounds()
+        for node_id in self._new_nodes:
+            element = self.builder.get_element(node_id)
+            w, h = shape_size(etree.QName(element).localname)
+            x, y = self._anchor(node_id, bounds, w, h)
+            index = SpatialIndex(bounds)
+            while index.query(
+                x - NODE_GAP / 2, y - NODE_GAP / 2, w + NODE_GAP, h + NODE_GAP
+            ):
+                y += h + NODE_GAP
+            bounds[node_id] = (x, y, w, h)
+            try:
+                self.builder.add_shape(node_id, x, y, w, h)
+            except ValueError as e:
+                raise PatchError(f"Node '{node_id}' cannot be placed: {e}") from e
+
+    def _anchor(self, node_id: str, bounds: Dict[str, tuple], w: float, h: float):
+        flows = [self.builder.get_element(f) for f in sorted(self._flows_of[node_id])]
+        for flow in flows:
+            if flow.get("targetRef") == node_id and flow.get("sourceRef") in bounds:
+                sx, sy, sw, sh = bounds[flow.get("sourceRef")]
+                return sx + sw + LAYER_GAP, sy + sh / 2 - h / 2
+        for flow in flows:
+            if flow.get("sourceRef") == node_id and flow.get("targetRef") in bounds:
+                tx, ty, _, th = bounds[flow.get("targetRef")]
+                return tx - LAYER_GAP - w, ty + th / 2 - h / 2
+        if not bounds:
+            return 150, 100
+        bottom = max(y + bh for _, y, _, bh in bounds.values())
+        return min(x for x, _, _, _ in bounds.values()), bottom + NODE_GAP * 2
+
+    def _route_changed_flows(self) -> None:
+        flow_ids = set(self._changed_flows)
+        for node_id in self._new_nodes:
+            flow_ids |= self._flows_of[node_id]
+        if not flow_ids:
+            return
+        if self.builder._current_plane is None:
+            raise PatchError("Diagram has no BPMNPlane")
+        bounds = self._bounds()
+        gateways = [
+            node_id
+            for node_id in bounds
+            if etree.QName(self.builder.get_element(node_id)).localname in GATEWAY_TYPES
+        ]
+        router = EdgeRouter(bounds, gateways)
+        for flow_id in sorted(flow_ids):
+            flow = self.builder.get_element(flow_id)
+            source, target = flow.get("sourceRef"), flow.get("targetRef")
+            self.builder.remove_di(flow_id)
+            if source not in bounds or target not in bounds:
+                continue
+            try:
+                self.builder.add_edge(flow_id, router.route(source, target))
+            except (KeyError, ValueError) as e:
+                raise PatchError(f"Flow '{flow_id}' cannot be routed: {e}") from e
+
+    def to_string(self) -> str:
+        """The patched document, rejected if the edit left it invalid"""
+        etree.indent(self.builder.root, space="  ")
+        xml = self.builder.to_string()
+        result = repair_bpmn(xml)
+        if not result.valid:
+            raise PatchError(
+                "Edit leaves an invalid diagram: "
+                + "; ".join(str(issue) for issue in result.issues)
+            )
+        return result.xml
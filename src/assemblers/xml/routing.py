@@ -0,0 +1,278 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .layout import Bounds
+
+Point = Tuple[float, float]
+
+# Distance kept between routed segments and unrelated shapes
+MARGIN = 10
+# Offsets tried when the middle of the gap between two shapes is blocked
+_JOG_OFFSETS = (0.5, 0.25, 0.75, 0.1, 0.9)
+
+
+class SpatialIndex:
+    """
+    Uniform grid over shape bounds.
+
+    Every shape is registered in the cells it covers, so a query only looks
+    at shapes near the queried rectangle instead of the whole diagram.
+    """
+
+    def __init__(self, bounds: Dict[str, Bounds], cell_size: float = 200):
+        self.bounds = bounds
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], List[str]] = defaultdict(list)
+        for element_id, box in bounds.items():
+            for cell in self._cells_of(*box):
+                self._cells[cell].append(element_id)
+
+    def _cells_of(self, x: float, y: float, w: float, h: float):
+        size = self.cell_size
+        for cx in range(int(x // size), int((x + w) // size) + 1):
+            for cy in range(int(y // size), int((y + h) // size) + 1):
+                yield cx, cy
+
+    def query(self, x: float, y: float, w: float, h: float) -> set[str]:
+        """Ids of the shapes intersecting the rectangle"""
+        found = set()
+        for cell in self._cells_of(x, y, w, h):
+            for element_id in self._cells.get(cell, ()):
+                bx, by, bw, bh = self.bounds[element_id]
+                if bx < x + w and x < bx + bw and by < y + h and y < by + bh:
+                    found.add(element_id)
+        return found
+
+
+class EdgeRouter:
+    """
+    Orthogonal waypoints for sequence flows between laid out shapes.
+
+    Forward flows leave the right side of the source and enter the left side
+    of the target, with one vertical jog in the gap between them. Gateways
+    send branches out of their top or bottom. Flows going back (loops) run
+    around the shapes below or above. Every candidate route is checked
+    against the SpatialIndex, the first one not crossing another shape wins.
+    Shapes that touch or overlap have coinciding ports, their flow goes
+    around both shapes so a route always has two distinct points.
+    """
+
+    def __init__(self, bounds: Dict[str, Bounds], gateways: Iterable[str] = ()):
+        self.bounds = bounds
+        self.gateways = set(gateways)
+        self.index = SpatialIndex(bounds)
+
+    def route(
+        self, source_id: str, target_id: str, via: Sequence[Point] = ()
+    ) -> List[Point]:
+        """
+        Waypoints from the source shape to the target shape.
+
+        `via` are bend points to pass in order, like LayeredLayout.bend_points,
+        the path jogs vertically halfway between consecutive points.
+        """
+        source, target = self.bounds[source_id], self.bounds[target_id]
+        ignore = {source_id, target_id}
+        if source_id == target_id:
+            path = self._route_self(source)
+        elif via:
+            path = self._route_via(source, target, via)
+        elif target[0] >= source[0] + source[2]:
+            path = self._route_forward(source_id, source, target, ignore)
+        else:
+            path = self._route_back(source, target, ignore)
+        path = _simplify(path)
+        if len(path) < 2:
+            path = _simplify(self._route_around(source, target))
+        return path
+
+    # ==== ROUTES ====
+    def _route_forward(
+        self, source_id: str, source: Bounds, target: Bounds, ignore: set[str]
+    ) -> List[Point]:
+        start, end = _right(source), _left(target)
+        if start[1] == end[1] and self._is_free([start, end], ignore):
+            return [start, end]
+
+        if source_id in self.gateways:
+            # Branch leaves the gateway towards the target row
+            exit_point = _bottom(source) if end[1] > start[1] else _top(source)
+            path = [exit_point, (exit_point[0], end[1]), end]
+            if self._is_free(path, ignore):
+                return path
+
+        gap = end[0] - start[0]
+        for offset in _JOG_OFFSETS:
+            x = start[0] + gap * offset
+            path = [start, (x, start[1]), (x, end[1]), end]
+            if self._is_free(path, ignore):
+                return path
+        return self._detour(start, end, ignore)
+
+    def _route_back(
+        self, source: Bounds, target: Bounds, ignore: set[str]
+    ) -> List[Point]:
+        """Loop around below both shapes, or above if that is shorter"""
+        left = min(source[0], target[0])
+        right = max(source[0] + source[2], target[0] + target[2])
+        below = self._free_row(
+            left, right, max(source[1] + source[3], target[1] + target[3]), 1
+        )
+        above = self._free_row(left, right, min(source[1], target[1]), -1)
+
+        candidates = []
+        for y, side in ((below, _bottom), (above, _top)):
+            start, end = side(source), side(target)
+            candidates.append([start, (start[0], y), (end[0], y), end])
+            # Through the gaps beside the shapes when the column is occupied
+            start, end = _right(source), _left(target)
+            x1 = self._column_edge(source, start[1], y, 1) + MARGIN * 2
+            x2 = self._column_edge(target, end[1], y, -1) - MARGIN * 2
+            candidates.append(
+                [start, (x1, start[1]), (x1, y), (x2, y), (x2, end[1]), end]
+            )
+        candidates.sort(key=_length)
+        for path in candidates:
+            if self._is_free(path, ignore):
+                return path
+        return candidates[0]
+
+    @staticmethod
+    def _route_self(box: Bounds) -> List[Point]:
+        """Loop from the right side over the shape into its top"""
+        start, end = _right(box), _top(box)
+        x, y = start[0] + MARGIN * 2, end[1] - MARGIN * 2
+        return [start, (x, start[1]), (x, y), (end[0], y), end]
+
+    @staticmethod
+    def _route_around(source: Bounds, target: Bounds) -> List[Point]:
+        """Over both shapes from top to top, or from the right side if they share a centre"""
+        y = min(source[1], target[1]) - MARGIN * 2
+        start, end = _top(source), _top(target)
+        if start[0] == end[0]:
+            start = _right(source)
+            x = max(source[0] + source[2], target[0] + target[2]) + MARGIN * 2
+            return [start, (x, start[1]), (x, y), (end[0], y), end]
+        return [start, (start[0], y), (end[0], y), end]
+
+    def _route_via(
+        self, source: Bounds, target: Bounds, via: Sequence[Point]
+    ) -> List[Point]:
+        """Through the given bend points, jogging halfway between them"""
+        forward = via[0][0] >= source[0] + source[2]
+        start = _right(source) if forward else _left(source)
+        end = _left(target) if forward else _right(target)
+        points = [start, *via, end]
+        path = [start]
+        for a, b in zip(points, points[1:]):
+            if a[1] != b[1]:
+                x = (a[0] + b[0]) / 2
+                path.extend([(x, a[1]), (x, b[1])])
+            path.append(b)
+        return path
+
+    def _detour(self, start: Point, end: Point, ignore: set[str]) -> List[Point]:
+        """Leave the row, cross over the obstacles and come back"""
+        left, right = start[0], end[0]
+        top = min(start[1], end[1])
+        bottom = max(start[1], end[1])
+        below = self._free_row(left, right, bottom, 1)
+        above = self._free_row(left, right, top, -1)
+        y = below if below - bottom <= top - above else above
+        first, last = start[0] + MARGIN, end[0] - MARGIN
+        return [start, (first, start[1]), (first, y), (last, y), (last, end[1]), end]
+
+    # ==== OBSTACLES ====
+    def _free_row(self, left: float, right: float, y: float, direction: int) -> float:
+        """First y beyond `y` (down for 1, up for -1) where a horizontal line is free"""
+        y += direction * MARGIN * 2
+        while True:
+            hits = self.index.query(left, y - MARGIN, right - left, MARGIN * 2)
+            if not hits:
+                return y
+            if direction > 0:
+                y = (
+                    max(self.bounds[i][1] + self.bounds[i][3] for i in hits)
+                    + MARGIN * 2
+                )
+            else:
+                y = min(self.bounds[i][1] for i in hits) - MARGIN * 2
+
+    def _column_edge(self, box: Bounds, y1: float, y2: float, side: int) -> float:
+        """Right (1) or left (-1) edge of the shapes under or over the box up to y2"""
+        top, bottom = min(y1, y2), max(y1, y2)
+        hits = self.index.query(box[0], top, box[2], bottom - top)
+        if side > 0:
+            return max(
+                [box[0] + box[2]]
+                + [self.bounds[i][0] + self.bounds[i][2] for i in hits]
+            )
+        return min([box[0]] + [self.bounds[i][0] for i in hits])
+
+    def _is_free(self, path: List[Point], ignore: set[str]) -> bool:
+        for (x1, y1), (x2, y2) in zip(path, path[1:]):
+            x, y = min(x1, x2) - MARGIN, min(y1, y2) - MARGIN
+            w, h = abs(x2 - x1) + MARGIN * 2, abs(y2 - y1) + MARGIN * 2
+            if self.index.query(x, y, w, h) - ignore:
+                return False
+        return True
+
+
+def _right(box: Bounds) -> Point:
+    return (box[0] + box[2], box[1] + box[3] / 2)
+
+
+def _left(box: Bounds) -> Point:
+    return (box[0], box[1] + box[3] / 2)
+
+
+def _top(box: Bounds) -> Point:
+    return (box[0] + box[2] / 2, box[1])
+
+
+def _bottom(box: Bounds) -> Point:
+    return (box[0] + box[2] / 2, box[1] + box[3])
+
+
+def _length(path: List[Point]) -> float:
+    return sum(
+        abs(x2 - x1) + abs(y2 - y1) for (x1, y1), (x2, y2) in zip(path, path[1:])
+    )
+
+
+def _simplify(path: List[Point]) -> List[Point]:
+    """Drop repeated points and points in the middle of a straight segment"""
+    result: List[Point] = []
+    for point in path:
+        if result and point == result[-1]:
+            continue
+        if len(result) >= 2:
+            (ax, ay), (bx, by) = result[-2], result[-1]
+            if (ax == bx == point[0]) or (ay == by == point[1]):
+                # A segment doubling back on itself can end where it started
+                if point == result[-2]:
+                    result.pop()
+                else:
+                    result[-1] = point
+                continue
+        result.append(point)
+    return result
+
+
+def route_edges(
+    bounds: Dict[str, Bounds],
+    flows: List[Dict],
+    gateways: Iterable[str] = (),
+    bend_points: Optional[Dict[str, List[Point]]] = None,
+) -> Dict[str, List[Point]]:
+    """Waypoints of every flow whose source and target have bounds"""
+    router = EdgeRouter(bounds, gateways)
+    bend_points = bend_points or {}
+    waypoints = {}
+    for flow in flows:
+        source, target = flow["sourceRef"], flow["targetRef"]
+        if source in bounds and target in bounds:
+            waypoints[flow["id"]] = router.route(
+                source, target, bend_points.get(flow["id"], ())
+            )
+    return waypoints
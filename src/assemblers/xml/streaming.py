@@ -0,0 +1,188 @@
+import asyncio
+import gzip
+import logging
+import zlib
+from contextlib import aclosing
+from typing import AsyncIterator
+
+import brotli
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+# Preferred first when the client accepts several with the same weight
+ENCODINGS = ("br", "gzip")
+
+
+class _Cancelled(Exception):
+    """The consumer stopped reading, serialization is aborted"""
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Best supported content coding of an Accept-Encoding header, None for identity"""
+    weights = {}
+    for item in (accept_encoding or "").lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        weight = 1.0
+        if params.strip().startswith("q="):
+            try:
+                weight = float(params.strip()[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip()] = weight
+    best, best_weight = None, 0.0
+    for coding in ENCODINGS:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def _compressor(encoding: str | None, level: int):
+    """(compress, flush, finish) functions of a content coding, None for identity"""
+    if encoding == "gzip":
+        gz = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return gz.compress, lambda: gz.flush(zlib.Z_SYNC_FLUSH), gz.flush
+    if encoding == "br":
+        br = brotli.Compressor(quality=level)
+        return br.process, br.flush, br.finish
+    if encoding is not None:
+        raise ValueError(f"Unsupported content coding '{encoding}'")
+    return None
+
+
+def compress(data: bytes, encoding: str | None, level: int = 6) -> bytes:
+    """Compress a whole body with a content coding, None for identity"""
+    if encoding == "gzip":
+        return gzip.compress(data, level)
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    if encoding is not None:
+        raise ValueError(f"Unsupported content coding '{encoding}'")
+    return data
+
+
+async def compress_stream(
+    chunks: AsyncIterator[bytes], encoding: str | None, level: int = 6
+) -> AsyncIterator[bytes]:
+    """
+    Compress a stream of frames (e.g. Server-Sent Events). Every frame is
+    flushed, the client decodes it as soon as it arrives.
+    """
+    compressor = _compressor(encoding, level)
+    async with aclosing(chunks):
+        async for chunk in chunks:
+            if compressor is None:
+                yield chunk
+            else:
+                yield compressor[0](chunk) + compressor[1]()
+    if compressor is not None:
+        yield compressor[2]()
+
+
+def parse_xml(text: str) -> etree.Element:
+    """Parse an XML document, raise ValueError if the text is not one"""
+    try:
+        parser = etree.XMLParser(remove_blank_text=True)
+        return etree.fromstring(text.strip().encode("utf-8"), parser)
+    except etree.XMLSyntaxError as e:
+        raise ValueError(f"Not an XML document: {e}") from e
+
+
+class _ChunkSink:
+    """
+    File-like target of lxml serialization running in a worker thread.
+    Collects the written bytes into chunks, compresses them and hands them
+    to the event loop through a bounded queue, so at most a few chunks
+    are held in memory at once.
+    """
+
+    def __init__(self, loop, queue: asyncio.Queue, compressor, chunk_size: int):
+        self._loop = loop
+        self._queue = queue
+        self._compressor = compressor
+        self._chunk_size = chunk_size
+        self._buffer = bytearray()
+        self.cancelled = False
+
+    def write(self, data: bytes) -> None:
+        if self.cancelled:
+            raise _Cancelled()
+        self._buffer += data
+        if len(self._buffer) >= self._chunk_size:
+            self._push(self._compress(bytes(self._buffer)))
+            self._buffer.clear()
+
+    def close(self) -> None:
+        data = self._compress(bytes(self._buffer))
+        if self._compressor is not None:
+            data += self._compressor[2]()
+        self._push(data)
+        self._buffer.clear()
+
+    def _compress(self, data: bytes) -> bytes:
+        return data if self._compressor is None else self._compressor[0](data)
+
+    def _push(self, item: bytes | None) -> None:
+        if item == b"":
+            return
+        asyncio.run_coroutine_threadsafe(self._queue.put(item), self._loop).result()
+
+
+def _serialize(source, sink: _ChunkSink, pretty_print: bool) -> None:
+    try:
+        if isinstance(source, str):
+            source = parse_xml(source)
+        etree.ElementTree(source).write(
+            sink, pretty_print=pretty_print, xml_declaration=True, encoding="utf-8"
+        )
+        sink.close()
+    finally:
+        if not sink.cancelled:
+            sink._push(None)
+
+
+async def stream_xml(
+    source: etree.Element | str,
+    encoding: str | None = None,
+    pretty_print: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+    level: int = 6,
+) -> AsyncIterator[bytes]:
+    """
+    Serialize an XML tree (or re-serialize an XML string) in chunks.
+
+    libxml2 writes the document straight into a chunking sink in a worker
+    thread, the event loop only passes the (compressed) chunks on. The
+    whole document never exists as one ``bytes`` or ``str`` object.
+
+    Args:
+        source: root element, or XML text that is parsed first (ValueError
+            if it is not a document, parse it with ``parse_xml`` before
+            starting a response)
+        encoding: 'gzip', 'br' or None for uncompressed output
+        pretty_print: indent the output, compact by default
+        chunk_size: bytes of XML collected before a chunk is compressed
+        level: gzip level (1-9) or brotli quality (0-11)
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=4)
+    sink = _ChunkSink(loop, queue, _compressor(encoding, level), chunk_size)
+    worker = asyncio.ensure_future(
+        asyncio.to_thread(_serialize, source, sink, pretty_print)
+    )
+    try:
+        while (chunk := await queue.get()) is not None:
+            yield chunk
+        await worker
+    finally:
+        if not worker.done():
+            # Unblock the worker so it sees the cancellation and stops
+            sink.cancelled = True
+            while not worker.done():
+                while not queue.empty():
+                    queue.get_nowait()
+                await asyncio.wait({worker}, timeout=0.01)
+            if not isinstance(worker.exception(), (_Cancelled, type(None))):
+                logger.error("XML serialization failed: %s", worker.exception())
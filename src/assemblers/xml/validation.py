@@ -0,0 +1,492 @@
+import logging
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from lxml import etree
+
+from .bpmn import BpmnBuilder
+from .layout import GATEWAY_TYPES, ORIGIN_Y, LayeredLayout
+from .routing import EdgeRouter
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_PATH = r"data/XMLs/bpmn_schema.xml"
+
+NAMESPACES = BpmnBuilder._BPMN_NAMESPACES
+MODEL_NS = NAMESPACES["bpmn"]
+
+# BPMN model elements the generator may use beyond those in the template
+MODEL_ELEMENTS = {
+    "collaboration",
+    "participant",
+    "messageFlow",
+    "laneSet",
+    "lane",
+    "flowNodeRef",
+    "conditionExpression",
+    "documentation",
+    "textAnnotation",
+    "association",
+    "dataObject",
+    "dataObjectReference",
+    "dataStoreReference",
+    "subProcess",
+    "callActivity",
+    "timerEventDefinition",
+    "messageEventDefinition",
+    "signalEventDefinition",
+    "errorEventDefinition",
+}
+_FLOW_NODE_RE = re.compile(
+    r"(Event|Task|Gateway)$|^(task|subProcess|callActivity|transaction)$"
+)
+_MODEL_NAME_RE = re.compile(r"(Event|Task|Gateway|Definition)$")
+
+# Complete BPMN document inside the raw llm output (prolog is optional)
+_DOCUMENT_RE = re.compile(
+    r"(<\?xml[\s\S]*?|<(?:\w+:)?definitions[\s\S]*?)</(?:\w+:)?definitions>"
+)
+_USED_PREFIX_RE = re.compile(r"</?(\w+):\w+")
+_ROOT_TAG_RE = re.compile(r"<(?:\w+:)?definitions\b")
+
+# Faults fixed without the LLM, in the order they are tried
+REPAIRABLE = (
+    "fences",
+    "namespace",
+    "syntax",
+    "dangling_flow",
+    "dangling_ref",
+    "dangling_di",
+    "duplicate_di",
+    "missing_diagram",
+    "missing_shape",
+    "missing_edge",
+)
+
+
+@dataclass(frozen=True)
+class BpmnProfile:
+    """
+    Structure expected from generated documents, compiled from the XML template:
+    namespace of every element name and the namespaces declared on the root.
+    """
+
+    root_tag: str
+    namespaces: Dict[str, str]
+    element_namespaces: Dict[str, str]
+
+    def namespace_of(self, local_name: str) -> Optional[str]:
+        if local_name in self.element_namespaces:
+            return self.element_namespaces[local_name]
+        if local_name in MODEL_ELEMENTS or _MODEL_NAME_RE.search(local_name):
+            return MODEL_NS
+        return None
+
+
+@dataclass
+class BpmnIssue:
+    code: str
+    message: str
+    element_id: Optional[str] = None
+
+    def __str__(self) -> str:
+        return self.message
+
+
+@dataclass
+class RepairResult:
+    """Outcome of repair_bpmn: the document, applied repairs and remaining issues"""
+
+    xml: Optional[str]
+    repairs: List[str] = field(default_factory=list)
+    issues: List[BpmnIssue] = field(default_factory=list)
+
+    @property
+    def valid(self) -> bool:
+        return self.xml is not None and not self.issues
+
+
+@lru_cache(maxsize=4)
+def load_profile(path: str = TEMPLATE_PATH) -> BpmnProfile:
+    """Compile the template into a BpmnProfile once per path"""
+    root = etree.parse(path).getroot()
+    element_namespaces = {}
+    for element in root.iter(etree.Element):
+        qname = etree.QName(element)
+        element_namespaces.setdefault(qname.localname, qname.namespace)
+    namespaces = {k: v for k, v in root.nsmap.items() if k}
+    return BpmnProfile(root.tag, namespaces, element_namespaces)
+
+
+def _local(element: etree.Element) -> str:
+    return etree.QName(element).localname
+
+
+def _extract_document(text: str) -> str:
+    """The BPMN document without markdown fences or surrounding text"""
+    if match := _DOCUMENT_RE.search(text):
+        return match.group(0).strip()
+    return text.strip()
+
+
+def _declare_prefixes(text: str, profile: BpmnProfile) -> str:
+    """Declare the standard prefixes the document uses but never declares"""
+    missing = [
+        prefix
+        for prefix in sorted(set(_USED_PREFIX_RE.findall(text)))
+        if prefix in profile.namespaces and f"xmlns:{prefix}=" not in text
+    ]
+    if not missing:
+        return text
+    declarations = "".join(
+        f' xmlns:{prefix}="{profile.namespaces[prefix]}"' for prefix in missing
+    )
+    return _ROOT_TAG_RE.sub(lambda m: m.group(0) + declarations, text, count=1)
+
+
+def _parse(text: str, repairs: List[str]) -> Optional[etree.Element]:
+    data = text.encode("utf-8")
+    try:
+        return etree.fromstring(data)
+    except etree.XMLSyntaxError as e:
+        logger.info("Malformed BPMN XML (%s), trying to recover", e)
+    root = etree.fromstring(data, etree.XMLParser(recover=True))
+    if root is not None:
+        repairs.append("syntax")
+    return root
+
+
+def _normalize_namespaces(
+    root: etree.Element, profile: BpmnProfile, repairs: List[str]
+) -> etree.Element:
+    """Move elements into the namespace the template uses for their name"""
+    moved = False
+    for element in root.iter(etree.Element):
+        qname = etree.QName(element)
+        expected = profile.namespace_of(qname.localname)
+        if expected and qname.namespace != expected:
+            element.tag = f"{{{expected}}}{qname.localname}"
+            moved = True
+    if moved:
+        repairs.append("namespace")
+
+    if all(root.nsmap.get(k) == v for k, v in profile.namespaces.items()):
+        return root
+    # Re-root to get the standard prefixes declared once on definitions
+    nsmap = {
+        k: v for k, v in root.nsmap.items() if v not in profile.namespaces.values()
+    }
+    nsmap.update(profile.namespaces)
+    new_root = etree.Element(root.tag, nsmap=nsmap, attrib=dict(root.attrib))
+    new_root.text = root.text
+    new_root.extend(list(root))
+    etree.cleanup_namespaces(new_root)
+    return new_root
+
+
+def flow_nodes(process: etree.Element) -> List[etree.Element]:
+    return [
+        el
+        for el in process
+        if isinstance(el.tag, str) and _FLOW_NODE_RE.search(_local(el))
+    ]
+
+
+def _model_ids(root: etree.Element) -> Dict[str, etree.Element]:
+    ids = {}
+    for element in root.iter(etree.Element):
+        if etree.QName(element).namespace == MODEL_NS and element.get("id"):
+            ids.setdefault(element.get("id"), element)
+    return ids
+
+
+def validate_bpmn(root: etree.Element) -> List[BpmnIssue]:
+    """
+    Structure and referential integrity of a parsed document:
+    flows connect flow nodes of their process, incoming/outgoing and DI
+    elements reference existing elements, every node and flow has DI.
+    """
+    issues: List[BpmnIssue] = []
+    if root.tag != load_profile().root_tag:
+        return [BpmnIssue("root", f"Root element is {_local(root)}, not definitions")]
+    processes = root.findall("bpmn:process", NAMESPACES)
+    if not processes:
+        return [BpmnIssue("no_process", "Document has no bpmn:process")]
+
+    seen = set()
+    for element in root.iter(etree.Element):
+        if etree.QName(element).namespace == MODEL_NS and element.get("id"):
+            if element.get("id") in seen:
+                issues.append(
+                    BpmnIssue(
+                        "duplicate_id",
+                        f"Id {element.get('id')} is used twice",
+                        element.get("id"),
+                    )
+                )
+            seen.add(element.get("id"))
+
+    flows_by_id = {}
+    for process in processes:
+        nodes = {el.get("id") for el in flow_nodes(process)}
+        if not any(_local(el) == "startEvent" for el in flow_nodes(process)):
+            issues.append(
+                BpmnIssue(
+                    "no_start_event",
+                    f"Process {process.get('id')} has no start event",
+                    process.get("id"),
+                )
+            )
+        for flow in process.findall("bpmn:sequenceFlow", NAMESPACES):
+            flows_by_id[flow.get("id")] = flow
+            for attr in ("sourceRef", "targetRef"):
+                if flow.get(attr) not in nodes:
+                    issues.append(
+                        BpmnIssue(
+                            "dangling_flow",
+                            f"Flow {flow.get('id')} {attr} {flow.get(attr)} is no node",
+                            flow.get("id"),
+                        )
+                    )
+        for ref in process.iterfind("*/bpmn:incoming", NAMESPACES):
+            if (ref.text or "").strip() not in flows_by_id:
+                issues.append(
+                    BpmnIssue("dangling_ref", f"incoming {ref.text} is no flow")
+                )
+        for ref in process.iterfind("*/bpmn:outgoing", NAMESPACES):
+            if (ref.text or "").strip() not in flows_by_id:
+                issues.append(
+                    BpmnIssue("dangling_ref", f"outgoing {ref.text} is no flow")
+                )
+
+    plane = root.find("bpmndi:BPMNDiagram/bpmndi:BPMNPlane", NAMESPACES)
+    if plane is None:
+        issues.append(BpmnIssue("missing_diagram", "Document has no BPMNPlane"))
+        return issues
+
+    ids = _model_ids(root)
+    shapes, edges, di_ids = set(), set(), set()
+    for di in plane:
+        if not isinstance(di.tag, str) or _local(di) not in ("BPMNShape", "BPMNEdge"):
+            continue
+        if di.get("id") in di_ids:
+            issues.append(
+                BpmnIssue("duplicate_di", f"DI id {di.get('id')} is used twice")
+            )
+        di_ids.add(di.get("id"))
+        element_id = di.get("bpmnElement")
+        if element_id not in ids:
+            issues.append(
+                BpmnIssue(
+                    "dangling_di",
+                    f"{_local(di)} {di.get('id')} references missing {element_id}",
+                    di.get("id"),
+                )
+            )
+        elif _local(di) == "BPMNShape" and shape_bounds(di):
+            shapes.add(element_id)
+        elif (
+            _local(di) == "BPMNEdge" and len(di.findall("di:waypoint", NAMESPACES)) > 1
+        ):
+            edges.add(element_id)
+
+    for process in processes:
+        for node in flow_nodes(process):
+            if node.get("id") not in shapes:
+                issues.append(
+                    BpmnIssue(
+                        "missing_shape",
+                        f"Node {node.get('id')} has no shape",
+                        node.get("id"),
+                    )
+                )
+    for flow_id in flows_by_id:
+        if flow_id not in edges:
+            issues.append(
+                BpmnIssue("missing_edge", f"Flow {flow_id} has no edge", flow_id)
+            )
+    return issues
+
+
+def shape_bounds(shape: etree.Element) -> Optional[tuple]:
+    bounds = shape.find("dc:Bounds", NAMESPACES)
+    if bounds is None:
+        return None
+    try:
+        return tuple(float(bounds.get(a)) for a in ("x", "y", "width", "height"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _repair_references(root: etree.Element, repairs: List[str]) -> None:
+    """Drop flows between missing nodes and references to missing elements"""
+    flow_ids = set()
+    for process in root.findall("bpmn:process", NAMESPACES):
+        nodes = {el.get("id") for el in flow_nodes(process)}
+        for flow in process.findall("bpmn:sequenceFlow", NAMESPACES):
+            if flow.get("sourceRef") in nodes and flow.get("targetRef") in nodes:
+                flow_ids.add(flow.get("id"))
+            else:
+                process.remove(flow)
+                _append_once(repairs, "dangling_flow")
+        for ref in list(process.iterfind("*/bpmn:incoming", NAMESPACES)) + list(
+            process.iterfind("*/bpmn:outgoing", NAMESPACES)
+        ):
+            if (ref.text or "").strip() not in flow_ids:
+                ref.getparent().remove(ref)
+                _append_once(repairs, "dangling_ref")
+
+    ids = _model_ids(root)
+    di_ids = set()
+    for di in root.iterfind(".//bpmndi:BPMNPlane/*", NAMESPACES):
+        if di.get("bpmnElement") not in ids:
+            di.getparent().remove(di)
+            _append_once(repairs, "dangling_di")
+            continue
+        if di.get("id") in di_ids:
+            di.set("id", f"{di.get('id')}_{len(di_ids)}")
+            _append_once(repairs, "duplicate_di")
+        di_ids.add(di.get("id"))
+
+
+def _repair_diagram(root: etree.Element, repairs: List[str]) -> List[BpmnIssue]:
+    """
+    Add the plane, missing shapes (layered layout) and missing edges (router).
+
+    A flow the router or the builder fails on keeps no edge, it is returned
+    as an issue instead of failing the whole repair.
+    """
+    processes = root.findall("bpmn:process", NAMESPACES)
+    builder = BpmnBuilder.from_root(root)
+    if builder._current_plane is None:
+        collaboration = root.find("bpmn:collaboration", NAMESPACES)
+        owner = collaboration if collaboration is not None else processes[0]
+        builder.init_diagram(owner.get("id"))
+        _append_once(repairs, "missing_diagram")
+    plane = builder._current_plane
+
+    nodes, flows = [], []
+    for process in processes:
+        nodes += [
+            {"id": el.get("id"), "type": _local(el)} for el in flow_nodes(process)
+        ]
+        flows += [
+            {
+                "id": el.get("id"),
+                "sourceRef": el.get("sourceRef"),
+                "targetRef": el.get("targetRef"),
+            }
+            for el in process.findall("bpmn:sequenceFlow", NAMESPACES)
+        ]
+
+    bounds, routed = {}, set()
+    for di in list(plane):
+        if not isinstance(di.tag, str):
+            continue
+        if _local(di) == "BPMNShape":
+            if box := shape_bounds(di):
+                bounds.setdefault(di.get("bpmnElement"), box)
+            else:
+                plane.remove(di)
+        elif _local(di) == "BPMNEdge":
+            if len(di.findall("di:waypoint", NAMESPACES)) > 1:
+                routed.add(di.get("bpmnElement"))
+            else:
+                plane.remove(di)
+
+    missing = [n for n in nodes if n["id"] not in bounds]
+    if missing:
+        computed = LayeredLayout(nodes, flows).compute()
+        # Keep the model's shapes, place the missing ones below them
+        shift = 0.0
+        if bounds:
+            shift = max(y + h for _, y, _, h in bounds.values()) + 100 - ORIGIN_Y
+        for node in missing:
+            x, y, w, h = computed[node["id"]]
+            bounds[node["id"]] = (x, y + shift, w, h)
+            builder.add_shape(node["id"], x, y + shift, w, h)
+        _append_once(repairs, "missing_shape")
+
+    issues: List[BpmnIssue] = []
+    unrouted = [
+        f
+        for f in flows
+        if f["id"] not in routed
+        and f["sourceRef"] in bounds
+        and f["targetRef"] in bounds
+    ]
+    if unrouted:
+        router = EdgeRouter(
+            bounds, [n["id"] for n in nodes if n["type"] in GATEWAY_TYPES]
+        )
+        waypoints = {}
+        for flow in unrouted:
+            try:
+                path = router.route(flow["sourceRef"], flow["targetRef"])
+                if len(path) < 2:
+                    raise ValueError("route has less than two waypoints")
+            except ValueError as e:
+                issues.append(
+                    BpmnIssue(
+                        "unroutable_edge",
+                        f"Flow {flow['id']} cannot be routed: {e}",
+                        flow["id"],
+                    )
+                )
+            else:
+                waypoints[flow["id"]] = path
+        if waypoints:
+            builder.add_edges(waypoints)
+            _append_once(repairs, "missing_edge")
+    return issues
+
+
+def _append_once(repairs: List[str], fault: str) -> None:
+    if fault not in repairs:
+        repairs.append(fault)
+
+
+def repair_bpmn(text: Optional[str]) -> RepairResult:
+    """
+    Validate raw generated XML and fix common faults locally:
+    markdown fences and chatter, undeclared prefixes and wrong namespaces,
+    recoverable syntax errors, dangling flows and references, missing DI.
+
+    The original text is returned when nothing needed fixing. Faults that
+    cannot be fixed (no process, duplicate ids, no start event, ...) are left
+    in `issues` for an LLM fix-up.
+    """
+    if not text or not text.strip():
+        return RepairResult(None, issues=[BpmnIssue("empty", "Answer is empty")])
+
+    profile = load_profile()
+    repairs: List[str] = []
+    document = _extract_document(text)
+    if document != text.strip():
+        repairs.append("fences")
+    declared = _declare_prefixes(document, profile)
+    if declared != document:
+        repairs.append("namespace")
+
+    root = _parse(declared, repairs)
+    if root is None:
+        return RepairResult(None, repairs, [BpmnIssue("syntax", "Answer is not XML")])
+    root = _normalize_namespaces(root, profile, repairs)
+
+    issues = validate_bpmn(root)
+    if not issues and not repairs:
+        return RepairResult(text)
+    fatal = [i for i in issues if i.code not in REPAIRABLE]
+    if fatal:
+        return RepairResult(None, repairs, fatal)
+
+    unrepaired: List[BpmnIssue] = []
+    if issues:
+        _repair_references(root, repairs)
+        unrepaired = _repair_diagram(root, repairs)
+    xml = etree.tostring(
+        root, pretty_print=True, xml_declaration=True, encoding="utf-8"
+    ).decode("utf-8")
+    return RepairResult(xml, repairs, unrepaired + validate_bpmn(root))
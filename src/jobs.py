@@ -0,0 +1,332 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from settings import get_settings
+from src.metrics import JOB_RUN_TIME, JOB_WAIT_TIME
+from src.schemas import SUserInputData
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED_STATUSES = (SUCCEEDED, FAILED)
+
+
+async def invoke_agent(user_input: SUserInputData, use_cache: bool = True) -> dict:
+    """Run the agent, imported on first use to keep langgraph out of startup"""
+    from src.ai_generation.bpmn_agent.simple.agent import invoke_agent
+
+    return await invoke_agent(user_input, use_cache=use_cache)
+
+
+class JobQueueFull(Exception):
+    """Raised when the job queue does not accept more jobs"""
+
+
+@dataclass
+class Job:
+    id: str
+    user_input: str
+    use_cache: bool
+    status: str
+    created_at: float
+    started_at: float | None = None
+    finished_at: float | None = None
+    output: str | None = None
+    error: str | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def wait_time(self) -> float | None:
+        if self.started_at is None:
+            return None
+        return self.started_at - self.created_at
+
+    @property
+    def run_time(self) -> float | None:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "wait_time": self.wait_time, "run_time": self.run_time}
+
+
+class JobStore:
+    """
+    SQLite persistence of generation jobs.
+    Queued and finished jobs survive restarts, jobs interrupted while running
+    are queued again by ``recover``.
+    """
+
+    def __init__(self, db_path: str = ":memory:", retention_seconds: float = 0):
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(
+            db_path, check_same_thread=False, isolation_level=None
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                user_input TEXT NOT NULL,
+                use_cache INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                output TEXT,
+                error TEXT
+            )
+            """
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)"
+        )
+
+    def create(self, user_input: str, use_cache: bool = True) -> Job:
+        job = Job(
+            id=uuid.uuid4().hex,
+            user_input=user_input,
+            use_cache=use_cache,
+            status=QUEUED,
+            created_at=time.time(),
+        )
+        with self._lock:
+            self._db.execute(
+                """
+                INSERT INTO jobs (id, user_input, use_cache, status, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (job.id, job.user_input, int(use_cache), job.status, job.created_at),
+            )
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            row = self._db.execute(
+                """
+                SELECT id, user_input, use_cache, status, created_at,
+                       started_at, finished_at, output, error
+                FROM jobs WHERE id = ?
+                """,
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return Job(*row[:2], bool(row[2]), *row[3:])
+
+    def save(self, job: Job) -> None:
+        """Persist status, timestamps and result of the job"""
+        with self._lock:
+            self._db.execute(
+                """
+                UPDATE jobs SET status = ?, started_at = ?, finished_at = ?,
+                                output = ?, error = ?
+                WHERE id = ?
+                """,
+                (
+                    job.status,
+                    job.started_at,
+                    job.finished_at,
+                    job.output,
+                    job.error,
+                    job.id,
+                ),
+            )
+
+    def recover(self) -> list[str]:
+        """
+        Requeue jobs interrupted by a restart, purge old finished jobs and
+        return ids of queued jobs, oldest first.
+        """
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?",
+                (QUEUED, RUNNING),
+            )
+            if self.retention_seconds > 0:
+                self._db.execute(
+                    "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                    (*FINISHED_STATUSES, time.time() - self.retention_seconds),
+                )
+            rows = self._db.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (QUEUED,)
+            ).fetchall()
+        return [job_id for (job_id,) in rows]
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class JobQueue:
+    """
+    Background worker pool running ``invoke_agent`` for stored jobs.
+
+    Jobs are persisted before they are queued, so the queue is rebuilt from
+    the store on ``start``. Status changes wake up ``watch`` subscribers.
+    """
+
+    def __init__(self, store: JobStore, workers: int = 2, max_queue: int = 1000):
+        self.store = store
+        self.workers = workers
+        self.max_queue = max_queue
+        self._queue: asyncio.Queue[str] | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._running = 0
+        self._changed: asyncio.Condition | None = None
+        self._version = 0
+
+    @property
+    def started(self) -> bool:
+        return bool(self._tasks)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    async def start(self) -> None:
+        if self.started:
+            return
+        self._queue = asyncio.Queue()
+        self._changed = asyncio.Condition()
+        for job_id in await asyncio.to_thread(self.store.recover):
+            self._queue.put_nowait(job_id)
+        if self._queue.qsize():
+            logger.info("Recovered %s queued jobs", self._queue.qsize())
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """Stop workers, interrupted jobs are requeued on the next start"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, user_input: SUserInputData, use_cache: bool = True) -> Job:
+        if not self.started:
+            raise RuntimeError("Job queue is not started")
+        if self.depth >= self.max_queue:
+            raise JobQueueFull(f"Job queue is full ({self.max_queue})")
+        job = await asyncio.to_thread(
+            self.store.create, user_input.user_input, use_cache
+        )
+        self._queue.put_nowait(job.id)
+        return job
+
+    async def get(self, job_id: str) -> Job | None:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def watch(self, job_id: str):
+        """Yield the job on every status change until it is finished"""
+        last_status = None
+        while True:
+            # Read the version first so a change during the lookup is not missed
+            seen = self._version
+            job = await self.get(job_id)
+            if job is None:
+                return
+            if job.status != last_status:
+                last_status = job.status
+                yield job
+            if job.finished:
+                return
+            async with self._changed:
+                await self._changed.wait_for(lambda: self._version != seen)
+
+    async def _update(self, job: Job) -> None:
+        await asyncio.to_thread(self.store.save, job)
+        async with self._changed:
+            self._version += 1
+            self._changed.notify_all()
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = await self.get(job_id)
+                if job is None or job.status != QUEUED:
+                    continue
+                self._running += 1
+                try:
+                    await self._run(job)
+                finally:
+                    self._running -= 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Job worker error on %s: %s", job_id, e)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.status = RUNNING
+        job.started_at = time.time()
+        JOB_WAIT_TIME.observe(job.wait_time)
+        await self._update(job)
+
+        try:
+            result = await invoke_agent(
+                SUserInputData(user_input=job.user_input), use_cache=job.use_cache
+            )
+            job.status = SUCCEEDED
+            job.output = result.get(
+                "previous_answer", "Sorry, tech problem. Please retry later."
+            )
+        except Exception as e:
+            logger.warning("Job %s failed: %s", job.id, e)
+            job.status = FAILED
+            job.error = str(e)
+
+        job.finished_at = time.time()
+        JOB_RUN_TIME.observe(job.run_time, status=job.status)
+        await self._update(job)
+
+    def stats(self) -> dict:
+        return {"queued": self.depth, "running": self._running, "workers": self.workers}
+
+
+_job_queue = None
+
+
+def get_job_queue() -> JobQueue:
+    """Get the process-wide job queue (started by the app lifespan)"""
+    global _job_queue
+
+    if _job_queue is None:
+        settings = get_settings()
+        _job_queue = JobQueue(
+            JobStore(settings.JOB_STORE_PATH, settings.JOB_RETENTION),
+            workers=settings.JOB_WORKERS,
+            max_queue=settings.JOB_MAX_QUEUE,
+        )
+    return _job_queue
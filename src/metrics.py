@@ -0,0 +1,408 @@
+import asyncio
+import bisect
+import logging
+import math
+import threading
+import time
+from collections.abc import Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LLM_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 45, 60, 90, 120)
+# Seconds between two warnings about the same failing metric
+RENDER_WARNING_INTERVAL = 60.0
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+            for k, v in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per bucket counts..., +Inf count], sum
+        self._values: dict[tuple[str, ...], tuple[list[int], float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels) -> int:
+        counts, _ = self._values.get(self._key(labels), ([0], 0.0))
+        return sum(counts)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, (list(c), s)) for k, (c, s) in self._values.items())
+        lines = self.header()
+        names = self.labelnames + ("le",)
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(names, key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Gauge read from a callback returning {label values tuple: value}"""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], dict[tuple[str, ...], float]],
+        labelnames: Iterable[str] = (),
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for key, value in sorted(self.callback().items()):
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics registry with Prometheus text exposition.
+    Counters and histograms are updated by the application code,
+    gauges are read from callbacks at scrape time.
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        # Metric name -> monotonic time of its last render warning
+        self._warned_at: dict[str, float] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, callback, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, documentation, callback, labelnames))
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # A broken gauge callback must not break the whole scrape
+                self._warn_render_failed(metric.name, e)
+        return "\n".join(lines) + "\n"
+
+    def _warn_render_failed(self, name: str, error: Exception) -> None:
+        """Log a failing metric once per RENDER_WARNING_INTERVAL, not every scrape"""
+        now = time.monotonic()
+        last = self._warned_at.get(name)
+        if last is not None and now - last < RENDER_WARNING_INTERVAL:
+            return
+        self._warned_at[name] = now
+        logger.warning("Metric %s skipped in scrape: %r", name, error)
+
+
+registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    return registry
+
+
+# ==== APPLICATION METRICS ====
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route until the response body is ready to send "
+    "(Server-Sent Events streams are not recorded)",
+    ("method", "route", "status"),
+)
+NODE_DURATION = registry.histogram(
+    "langgraph_node_duration_seconds",
+    "Duration of LangGraph agent nodes",
+    ("node",),
+    buckets=LLM_BUCKETS,
+)
+UPSTREAM_FIRST_TOKEN = registry.histogram(
+    "llm_upstream_first_token_seconds",
+    "Time to first token of streamed upstream LLM calls",
+    ("model",),
+    buckets=LLM_BUCKETS,
+)
+UPSTREAM_DURATION = registry.histogram(
+    "llm_upstream_duration_seconds",
+    "Total duration of upstream LLM calls",
+    ("model", "stream"),
+    buckets=LLM_BUCKETS,
+)
+PROMPT_TOKENS = registry.counter(
+    "llm_prompt_tokens_total", "Prompt tokens reported by the provider", ("model",)
+)
+CACHED_PROMPT_TOKENS = registry.counter(
+    "llm_cached_prompt_tokens_total",
+    "Prompt tokens served from the provider prompt cache",
+    ("model",),
+)
+COMPLETION_TOKENS = registry.counter(
+    "llm_completion_tokens_total",
+    "Completion tokens reported by the provider",
+    ("model",),
+)
+IR_RESULTS = registry.counter(
+    "bpmn_ir_results_total",
+    "Compact JSON answers assembled into XML (valid) or rejected (invalid)",
+    ("result",),
+)
+BPMN_VALIDATION = registry.counter(
+    "bpmn_validation_total",
+    "Generated documents by validation outcome "
+    "(valid, repaired locally, llm_fixed, invalid)",
+    ("result",),
+)
+BPMN_REPAIRS = registry.counter(
+    "bpmn_repairs_total", "Faults repaired locally in generated documents", ("fault",)
+)
+BPMN_REPAIR_DURATION = registry.histogram(
+    "bpmn_repair_duration_seconds",
+    "Time spent validating and repairing generated documents",
+    ("method",),
+    buckets=(0.001,) + DEFAULT_BUCKETS + (30, 60),
+)
+DIAGRAM_EDITS = registry.counter(
+    "bpmn_edit_operations_total",
+    "Patch operations applied to existing diagrams",
+    ("op",),
+)
+JOB_WAIT_TIME = registry.histogram(
+    "job_wait_seconds",
+    "Time generation jobs spend queued before a worker picks them up",
+    buckets=LLM_BUCKETS,
+)
+JOB_RUN_TIME = registry.histogram(
+    "job_run_seconds",
+    "Time workers spend running generation jobs",
+    ("status",),
+    buckets=LLM_BUCKETS,
+)
+
+
+def record_usage(model: str, usage) -> None:
+    """Count tokens from a provider ``usage`` object (may be None)"""
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    if isinstance(prompt_tokens, int):
+        PROMPT_TOKENS.inc(prompt_tokens, model=model)
+    if isinstance(completion_tokens, int):
+        COMPLETION_TOKENS.inc(completion_tokens, model=model)
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = getattr(details, "cached_tokens", None)
+    if isinstance(cached_tokens, int):
+        CACHED_PROMPT_TOKENS.inc(cached_tokens, model=model)
+
+
+def _cache_hit_ratios() -> dict[tuple[str, ...], float]:
+    from src.ai_generation.prompt_index import get_prompt_index
+    from src.ai_generation.response_cache import get_response_cache
+
+    ratios = {}
+    if (cache := get_response_cache()) is not None:
+        ratios[("llm_response",)] = cache.stats()["hit_ratio"]
+    if (index := get_prompt_index()) is not None:
+        ratios[("similar_prompt",)] = index.stats()["hit_rate"]
+    return ratios
+
+
+def _thread_pool_queue_depth() -> dict[tuple[str, ...], float]:
+    """Work items waiting in the default executor used by ``asyncio.to_thread``"""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return {}
+    executor = getattr(loop, "_default_executor", None)
+    work_queue = getattr(executor, "_work_queue", None)
+    return {(): work_queue.qsize() if work_queue is not None else 0}
+
+
+def _upstream_queue() -> dict[tuple[str, ...], float]:
+    from src.ai_generation.single_flight import get_in_flight
+    from src.ai_generation.upstream_scheduler import get_upstream_scheduler
+
+    stats = get_upstream_scheduler().stats()
+    return {
+        ("upstream_queued",): stats["queued"],
+        ("upstream_in_flight",): stats["in_flight"],
+        ("upstream_concurrency_limit",): stats["concurrency_limit"],
+        ("generations_in_flight",): get_in_flight().in_flight(),
+    }
+
+
+def _hedging() -> dict[tuple[str, ...], float]:
+    from src.ai_generation.hedging import get_hedger
+
+    if (hedger := get_hedger()) is None:
+        return {}
+    stats = hedger.stats()
+    return {
+        ("requests",): stats["requests"],
+        ("hedged",): stats["hedged"],
+        ("hedge_rate",): stats["hedge_rate"],
+        ("latency_saved_seconds",): stats["latency_saved_seconds"],
+    }
+
+
+def _hedge_wins() -> dict[tuple[str, ...], float]:
+    from src.ai_generation.hedging import get_hedger
+
+    if (hedger := get_hedger()) is None:
+        return {}
+    return {(model,): wins for model, wins in hedger.stats()["wins"].items()}
+
+
+def _job_queue() -> dict[tuple[str, ...], float]:
+    from src.jobs import get_job_queue
+
+    stats = get_job_queue().stats()
+    return {
+        ("queued",): stats["queued"],
+        ("running",): stats["running"],
+        ("workers",): stats["workers"],
+    }
+
+
+registry.gauge(
+    "cache_hit_ratio", "Hit ratio of application caches", _cache_hit_ratios, ("cache",)
+)
+registry.gauge(
+    "thread_pool_queue_depth",
+    "Work items waiting in the default thread pool",
+    _thread_pool_queue_depth,
+)
+registry.gauge(
+    "generation_queue",
+    "Upstream scheduler and generation load",
+    _upstream_queue,
+    ("kind",),
+)
+registry.gauge(
+    "llm_hedging",
+    "Requests hedged against the fallback model and estimated latency saved",
+    _hedging,
+    ("kind",),
+)
+registry.gauge("llm_hedge_wins", "Hedged races won per model", _hedge_wins, ("model",))
+
+
+def _prewarm() -> dict[tuple[str, ...], float]:
+    from src.prewarm import get_prewarm_timings
+
+    return {(step,): seconds for step, seconds in get_prewarm_timings().items()}
+
+
+registry.gauge(
+    "job_queue", "Generation job queue depth and workers", _job_queue, ("kind",)
+)
+registry.gauge(
+    "startup_prewarm_seconds",
+    "Duration of the startup prewarm steps",
+    _prewarm,
+    ("step",),
+)
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+PROMPTS_DIR = Path("data/prompts/simple")
+
+# Seconds each step of the last prewarm took
+_timings: dict[str, float] = {}
+
+
+def _import_modules() -> None:
+    # One thread imports the shared dependencies, the parallel steps then
+    # only find them in sys.modules (no import lock contention)
+    import src.ai_generation.bpmn_agent.simple.agent  # noqa: F401
+    import src.ai_generation.bpmn_agent.simple.diagram_edit  # noqa: F401
+    import src.assemblers.xml.analysis  # noqa: F401
+
+
+def _warm_graph() -> None:
+    from src.ai_generation.bpmn_agent.simple.agent import get_compiled_agent
+
+    get_compiled_agent()
+
+
+def _warm_prompts() -> None:
+    from src.ai_generation.managers.llm_config import LLMConfigManager
+
+    manager = LLMConfigManager(str(PROMPTS_DIR))
+    for path in sorted(PROMPTS_DIR.glob("*.yaml")):
+        manager.get_call_config(path.stem)
+
+
+def _warm_edit_call() -> None:
+    from src.ai_generation.bpmn_agent.simple.diagram_edit import get_edit_call
+
+    get_edit_call()
+
+
+def _warm_validation() -> None:
+    from src.assemblers.xml.validation import load_profile
+
+    load_profile()
+
+
+async def _timed_step(name: str, step: Callable[[], None]) -> None:
+    started = time.perf_counter()
+    try:
+        await asyncio.to_thread(step)
+    except Exception as e:
+        # The first request builds whatever failed here
+        logger.warning("Prewarm step %s failed: %s", name, e)
+    _timings[name] = time.perf_counter() - started
+
+
+async def prewarm() -> dict[str, float]:
+    """
+    Build what the first generation would otherwise wait for: the compiled
+    agent graph, prompt configs, the edit call schema, the validation profile
+    and the pooled LLM client. After the imports the steps run in parallel threads.
+
+    Returns:
+        dict[str, float]: seconds per step and in total
+    """
+    started = time.perf_counter()
+    await _timed_step("imports", _import_modules)
+
+    from src.ai_generation.llm_client import get_async_llm_client
+
+    # Created on the event loop, the client's connection pool belongs to it
+    client_started = time.perf_counter()
+    get_async_llm_client()
+    _timings["http_client"] = time.perf_counter() - client_started
+
+    await asyncio.gather(
+        _timed_step("graph", _warm_graph),
+        _timed_step("prompts", _warm_prompts),
+        _timed_step("edit_call", _warm_edit_call),
+        _timed_step("validation", _warm_validation),
+    )
+    _timings["total"] = time.perf_counter() - started
+    logger.info(
+        "Prewarmed in %.0f ms (%s)",
+        _timings["total"] * 1000,
+        ", ".join(f"{k} {v * 1000:.0f} ms" for k, v in _timings.items()),
+    )
+    return dict(_timings)
+
+
+def get_prewarm_timings() -> dict[str, float]:
+    return dict(_timings)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class SExampleBPMN(BaseModel):
@@ -10,6 +10,73 @@ class SUserInputData(BaseModel):
     user_input: str
 
 
+class SGenerationMeta(BaseModel):
+    prompt_cache_hit: bool = False
+    similarity: float | None = None
+    matched_input: str | None = None
+    prompt_cache_hit_rate: float = 0.0
+
+
+class SGatewayFinding(BaseModel):
+    id: str
+    type: str
+    fan_in: int
+    fan_out: int
+    problem: str
+
+
+class SAnalysis(BaseModel):
+    ok: bool
+    nodes: int
+    flows: int
+    unreachable: list[str] = Field(default_factory=list)
+    dead_ends: list[str] = Field(default_factory=list)
+    deadlocks: list[str] = Field(default_factory=list)
+    infinite_loops: list[list[str]] = Field(default_factory=list)
+    loops: int = 0
+    unbalanced_gateways: list[SGatewayFinding] = Field(default_factory=list)
+    gateway_balance: dict[str, dict[str, int]] = Field(default_factory=dict)
+
+
+class SAnalyzeRequest(BaseModel):
+    xml: str
+
+
 class SAgentOutput(BaseModel):
     status: bool = True
     output: str
+    metadata: SGenerationMeta = Field(default_factory=SGenerationMeta)
+    analysis: SAnalysis | None = None
+
+
+class SEditRequest(BaseModel):
+    xml: str
+    change_request: str
+
+
+class SEditOutput(BaseModel):
+    status: bool = True
+    output: str
+    operations: list[dict] = Field(default_factory=list)
+
+
+class SBatchItemResult(BaseModel):
+    index: int
+    status: bool = True
+    output: str | None = None
+    error: str | None = None
+    # Seconds to wait before retrying an input rejected by the full upstream queue
+    retry_after: int | None = None
+    metadata: SGenerationMeta | None = None
+
+
+class SJob(BaseModel):
+    id: str
+    status: str
+    created_at: float
+    started_at: float | None = None
+    finished_at: float | None = None
+    wait_time: float | None = None
+    run_time: float | None = None
+    output: str | None = None
+    error: str | None = None
@@ -136,6 +136,9 @@
             chatHistory.scrollTop = chatHistory.scrollHeight;
         }
 
+        // Follow-up messages edit the generated diagram instead of regenerating it
+        let diagramGenerated = false;
+
         sendChatBtn.addEventListener('click', async () => {
             const text = chatInput.value.trim();
             if (!text) return;
@@ -144,10 +147,38 @@
             chatInput.value = '';
             addMessage('Understood! Thinking about your response. Please wait..');
 
-            // Use BotResponder to generate a response
+            if (diagramGenerated) {
+                try {
+                    const xml = await botResponder.editDiagram(await bpmnViewer.saveXML(), text);
+                    await updateDiagram(xml);
+                    addMessage('The diagram has been updated.');
+                    return;
+                } catch (error) {
+                    console.error('Edit failed, generating a new diagram:', error);
+                }
+            }
+
+            // Use BotResponder to stream a response
+            const stageMessages = {
+                imagine: 'Designing the business process..',
+                generate: 'Drawing the BPMN diagram..',
+            };
+            let diagramRendered = false;
+
             try {
-                const botResponse = await botResponder.generateResponseAsync(text);
-                // addMessage(botResponse); #TODO: Send stream message of generation
+                const botResponse = await botResponder.generateResponseStream(text, {
+                    onStage: (stage) => {
+                        if (stageMessages[stage]) addMessage(stageMessages[stage]);
+                    },
+                    // Render as soon as the closing tag arrives
+                    onXml: async (xml) => {
+                        diagramRendered = true;
+                        diagramGenerated = true;
+                        await updateDiagram(xml);
+                    },
+                });
+
+                if (diagramRendered) return;
 
                 // Try to find XML structure in the response
                 const xmlMatch = botResponse.match(/<\?xml[\s\S]*?<\/bpmn:definitions>|<bpmn:definitions[\s\S]*?<\/bpmn:definitions>/);
@@ -159,6 +190,7 @@
 
                     // Call update function
                     await updateDiagram(cleanXml);
+                    diagramGenerated = true;
                 }
             } catch (error) {
                 console.error('Error generating bot response:', error);
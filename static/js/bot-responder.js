@@ -37,6 +37,77 @@ class BotResponder {
         }
     }
 
+    /**
+     * Generates bot response via Server-Sent Events stream
+     * @param {string} userMessage - User message
+     * @param {Object} handlers - Optional callbacks
+     * @param {function(string):void} handlers.onStage - Called when a generation stage starts
+     * @param {function(string, string):void} handlers.onToken - Called with (stage, text delta)
+     * @param {function(string):void} handlers.onXml - Called as soon as the BPMN XML is complete
+     * @returns {Promise<string>} Final response from server
+     */
+    generateResponseStream(userMessage, handlers = {}) {
+        const queryParams = new URLSearchParams({
+            user_input: userMessage
+        });
+        const url = `/api/generate/stream?${queryParams.toString()}`;
+
+        return new Promise((resolve, reject) => {
+            const source = new EventSource(url);
+
+            source.addEventListener('stage', (e) => {
+                const data = JSON.parse(e.data);
+                if (handlers.onStage) handlers.onStage(data.stage);
+            });
+
+            source.addEventListener('token', (e) => {
+                const data = JSON.parse(e.data);
+                if (handlers.onToken) handlers.onToken(data.stage, data.data);
+            });
+
+            source.addEventListener('xml', (e) => {
+                const data = JSON.parse(e.data);
+                if (handlers.onXml) handlers.onXml(data.data);
+            });
+
+            source.addEventListener('done', (e) => {
+                source.close();
+                resolve(JSON.parse(e.data).output);
+            });
+
+            // Server side failure is sent as a named "error" event with a payload,
+            // connection failures come without data
+            source.addEventListener('error', (e) => {
+                source.close();
+                const detail = e.data ? JSON.parse(e.data).detail : 'connection lost';
+                reject(new Error(`Stream error: ${detail}`));
+            });
+        });
+    }
+
+    /**
+     * Applies a change request to the current diagram
+     * @param {string} xml - Current BPMN XML
+     * @param {string} changeRequest - Requested change
+     * @returns {Promise<string>} Patched BPMN XML
+     */
+    async editDiagram(xml, changeRequest) {
+        const response = await fetch('/api/edit', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ xml: xml, change_request: changeRequest })
+        });
+
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+
+        const data = await response.json();
+        return data.output;
+    }
+
     /**
      * Wrapper for compatibility with app.js.
      */
@@ -8,9 +8,9 @@ class BPMNControls {
     }
 
     async loadExampleFromServer() {
-        const response = await fetch(`${this.apiUrl}/example-bpmn-xml`);
-        const data = await response.json();
-        return data.xml;
+        // Raw document, sent compressed when the browser accepts it
+        const response = await fetch(`${this.apiUrl}/example-bpmn-xml/raw?compact=false`);
+        return await response.text();
     }
 
     loadFromFile(file) {
@@ -1,3 +1,4 @@
+import os
 import pytest
 from pathlib import Path
 import logging
@@ -16,7 +17,7 @@ def config_dir(tmp_path) -> Path:
 @pytest.fixture
 def manager(config_dir):
     # Clear cache after testing
-    LLMConfigManager._load_file.cache_clear()
+    LLMConfigManager.cache_clear()
     return LLMConfigManager(config_dir=str(config_dir))
 
 
@@ -86,3 +87,68 @@ def test_jinja_rendering_failure(manager, config_dir):
     # Do not set username
     result = manager.get_call_config("missing_var")
     assert result["name"] is None or result["name"] == ""
+
+
+def test_cacheable_system_prompt_flag(manager, config_dir, caplog):
+    """
+    cache_system_prompt is passed to the client as bool,
+    a templated cacheable prompt is reported.
+    """
+    (config_dir / "static.yaml").write_text(
+        "cache_system_prompt: yes\nsystem_prompt: Static rules", encoding="utf-8"
+    )
+    (config_dir / "templated.yaml").write_text(
+        "cache_system_prompt: true\nsystem_prompt: Rules for {{ role }}",
+        encoding="utf-8",
+    )
+
+    with caplog.at_level(level=logging.INFO):
+        static = manager.get_call_config("static", role="Analyst")
+        templated = manager.get_call_config("templated", role="Analyst")
+
+    assert static == {"cache_system_prompt": True, "system_prompt": "Static rules"}
+    assert templated["system_prompt"] == "Rules for Analyst"
+    assert "templated depends on template variables" in caplog.text
+
+
+def test_only_templated_fields_rendered(manager, config_dir, mocker):
+    """Static fields are parsed once, a config without variables is memoized"""
+    (config_dir / "split.yaml").write_text(
+        "temperature: 0.2\nsystem_prompt: |\n  Rules for {{ role }}\nname: fixed\n",
+        encoding="utf-8",
+    )
+    parse = mocker.spy(LLMConfigManager, "_parse_yaml")
+
+    first = manager.get_call_config("split", role="Analyst")
+    second = manager.get_call_config("split", role="Clerk")
+    default = [manager.get_call_config("split") for _ in range(3)]
+
+    assert first == {
+        "temperature": 0.2,
+        "system_prompt": "Rules for Analyst\n",
+        "name": "fixed",
+    }
+    assert list(second) == ["temperature", "system_prompt", "name"]
+    assert second["system_prompt"] == "Rules for Clerk\n"
+    assert default[0]["system_prompt"] == "Rules for \n"
+    # Templated field per call with variables, once for all calls without
+    assert [call.args[0] for call in parse.call_args_list] == [
+        "system_prompt: |\n  Rules for Analyst\n",
+        "system_prompt: |\n  Rules for Clerk\n",
+        "system_prompt: |\n  Rules for \n",
+    ]
+    default[0]["name"] = "changed"
+    assert manager.get_call_config("split")["name"] == "fixed"
+
+
+def test_edited_prompt_reloaded(manager, config_dir):
+    path = config_dir / "live.yaml"
+    path.write_text("system_prompt: Old {{ role }}", encoding="utf-8")
+    assert manager.get_call_config("live", role="A")["system_prompt"] == "Old A"
+
+    path.write_text("system_prompt: Newer {{ role }}", encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert manager.get_call_config("live", role="A")["system_prompt"] == "Newer A"
+    assert manager.get_call_config("live")["system_prompt"] == "Newer"
@@ -0,0 +1,83 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.ai_generation.bpmn_agent.simple.get_bpmn_ir_node import (
+    generate_bpmn_from_ir,
+)
+from src.assemblers.json.ir import IRValidationError
+
+
+def make_client(answer: str, calls: list) -> Mock:
+    async def stream(prompt, json_schema, use_cache=True, **kwargs):
+        calls.append((prompt, json_schema, use_cache))
+        for i in range(0, len(answer), 5):
+            yield answer[i : i + 5]
+
+    client = Mock()
+    client.stream_response_json_based = stream
+    return client
+
+
+IR = {
+    "name": "Test",
+    "nodes": [
+        {"id": "s1", "type": "startEvent", "name": "Start"},
+        {"id": "e1", "type": "endEvent", "name": "End"},
+    ],
+    "flows": [{"from": "s1", "to": "e1", "name": ""}],
+}
+
+# --- TEST ---
+
+
+def test_xml_assembled_from_ir():
+    """Model answers with the JSON graph, the node returns assembled XML"""
+    calls = []
+    client = make_client(json.dumps(IR), calls)
+    state = {"previous_answer": "Plan", "user_input": "Test"}
+
+    result = asyncio.run(generate_bpmn_from_ir(state, client, {}, {"type": "object"}))
+
+    assert 'sourceRef="s1" targetRef="e1"' in result["previous_answer"]
+    assert calls == [("Plan", {"type": "object"}, True)]
+
+
+def test_invalid_ir_falls_back_to_xml():
+    client = make_client("{}", [])
+    client.generate_response_text_based = AsyncMock(return_value="<bpmn>xml</bpmn>")
+    state = {"previous_answer": "Plan", "user_input": "Test"}
+
+    result = asyncio.run(
+        generate_bpmn_from_ir(
+            state, client, {}, {}, fallback_configuration={"system_prompt": "XML"}
+        )
+    )
+
+    assert result["previous_answer"] == "<bpmn>xml</bpmn>"
+    client.generate_response_text_based.assert_awaited_once_with(
+        "Plan", use_cache=True, system_prompt="XML"
+    )
+
+
+def test_invalid_node_stops_stream():
+    """The first invalid node rejects the answer before the stream ends"""
+    answer = json.dumps(
+        {**IR, "nodes": [{"id": "x", "type": "lane", "name": ""}] + IR["nodes"]}
+    )
+    delivered = []
+
+    async def stream(prompt, json_schema, use_cache=True, **kwargs):
+        for i in range(0, len(answer), 5):
+            delivered.append(answer[i : i + 5])
+            yield answer[i : i + 5]
+
+    client = Mock()
+    client.stream_response_json_based = stream
+    state = {"previous_answer": "Plan", "user_input": "Test"}
+
+    with pytest.raises(IRValidationError, match="Unknown node type 'lane'"):
+        asyncio.run(generate_bpmn_from_ir(state, client, {}, {}))
+    assert len("".join(delivered)) < len(answer)
@@ -1,4 +1,5 @@
-from unittest.mock import Mock
+import asyncio
+from unittest.mock import AsyncMock, Mock
 
 from src.ai_generation.bpmn_agent.simple.get_bpmn_node import generate_bpmn
 
@@ -8,9 +9,9 @@ from src.ai_generation.bpmn_agent.simple.get_bpmn_node import generate_bpmn
 def test_generation():
     """Test is generated xml in the state and AI API have been called"""
     client = Mock()
-    client.generate_response_text_based.return_value = "<bpmn>xml</bpmn>"
+    client.generate_response_text_based = AsyncMock(return_value="<bpmn>xml</bpmn>")
     state = {"previous_answer": "Test", "user_input": "Test"}
 
-    result = generate_bpmn(state, client, {})  # config empty due llm_mock
+    result = asyncio.run(generate_bpmn(state, client, {}))  # config empty due llm_mock
     assert result["previous_answer"] == "<bpmn>xml</bpmn>"
-    client.generate_response_text_based.assert_called_once()
+    client.generate_response_text_based.assert_awaited_once()
@@ -0,0 +1,59 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.ai_generation.bpmn_agent.simple.diagram_edit import edit_diagram
+from src.assemblers.xml.patch import PatchError
+from src.metrics import DIAGRAM_EDITS
+
+XML = open("data/XMLs/base_bpmn_diagram.xml", encoding="utf-8").read()
+
+# --- FIXTURES ---
+
+
+@pytest.fixture
+def client():
+    client = Mock()
+    client.generate_response_json_based = AsyncMock(
+        return_value=json.dumps(
+            {
+                "operations": [
+                    {
+                        "op": "rename_node",
+                        "id": "Task_1",
+                        "type": "",
+                        "name": "Approve order",
+                        "from": "",
+                        "to": "",
+                    }
+                ]
+            }
+        )
+    )
+    return client
+
+
+# --- TESTS ---
+
+
+def test_edit_sends_outline_and_applies_patch(client):
+    renamed_before = DIAGRAM_EDITS.value(op="rename_node")
+
+    result = asyncio.run(edit_diagram(XML, "Rename the task", llm=client))
+
+    assert 'name="Approve order"' in result["output"]
+    assert [op["op"] for op in result["operations"]] == ["rename_node"]
+    assert DIAGRAM_EDITS.value(op="rename_node") == renamed_before + 1
+    prompt = client.generate_response_json_based.await_args.args[0]
+    assert prompt.startswith("Diagram:\nNodes:\n")
+    assert prompt.endswith("Change request:\nRename the task")
+    assert "<bpmndi:" not in prompt
+
+
+def test_invalid_answer_raises_patch_error(client):
+    client.generate_response_json_based.return_value = "Sorry"
+
+    with pytest.raises(PatchError, match="Invalid edit answer"):
+        asyncio.run(edit_diagram(XML, "Rename the task", llm=client))
@@ -1,4 +1,5 @@
-from unittest.mock import Mock
+import asyncio
+from unittest.mock import AsyncMock, Mock
 
 from src.ai_generation.bpmn_agent.simple.imagine_procces_node import generate_process
 
@@ -8,9 +9,11 @@ from src.ai_generation.bpmn_agent.simple.imagine_procces_node import generate_pr
 def test_generate_procces():
     """Test is generated xml in the state and AI API have been called"""
     client = Mock()
-    client.generate_response_text_based.return_value = "Process of the plan>"
+    client.generate_response_text_based = AsyncMock(return_value="Process of the plan>")
     state = {"previous_answer": "Test", "user_input": "Test"}
 
-    result = generate_process(state, client, {})  # config empty due llm_mock
+    result = asyncio.run(
+        generate_process(state, client, {})
+    )  # config empty due llm_mock
     assert result["previous_answer"] == "Process of the plan>"
-    client.generate_response_text_based.assert_called_once()
+    client.generate_response_text_based.assert_awaited_once()
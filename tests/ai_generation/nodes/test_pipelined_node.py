@@ -0,0 +1,142 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+from src.ai_generation.bpmn_agent.simple.pipelined_node import (
+    generate_process_and_bpmn,
+)
+from src.ai_generation.bpmn_agent.simple.streaming import STREAM_TOKENS_KEY
+
+SCRIPT_DIR = "src.ai_generation.bpmn_agent.simple"
+
+DESCRIPTION = [
+    "1. DOMAIN: Orders\n2. POOLS: Customer, Shop\n",
+    "3. FLOW:\n  - [Customer] -> (Order)\n",
+    "4. MESSAGE_EX",
+    "CHANGES:\n  - Shop -> Customer: invoice\n",
+    "  - Customer -> Shop: payment\n",
+]
+
+
+# --- FIXTURES ---
+
+
+def make_client(events: list, xml_delay: float = 0):
+    async def stream(prompt, use_cache=True, **kwargs):
+        if prompt != "Order process":
+            await asyncio.sleep(xml_delay)
+            events.append(("generate", prompt))
+            yield "<bpmn>xml</bpmn>"
+            return
+        try:
+            for chunk in DESCRIPTION:
+                await asyncio.sleep(0.01)
+                events.append(("imagine", chunk))
+                yield chunk
+        finally:
+            events.append(("closed", ""))
+
+    async def generate(prompt, use_cache=True, **kwargs):
+        events.append(("generate", prompt))
+        return "<bpmn>xml</bpmn>"
+
+    client = Mock()
+    client.stream_response_text_based = stream
+    client.generate_response_text_based = AsyncMock(side_effect=generate)
+    return client
+
+
+# --- TEST ---
+
+
+def test_xml_starts_before_description_ends():
+    """XML call starts at the section heading split across chunks,
+    the sections after it are not generated at all"""
+    events = []
+    client = make_client(events)
+    state = {"user_input": "Order process", "previous_answer": ""}
+
+    result = asyncio.run(
+        generate_process_and_bpmn(state, client, {}, {}, "MESSAGE_EXCHANGES")
+    )
+
+    assert result["previous_answer"] == "<bpmn>xml</bpmn>"
+    stages = [stage for stage, _ in events]
+    assert stages == ["imagine"] * 4 + ["closed", "generate"]
+    client.generate_response_text_based.assert_awaited_once_with(
+        "".join(DESCRIPTION[:2]).rstrip(), use_cache=True
+    )
+
+
+def test_rest_of_description_only_streamed_to_ui(mocker):
+    """With token streaming the later sections reach the UI but not the XML prompt"""
+    events, written = [], []
+    client = make_client(events, xml_delay=0.1)
+    writer = mocker.patch(SCRIPT_DIR + ".pipelined_node.get_stream_writer")
+    writer.return_value = written.append
+    mocker.patch(SCRIPT_DIR + ".streaming.get_stream_writer", writer)
+    state = {"user_input": "Order process", "previous_answer": ""}
+    config = {"configurable": {STREAM_TOKENS_KEY: True}}
+
+    result = asyncio.run(
+        generate_process_and_bpmn(
+            state, client, {}, {}, "MESSAGE_EXCHANGES", config=config
+        )
+    )
+
+    assert result["previous_answer"] == "<bpmn>xml</bpmn>"
+    xml_prompts = [prompt for stage, prompt in events if stage == "generate"]
+    assert xml_prompts == [
+        "1. DOMAIN: Orders\n2. POOLS: Customer, Shop\n3. FLOW:\n  - [Customer] -> (Order)"
+    ]
+    assert "MESSAGE_EXCHANGES" not in xml_prompts[0]
+    imagined = "".join(
+        e["data"] for e in written if e.get("stage") == "imagine" and "data" in e
+    )
+    assert imagined == "".join(DESCRIPTION)
+    assert ("closed", "") in events
+
+
+def test_description_closed_when_xml_is_first(mocker):
+    """A description still streaming when the XML is done is cancelled"""
+
+    async def slow_rest(prompt, use_cache=True, **kwargs):
+        if prompt != "Order process":
+            yield "<bpmn>xml</bpmn>"
+            return
+        try:
+            for chunk in DESCRIPTION[:4]:
+                yield chunk
+            await asyncio.sleep(10)
+            yield DESCRIPTION[4]
+        finally:
+            events.append("closed")
+
+    events = []
+    client = Mock()
+    client.stream_response_text_based = slow_rest
+    mocker.patch(SCRIPT_DIR + ".pipelined_node.get_stream_writer", return_value=Mock())
+    mocker.patch(SCRIPT_DIR + ".streaming.get_stream_writer", return_value=Mock())
+    state = {"user_input": "Order process", "previous_answer": ""}
+    config = {"configurable": {STREAM_TOKENS_KEY: True}}
+
+    result = asyncio.run(
+        asyncio.wait_for(
+            generate_process_and_bpmn(
+                state, client, {}, {}, "MESSAGE_EXCHANGES", config=config
+            ),
+            timeout=5,
+        )
+    )
+
+    assert result["previous_answer"] == "<bpmn>xml</bpmn>"
+    assert events == ["closed"]
+
+
+def test_xml_gets_full_description_without_heading():
+    events = []
+    client = make_client(events)
+    state = {"user_input": "Order process", "previous_answer": ""}
+
+    asyncio.run(generate_process_and_bpmn(state, client, {}, {}, "MISSING_SECTION"))
+
+    assert events[-2:] == [("closed", ""), ("generate", "".join(DESCRIPTION))]
@@ -0,0 +1,87 @@
+import asyncio
+import re
+from unittest.mock import AsyncMock, Mock
+
+from src.ai_generation.bpmn_agent.simple import validate_node
+from src.ai_generation.bpmn_agent.simple.validate_node import validate_bpmn_answer
+from src.metrics import BPMN_VALIDATION
+
+XML = open("data/XMLs/bpmn_schema.xml", encoding="utf-8").read()
+NO_START = XML.replace("bpmn:startEvent", "bpmn:intermediateThrowEvent")
+
+# --- TEST ---
+
+
+def test_valid_answer_kept_without_llm():
+    client = Mock()
+    client.generate_response_text_based = AsyncMock()
+    state = {"previous_answer": XML, "user_input": "Test"}
+
+    result = asyncio.run(validate_bpmn_answer(state, client, {}))
+
+    assert result["previous_answer"] is XML
+    client.generate_response_text_based.assert_not_awaited()
+
+
+def test_fault_repaired_locally():
+    """Missing DI is rebuilt without asking the model"""
+    client = Mock()
+    client.generate_response_text_based = AsyncMock()
+    broken = re.sub(r"<bpmndi:BPMNDiagram[\s\S]*</bpmndi:BPMNDiagram>", "", XML)
+    repaired_before = BPMN_VALIDATION.value(result="repaired")
+
+    result = asyncio.run(validate_bpmn_answer({"previous_answer": broken}, client, {}))
+
+    assert "<bpmndi:BPMNShape" in result["previous_answer"]
+    assert BPMN_VALIDATION.value(result="repaired") == repaired_before + 1
+    client.generate_response_text_based.assert_not_awaited()
+
+
+def test_unrepairable_answer_sent_to_llm():
+    """The fix-up prompt lists the problems, the fixed document is used"""
+    client = Mock()
+    client.generate_response_text_based = AsyncMock(return_value=XML)
+
+    result = asyncio.run(
+        validate_bpmn_answer(
+            {"previous_answer": NO_START}, client, {"system_prompt": "Fix"}
+        )
+    )
+
+    assert result["previous_answer"] == XML
+    prompt = client.generate_response_text_based.await_args.args[0]
+    assert prompt.startswith("Problems:\n- Process Process_{{PROCESS_ID}} has no start")
+    assert NO_START in prompt
+
+
+def test_failed_fixup_keeps_answer():
+    client = Mock()
+    client.generate_response_text_based = AsyncMock(side_effect=RuntimeError("down"))
+
+    result = asyncio.run(
+        validate_bpmn_answer({"previous_answer": NO_START}, client, {})
+    )
+    without_fixup = asyncio.run(
+        validate_bpmn_answer({"previous_answer": NO_START}, client, None)
+    )
+
+    assert result["previous_answer"] == NO_START
+    assert without_fixup["previous_answer"] == NO_START
+    client.generate_response_text_based.assert_awaited_once()
+
+
+def test_failing_repair_falls_back(monkeypatch):
+    """An exception in the local repair goes to the fix-up, then the answer is kept"""
+    client = Mock()
+    client.generate_response_text_based = AsyncMock(return_value=XML)
+    monkeypatch.setattr(
+        validate_node, "repair_bpmn", Mock(side_effect=ValueError("broken"))
+    )
+
+    result = asyncio.run(
+        validate_bpmn_answer({"previous_answer": NO_START}, client, {})
+    )
+
+    assert result["previous_answer"] == NO_START
+    prompt = client.generate_response_text_based.await_args.args[0]
+    assert prompt.startswith("Problems:\n- broken")
@@ -1,10 +1,27 @@
-from unittest.mock import Mock
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
 
 from src.schemas import SUserInputData
-from src.ai_generation.bpmn_agent.simple.agent import invoke_agent
+from src.ai_generation.bpmn_agent.simple.agent import (
+    invoke_agent,
+    invoke_agent_batch,
+    stream_agent,
+)
+from src.ai_generation.prompt_index import PromptSimilarityIndex
 
 SCRIPT_DIR = "src.ai_generation.bpmn_agent.simple.agent"
 
+
+# --- FIXTURES ---
+@pytest.fixture(autouse=True)
+def prompt_index(mocker):
+    """Fresh prompt index for every test"""
+    index = PromptSimilarityIndex()
+    mocker.patch(SCRIPT_DIR + ".get_prompt_index", return_value=index)
+    return index
+
+
 # --- TESTS ---
 
 
@@ -14,23 +31,24 @@ def test_agent_invoke(mocker):
     Tets does invoke agent build and call agent
     """
     mock_agent = mocker.patch(SCRIPT_DIR + "._agent")
-    mock_agent.invoke.return_value = {"result": "success"}
+    mock_agent.ainvoke = AsyncMock(return_value={"result": "success"})
     test_user_data = SUserInputData(user_input="Send me success")
 
-    result = invoke_agent(test_user_data)
+    result = asyncio.run(invoke_agent(test_user_data))
 
-    mock_agent.invoke.assert_called_once_with(
+    mock_agent.ainvoke.assert_awaited_once_with(
         {
             "user_input": "Send me success",
             "previous_stage": "",  # under the logic. Basic config for first call
-        }
+        },
+        config={"configurable": {"use_cache": True}},
     )
     assert result == {"result": "success"}  # Result should be the agent returns
 
 
 def test_agent_full_flow(mocker):
     """Test agent do not fall down during call"""
-    mock_llm = mocker.patch(SCRIPT_DIR + ".get_llm_client")
+    mock_llm = mocker.patch(SCRIPT_DIR + ".get_async_llm_client")
     mock_process_node = mocker.patch(SCRIPT_DIR + ".generate_process")
     mock_bpmn_node = mocker.patch(SCRIPT_DIR + ".generate_bpmn")
 
@@ -38,7 +56,158 @@ def test_agent_full_flow(mocker):
     mock_process_node.return_value = {"result": "called"}
     mock_bpmn_node.return_value = {"result": "called"}
 
-    invoke_agent(SUserInputData(user_input="Test flow"))
+    asyncio.run(invoke_agent(SUserInputData(user_input="Test flow")))
 
     assert mock_process_node.called
     assert mock_process_node.called
+
+
+def test_agent_stream_events(mocker):
+    """
+    Stream should carry stage markers and tokens of both stages,
+    the XML as soon as the closing tag arrives and a final event.
+    """
+    answers = {
+        "Test stream": ["Process ", "plan"],
+        "Process plan": ["<bpmn:definitions>", "</bpmn:defin", "itions>", " trailing"],
+    }
+
+    async def fake_stream(prompt, use_cache, **kwargs):
+        for delta in answers[prompt]:
+            yield delta
+
+    mock_llm = mocker.patch(SCRIPT_DIR + ".get_async_llm_client")
+    mock_llm.return_value.stream_response_text_based = fake_stream
+    # Not a valid document, the fix-up cannot help either
+    mock_llm.return_value.generate_response_text_based = AsyncMock(return_value="")
+    mocker.patch(SCRIPT_DIR + "._agent", None)
+
+    async def collect():
+        return [e async for e in stream_agent(SUserInputData(user_input="Test stream"))]
+
+    events = asyncio.run(collect())
+
+    stages = [e["stage"] for e in events if e["event"] == "stage"]
+    assert stages == ["imagine", "generate", "validate"]
+    xml_events = [e for e in events if e["event"] == "xml"]
+    assert xml_events == [
+        {"event": "xml", "data": "<bpmn:definitions></bpmn:definitions>"}
+    ]  # sent once, before the trailing token
+    assert events.index(xml_events[0]) < len(events) - 3
+    assert events[-1] == {
+        "event": "done",
+        "output": "<bpmn:definitions></bpmn:definitions> trailing",
+    }
+
+
+def test_similar_prompt_served_from_index(mocker, prompt_index):
+    """
+    Answered prompt should be reused for a paraphrase without running the graph.
+    """
+    xml = "<bpmn:definitions></bpmn:definitions>"
+    mock_agent = mocker.patch(SCRIPT_DIR + "._agent")
+    mock_agent.ainvoke = AsyncMock(return_value={"previous_answer": xml})
+
+    asyncio.run(invoke_agent(SUserInputData(user_input="Create a hiring process")))
+    result = asyncio.run(
+        invoke_agent(SUserInputData(user_input="create hiring process please"))
+    )
+
+    mock_agent.ainvoke.assert_awaited_once()  # second call served from index
+    assert result["previous_answer"] == xml
+    assert result["prompt_match"].similarity == 1.0
+
+    asyncio.run(
+        invoke_agent(
+            SUserInputData(user_input="create hiring process please"), use_cache=False
+        )
+    )
+    assert mock_agent.ainvoke.await_count == 2  # bypass skips the index
+
+
+def test_identical_requests_share_one_run(mocker):
+    """Concurrent identical requests should attach to one graph run"""
+
+    async def slow_answer(state, config=None):
+        await asyncio.sleep(0.01)
+        return {"previous_answer": "answer"}
+
+    mock_agent = mocker.patch(SCRIPT_DIR + "._agent")
+    mock_agent.ainvoke = AsyncMock(side_effect=slow_answer)
+
+    async def main():
+        return await asyncio.gather(
+            invoke_agent(SUserInputData(user_input="Order process")),
+            invoke_agent(SUserInputData(user_input=" order  PROCESS")),
+        )
+
+    results = asyncio.run(main())
+
+    assert mock_agent.ainvoke.await_count == 1
+    assert [r["previous_answer"] for r in results] == ["answer", "answer"]
+
+
+def test_prompts_differing_in_stop_words_run_separately(mocker):
+    """Words dropped by the prompt index still change the meaning"""
+
+    async def slow_answer(state, config=None):
+        await asyncio.sleep(0.01)
+        return {"previous_answer": state["user_input"]}
+
+    mock_agent = mocker.patch(SCRIPT_DIR + "._agent")
+    mock_agent.ainvoke = AsyncMock(side_effect=slow_answer)
+
+    async def main():
+        return await asyncio.gather(
+            invoke_agent(SUserInputData(user_input="Order process for me")),
+            invoke_agent(SUserInputData(user_input="Order process for us")),
+            invoke_agent(SUserInputData(user_input="Order process for me"), False),
+        )
+
+    results = asyncio.run(main())
+
+    assert mock_agent.ainvoke.await_count == 3
+    assert [r["previous_answer"] for r in results] == [
+        "Order process for me",
+        "Order process for us",
+        "Order process for me",
+    ]
+
+
+def test_batch_runs_with_cap_and_survives_failures(mocker):
+    """
+    Batch yields every input in completion order with its index,
+    a failing input is reported without aborting the others.
+    """
+    running = {"now": 0, "max": 0}
+    delays = {"slow": 0.05, "fast": 0.0, "boom": 0.01, "mid": 0.01}
+
+    async def answer(state, config=None):
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        try:
+            await asyncio.sleep(delays[state["user_input"]])
+            if state["user_input"] == "boom":
+                raise RuntimeError("upstream failed")
+            return {"previous_answer": state["user_input"]}
+        finally:
+            running["now"] -= 1
+
+    mock_agent = mocker.patch(SCRIPT_DIR + "._agent")
+    mock_agent.ainvoke = AsyncMock(side_effect=answer)
+    inputs = [SUserInputData(user_input=t) for t in ["slow", "fast", "boom", "mid"]]
+
+    async def collect():
+        return [item async for item in invoke_agent_batch(inputs, concurrency=2)]
+
+    results = asyncio.run(collect())
+
+    assert running["max"] == 2
+    assert [index for index, _, _ in results] == [1, 2, 3, 0]
+    assert results[0][1]["previous_answer"] == "fast"
+    assert isinstance(results[1][2], RuntimeError)
+    assert sorted(r[1]["previous_answer"] for r in results if r[1]) == [
+        "fast",
+        "mid",
+        "slow",
+    ]
@@ -0,0 +1,99 @@
+import asyncio
+
+from src.ai_generation.hedging import Hedger, LatencyTracker
+
+# --- HELPERS ---
+
+
+def answer_after(delay: float, value: str):
+    async def call():
+        await asyncio.sleep(delay)
+        return value
+
+    return call
+
+
+def stream_after(delay: float, items: list[str], closed: list[str]):
+    async def stream():
+        try:
+            await asyncio.sleep(delay)
+            for item in items:
+                yield item
+        finally:
+            closed.append(items[0])
+
+    return stream
+
+
+# --- TESTS ---
+
+
+def test_fast_primary_not_hedged():
+    """Primary answering before the delay should not fire a hedge"""
+    hedger = Hedger("fallback", default_delay=0.05)
+
+    result = asyncio.run(
+        hedger.race("primary", answer_after(0, "p"), answer_after(0, "h"))
+    )
+
+    assert result == "p"
+    assert hedger.stats()["hedged"] == 0
+    assert len(hedger.response_latency) == 1
+
+
+def test_slow_primary_loses_to_hedge():
+    """Slow primary should be hedged and the fallback answer taken"""
+    hedger = Hedger("fallback", default_delay=0.01)
+
+    result = asyncio.run(
+        hedger.race("primary", answer_after(1, "p"), answer_after(0, "h"))
+    )
+
+    stats = hedger.stats()
+    assert result == "h"
+    assert stats["hedge_rate"] == 1.0
+    assert stats["wins"] == {"fallback": 1}
+    assert stats["win_rate"] == {"primary": 0.0, "fallback": 1.0}
+    # The losing primary still leaves a lower bound of its latency
+    assert len(hedger.response_latency) == 1
+
+
+def test_stream_race_closes_loser():
+    """Stream with the first token wins, the other stream is closed"""
+    hedger = Hedger("fallback", default_delay=0.01)
+    closed = []
+
+    async def collect():
+        stream = hedger.race_stream(
+            "primary",
+            stream_after(1, ["slow"], closed),
+            stream_after(0, ["fast", "tail"], closed),
+        )
+        return [item async for item in stream]
+
+    assert asyncio.run(collect()) == ["fast", "tail"]
+    assert sorted(closed) == ["fast", "slow"]
+
+
+def test_percentile_delay():
+    """Hedge delay should follow the latency percentile once warmed up"""
+    hedger = Hedger("fallback", percentile=0.9, min_delay=0, min_samples=10)
+    for latency in range(1, 11):
+        hedger.response_latency.add(float(latency))
+
+    assert hedger.hedge_delay(hedger.response_latency) == 9.0
+    assert LatencyTracker().percentile(0.5) is None
+
+
+def test_censored_samples_keep_the_tail():
+    """Primaries that lost a race should still push the delay up"""
+    tracker = LatencyTracker()
+    for latency in range(1, 9):
+        tracker.add(float(latency))
+    tracker.add(9.5, censored=True)
+    tracker.add(9.5, censored=True)
+
+    # Without the lost races the p90 would be 8 and keep dropping
+    assert tracker.percentile(0.5) == 5.0
+    assert tracker.percentile(0.9) == 9.5
+    assert tracker.expected_remaining(9.0) == 0.5
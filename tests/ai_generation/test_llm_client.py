@@ -1,6 +1,8 @@
+import asyncio
 import pytest
-from unittest.mock import Mock, MagicMock
-from src.ai_generation.llm_client import LLMClient
+from unittest.mock import AsyncMock, Mock, MagicMock
+from src.ai_generation.llm_client import AsyncLLMClient, LLMClient
+from src.ai_generation.response_cache import ResponseCache
 
 
 # --- FIXTURES ---
@@ -79,3 +81,104 @@ def test_generate_response_json_structure(client, openai_client):
     }  # should be "{"key": "value"}" format
 
     assert openai_client.chat.completions.create.call_count == 1
+
+
+def test_static_system_prompt_marked_cacheable(openai_client):
+    """
+    Static system prompt should be sent as a content block with cache_control,
+    unless prompt caching is disabled for the client.
+    """
+    response = MagicMock()
+    response.choices[0].message.content = "<xml/>"
+    openai_client.chat.completions.create.return_value = response
+
+    LLMClient(openai_client, "test-model").generate_response_text_based(
+        prompt="Order process", system_prompt="Long XML rules", cache_system_prompt=True
+    )
+    LLMClient(
+        openai_client, "test-model", prompt_caching=False
+    ).generate_response_text_based(
+        prompt="Order process", system_prompt="Long XML rules", cache_system_prompt=True
+    )
+
+    cached, plain = [
+        c.kwargs["messages"][0]
+        for c in openai_client.chat.completions.create.call_args_list
+    ]
+    assert cached == {
+        "role": "system",
+        "content": [
+            {
+                "type": "text",
+                "text": "Long XML rules",
+                "cache_control": {"type": "ephemeral"},
+            }
+        ],
+    }
+    assert plain == {"role": "system", "content": "Long XML rules"}
+
+
+def test_async_client_sends_same_request(openai_client):
+    """
+    Async client should build exactly the same request as the sync one
+    and await the underlying AsyncOpenAI call.
+    """
+    response = MagicMock()
+    response.choices[0].message.content = "Hello"
+    openai_client.chat.completions.create = AsyncMock(return_value=response)
+    client = AsyncLLMClient(openai_client, "test-model")
+
+    result = asyncio.run(
+        client.generate_response_text_based(prompt="Say hi", system_prompt="Be polite")
+    )
+
+    assert result == "Hello"
+    openai_client.chat.completions.create.assert_awaited_once_with(
+        model="test-model",
+        messages=[
+            {"role": "system", "content": "Be polite"},
+            {"role": "user", "content": "Say hi"},
+        ],
+        temperature=None,
+        response_format=None,
+        extra_body={"reasoning": {"effort": "none"}},
+    )
+
+
+def test_cached_response_skips_api(openai_client):
+    """
+    Deterministic call should be cached, bypass should reach the API.
+    """
+    response = MagicMock()
+    response.choices[0].message.content = "Hello"
+    openai_client.chat.completions.create.return_value = response
+    client = LLMClient(openai_client, "test-model", cache=ResponseCache())
+
+    for _ in range(2):
+        client.generate_response_text_based("Say hi", "Be polite", temperature=0)
+    assert openai_client.chat.completions.create.call_count == 1
+
+    client.generate_response_text_based(
+        "Say hi", "Be polite", temperature=0, use_cache=False
+    )
+    assert openai_client.chat.completions.create.call_count == 2
+
+
+def test_sampled_response_cached_only_when_allowed(openai_client):
+    """
+    Calls with temperature > 0 should not be cached by default.
+    """
+    response = MagicMock()
+    response.choices[0].message.content = "Hello"
+    openai_client.chat.completions.create.return_value = response
+    client = LLMClient(openai_client, "test-model", cache=ResponseCache())
+
+    for _ in range(2):
+        client.generate_response_text_based("Say hi", "Be polite", temperature=0.7)
+    assert openai_client.chat.completions.create.call_count == 2
+
+    for _ in range(2):
+        client.generate_response_text_based(
+            "Say hi", "Be polite", temperature=0.7, cache_sampled=True
+        )
+    assert openai_client.chat.completions.create.call_count == 3
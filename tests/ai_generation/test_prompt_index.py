@@ -0,0 +1,77 @@
+from settings import settings
+from src.ai_generation import prompt_index
+from src.ai_generation.prompt_index import (
+    PromptSimilarityIndex,
+    get_prompt_index,
+    shingles,
+)
+
+ORDER_PROMPT = (
+    "Employee submits a purchase request, the department head reviews it, "
+    "procurement picks the cheapest supplier and finance pays the invoice"
+)
+
+# --- TESTS ---
+
+
+def test_paraphrase_is_found():
+    """Stop words, punctuation and case should not matter"""
+    index = PromptSimilarityIndex(threshold=0.8)
+    index.add("Create a hiring process", "<xml/>")
+
+    match = index.lookup("create hiring process please!")
+
+    assert match is not None
+    assert match.value == "<xml/>"
+    assert match.similarity == 1.0
+
+
+def test_different_prompt_is_missed():
+    """Unrelated prompt should be below the threshold"""
+    index = PromptSimilarityIndex(threshold=0.8)
+    index.add("Create a hiring process", "<xml/>")
+
+    assert index.lookup("Create an order fulfilment process") is None
+    assert index.stats() == {"hits": 0, "misses": 1, "hit_rate": 0.0, "entries": 1}
+
+
+def test_oldest_entries_evicted():
+    """Index should keep at most max_entries prompts"""
+    index = PromptSimilarityIndex(max_entries=2)
+    index.add("hiring process", "1")
+    index.add("order fulfilment", "2")
+    index.add("invoice approval", "3")
+
+    assert len(index) == 2
+    assert index.lookup("hiring process") is None
+    assert index.lookup("invoice approval").value == "3"
+
+
+def test_empty_prompt_shingles():
+    """Prompt of stop words only has no shingles and is not indexed"""
+    index = PromptSimilarityIndex()
+    assert shingles("please, the") == frozenset()
+
+    index.add("please, the", "x")
+    assert len(index) == 0
+
+
+def test_one_changed_word_is_missed():
+    """Default threshold should not reuse a diagram of a different process"""
+    index = PromptSimilarityIndex()
+    index.add(ORDER_PROMPT, "<xml/>")
+
+    assert index.lookup(ORDER_PROMPT.replace("reviews", "rejects")) is None
+    assert index.lookup(ORDER_PROMPT.replace("cheapest", "fastest")) is None
+    assert index.lookup(ORDER_PROMPT + ".").value == "<xml/>"
+
+
+def test_index_off_while_sampled_caching_disallowed(monkeypatch):
+    """Stored diagrams replay sampled answers, the cache rule must allow it"""
+    monkeypatch.setattr(prompt_index, "_prompt_index", None)
+    monkeypatch.setattr(settings, "PROMPT_INDEX_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_CACHE_ALLOW_SAMPLED", False)
+    assert get_prompt_index() is None
+
+    monkeypatch.setattr(settings, "LLM_CACHE_ALLOW_SAMPLED", True)
+    assert isinstance(get_prompt_index(), PromptSimilarityIndex)
@@ -0,0 +1,70 @@
+import pytest
+
+from src.ai_generation.response_cache import ResponseCache
+
+
+# --- FIXTURES ---
+@pytest.fixture
+def db_path(tmp_path) -> str:
+    return str(tmp_path / "cache.sqlite3")
+
+
+# --- TESTS ---
+def test_memory_lru_eviction():
+    """Least recently used entry should be evicted from memory tier"""
+    cache = ResponseCache(memory_size=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")  # "b" becomes least recently used
+    cache.set("c", "3")
+
+    assert cache.get("a") == "1"
+    assert cache.get("b") is None
+    assert cache.get("c") == "3"
+
+
+def test_disk_tier_survives_restart(db_path):
+    """Responses should be served from disk by a new cache instance"""
+    ResponseCache(db_path=db_path).set("key", "value")
+
+    cache = ResponseCache(db_path=db_path)
+    assert cache.get("key") == "value"  # disk hit
+    assert cache.get("key") == "value"  # promoted to memory
+
+    stats = cache.stats()
+    assert stats["disk_hits"] == 1
+    assert stats["memory_hits"] == 1
+    assert stats["hit_ratio"] == 1.0
+
+
+def test_ttl_expiration(db_path, mocker):
+    """Expired entries should be misses in both tiers"""
+    cache = ResponseCache(db_path=db_path, ttl_seconds=10)
+    time_mock = mocker.patch("src.ai_generation.response_cache.time.time")
+    time_mock.return_value = 1000.0
+    cache.set("key", "value")
+
+    time_mock.return_value = 1011.0
+    assert cache.get("key") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_disk_size_eviction(db_path):
+    """Disk tier should keep at most disk_size entries"""
+    cache = ResponseCache(db_path=db_path, memory_size=1, disk_size=2)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+
+    fresh = ResponseCache(db_path=db_path)
+    assert fresh.get("a") is None
+    assert fresh.get("b") == "b"
+    assert fresh.get("c") == "c"
+
+
+def test_key_depends_on_request():
+    """Any request field change should produce another key"""
+    request = {"model": "m", "temperature": 0, "extra_body": {"reasoning": "none"}}
+    other = {**request, "extra_body": {"reasoning": "high"}}
+
+    assert ResponseCache.make_key(request) == ResponseCache.make_key(dict(request))
+    assert ResponseCache.make_key(request) != ResponseCache.make_key(other)
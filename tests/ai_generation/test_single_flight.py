@@ -0,0 +1,66 @@
+import asyncio
+
+from src.ai_generation.single_flight import SingleFlight
+
+# --- TESTS ---
+
+
+def test_concurrent_calls_coalesced():
+    """Concurrent callers with the same key should share one execution"""
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(flight.run("key", work) for _ in range(5)))
+
+    results = asyncio.run(main())
+
+    assert results == ["result"] * 5
+    assert calls == 1
+    assert flight.stats() == {"started": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_one_caller_cancel_keeps_shared_run():
+    """Cancelling one caller should not cancel the run of the others"""
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "result"
+
+    async def main():
+        first = asyncio.create_task(flight.run("key", work))
+        second = asyncio.create_task(flight.run("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second, first.cancelled()
+
+    assert asyncio.run(main()) == ("result", True)
+
+
+def test_last_caller_cancel_stops_run():
+    """Run should be cancelled when every caller is gone"""
+    flight = SingleFlight()
+    finished = False
+
+    async def work():
+        nonlocal finished
+        await asyncio.sleep(0.02)
+        finished = True
+
+    async def main():
+        callers = [asyncio.create_task(flight.run("key", work)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.sleep(0.05)
+        return flight.in_flight()
+
+    assert asyncio.run(main()) == 0
+    assert finished is False
@@ -0,0 +1,157 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import httpx
+import openai
+import pytest
+
+from src.ai_generation.llm_client import AsyncLLMClient
+from src.ai_generation.upstream_scheduler import (
+    AdaptiveConcurrencyLimiter,
+    UpstreamQueueFull,
+    UpstreamScheduler,
+    UpstreamThrottled,
+    parse_retry_after,
+)
+
+SCRIPT_DIR = "src.ai_generation.upstream_scheduler"
+
+
+def make_status_error(
+    status: int, headers: dict | None = None
+) -> openai.APIStatusError:
+    request = httpx.Request("POST", "https://llm.test/v1/chat/completions")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    error_cls = openai.RateLimitError if status == 429 else openai.APIStatusError
+    return error_cls("upstream error", response=response, body=None)
+
+
+# --- FIXTURES ---
+@pytest.fixture
+def sleeps(mocker):
+    """Record backoff delays instead of sleeping"""
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    mocker.patch(SCRIPT_DIR + ".asyncio.sleep", fake_sleep)
+    return delays
+
+
+# --- TESTS ---
+def test_aimd_window():
+    """Window should shrink multiplicatively and grow additively"""
+    limiter = AdaptiveConcurrencyLimiter(initial=8, min_limit=1, max_limit=10)
+
+    async def cycle(**outcome):
+        await limiter.acquire()
+        limiter.release(**outcome)
+
+    asyncio.run(cycle(success=False, overloaded=True))
+    assert limiter.limit == 4
+
+    for _ in range(4):
+        asyncio.run(cycle(success=True))
+    assert 4.9 < limiter.limit < 5.0  # about +1 per window of successes
+
+
+def test_retry_respects_retry_after(sleeps):
+    """429 should be retried no sooner than Retry-After"""
+    scheduler = UpstreamScheduler(rate=0, max_retries=3)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise make_status_error(429, {"retry-after": "7"})
+        return "ok"
+
+    assert asyncio.run(scheduler.call(flaky)) == "ok"
+    assert sleeps == [7.0, 7.0]
+    assert scheduler.stats()["retries"] == 2
+    assert scheduler.limiter.in_flight == 0
+
+
+def test_long_retry_after_fails_fast(sleeps):
+    """Retry-After beyond the max backoff should fail fast, the API answers 503"""
+    scheduler = UpstreamScheduler(rate=0, backoff_max=20)
+
+    async def throttled():
+        raise make_status_error(429, {"retry-after": "3600"})
+
+    with pytest.raises(UpstreamThrottled) as error:
+        asyncio.run(scheduler.call(throttled))
+    assert error.value.retry_after == 3600
+    assert sleeps == []
+    assert scheduler.stats()["failures"] == 1
+
+
+def test_non_retryable_error_raised(sleeps):
+    """Client errors should not be retried"""
+    scheduler = UpstreamScheduler(rate=0)
+
+    async def bad_request():
+        raise make_status_error(400)
+
+    with pytest.raises(openai.APIStatusError):
+        asyncio.run(scheduler.call(bad_request))
+    assert sleeps == []
+
+
+def test_full_queue_fails_fast():
+    """Requests beyond the queue bound should be rejected right away"""
+    scheduler = UpstreamScheduler(
+        rate=0,
+        limiter=AdaptiveConcurrencyLimiter(initial=1, max_limit=1),
+        max_queue=1,
+    )
+
+    async def main():
+        gate = asyncio.Event()
+
+        async def hold():
+            await gate.wait()
+
+        running = asyncio.create_task(scheduler.call(hold))
+        queued = asyncio.create_task(scheduler.call(hold))
+        await asyncio.sleep(0)
+        with pytest.raises(UpstreamQueueFull):
+            await scheduler.call(hold)
+        gate.set()
+        await asyncio.gather(running, queued)
+
+    asyncio.run(main())
+    assert scheduler.stats()["rejected"] == 1
+
+
+def test_mid_stream_overload_shrinks_window():
+    """A 429 after the first streamed chunk should count as overload"""
+    limiter = AdaptiveConcurrencyLimiter(initial=8, min_limit=1, max_limit=10)
+    scheduler = UpstreamScheduler(rate=0, limiter=limiter)
+
+    async def chunks():
+        yield SimpleNamespace(
+            usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content="a"))]
+        )
+        raise make_status_error(429)
+
+    openai_client = Mock()
+    openai_client.chat.completions.create = AsyncMock(return_value=chunks())
+    client = AsyncLLMClient(openai_client, "test-model", scheduler=scheduler)
+
+    async def consume():
+        async for _ in client.stream_response_text_based("Hi", "Be short"):
+            pass
+
+    with pytest.raises(openai.RateLimitError):
+        asyncio.run(consume())
+    assert limiter.limit == 4
+    assert limiter.in_flight == 0
+
+
+def test_parse_retry_after_ms():
+    """retry-after-ms header should take precedence"""
+    error = make_status_error(429, {"retry-after-ms": "1500", "retry-after": "9"})
+    assert parse_retry_after(error) == 1.5
@@ -0,0 +1,137 @@
+from src.assemblers.xml.analysis import CsrGraph, analyze, analyze_xml
+from src.assemblers.xml.model import ProcessGraph
+
+
+def _graph(nodes: list[tuple[str, str]], edges: list[tuple[str, str]]) -> ProcessGraph:
+    graph = ProcessGraph("Process_1")
+    for node_id, node_type in nodes:
+        graph.add_node(node_id, node_type)
+    for i, (source, target) in enumerate(edges, 1):
+        graph.add_flow(f"Flow_{i}", source, target)
+    return graph
+
+
+# --- FIXTURES ---
+
+BALANCED = (
+    [
+        ("Start", "startEvent"),
+        ("Fork", "parallelGateway"),
+        ("A", "task"),
+        ("B", "task"),
+        ("Join", "parallelGateway"),
+        ("End", "endEvent"),
+    ],
+    [
+        ("Start", "Fork"),
+        ("Fork", "A"),
+        ("Fork", "B"),
+        ("A", "Join"),
+        ("B", "Join"),
+        ("Join", "End"),
+    ],
+)
+
+
+# --- TESTS ---
+
+
+def test_csr_adjacency_and_components():
+    csr = CsrGraph(4, [2, 0, 1, 0], [0, 1, 0, 3])
+
+    assert list(csr.indptr) == [0, 2, 3, 4, 4]
+    assert sorted(csr.indices[0:2]) == [1, 3]
+    assert list(csr.degrees()) == [2, 1, 1, 0]
+    assert list(csr.transpose().degrees()) == [2, 1, 0, 1]
+    assert list(csr.reachable([2])) == [1, 1, 1, 1]
+    component, count = csr.strongly_connected_components()
+    assert count == 3
+    assert component[0] == component[1] != component[3]
+
+
+def test_balanced_process_is_ok():
+    report = analyze(_graph(*BALANCED))
+
+    assert report.ok
+    assert report.gateway_balance == {"parallelGateway": {"splits": 1, "joins": 1}}
+    assert report.to_dict()["ok"] is True
+
+
+def test_structural_problems():
+    nodes, edges = BALANCED
+    nodes = nodes + [
+        ("Island", "task"),
+        ("Spin", "task"),
+        ("Spun", "task"),
+        ("Pass", "exclusiveGateway"),
+    ]
+    edges = [e for e in edges if e != ("B", "Join")] + [
+        ("Island", "Join"),  # join waits for an unreachable token
+        ("B", "Pass"),
+        ("Pass", "Spin"),
+        ("Spin", "Spun"),
+        ("Spun", "Spin"),  # no way out
+    ]
+
+    report = analyze(_graph(nodes, edges))
+
+    assert report.unreachable == ["Island"]
+    assert report.dead_ends == ["B", "Spin", "Spun", "Pass"]
+    assert report.deadlocks == ["Join"]
+    assert report.infinite_loops == [["Spin", "Spun"]]
+    assert report.loops == 1
+    assert [(g.id, g.problem) for g in report.unbalanced_gateways] == [
+        ("Pass", "pass_through")
+    ]
+    assert not report.ok
+
+
+def test_join_inside_loop_deadlocks():
+    nodes, edges = BALANCED
+    nodes = nodes + [("Retry", "exclusiveGateway")]
+    edges = [e for e in edges if e != ("Join", "End")] + [
+        ("Join", "Retry"),
+        ("Retry", "End"),
+        ("Retry", "Join"),  # back into the join, the other branch never repeats
+    ]
+
+    report = analyze(_graph(nodes, edges))
+
+    assert report.deadlocks == ["Join"]
+    assert report.loops == 1
+    assert report.infinite_loops == []
+    assert report.unbalanced_gateways == []
+
+
+def test_analyze_xml():
+    with open("data/XMLs/base_bpmn_diagram.xml", encoding="utf-8") as f:
+        report = analyze_xml(f.read())
+
+    assert report.ok
+    assert report.nodes == 4
+    for text in ("<nope", "<root/>"):
+        try:
+            analyze_xml(text)
+        except ValueError:
+            continue
+        raise AssertionError(f"{text} accepted")
+
+
+def test_analyze_xml_every_pool():
+    """Processes of all pools are analyzed, not only the first one"""
+    xml = """<bpmn:definitions xmlns:bpmn="http://www.omg.org/spec/BPMN/20100524/MODEL">
+      <bpmn:process id="Customer">
+        <bpmn:startEvent id="S1"/><bpmn:endEvent id="E1"/>
+        <bpmn:sequenceFlow id="F1" sourceRef="S1" targetRef="E1"/>
+      </bpmn:process>
+      <bpmn:process id="Shop">
+        <bpmn:startEvent id="S2"/><bpmn:task id="Lost"/><bpmn:endEvent id="E2"/>
+        <bpmn:sequenceFlow id="F2" sourceRef="S2" targetRef="E2"/>
+      </bpmn:process>
+    </bpmn:definitions>"""
+
+    report = analyze_xml(xml)
+
+    assert (report.nodes, report.flows) == (5, 2)
+    assert report.unreachable == ["Lost"]
+    assert not report.ok
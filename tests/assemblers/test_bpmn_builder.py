@@ -0,0 +1,89 @@
+import pytest
+from lxml import etree
+
+from src.assemblers.xml.bpmn import BpmnBuilder
+
+NODES = [
+    ("startEvent", "Start", None),
+    ("task", "Task_1", 'Check "A" & <B>\nthen C'),
+    ("endEvent", "End", "Done"),
+]
+FLOWS = [
+    ("Flow_1", "Start", "Task_1", None),
+    ("Flow_2", "Task_1", "End", "Yes"),
+]
+SHAPES = [
+    ("Start", 150, 100, 36, 36),
+    ("Task_1", 236.5, 78, 100, 80),
+    ("End", "400", 100, 36, 36),
+]
+EDGES = {
+    "Flow_1": [(186, 118), (236.5, 118)],
+    "Flow_2": [(336.5, 118), (400, 118)],
+}
+
+
+def _builder() -> BpmnBuilder:
+    builder = BpmnBuilder().create_definitions("Definitions_1")
+    builder.start_process("Process_1", "Test")
+    builder.init_diagram("Process_1")
+    return builder
+
+
+# --- TESTS ---
+
+
+def test_bulk_methods_match_single_elements():
+    single = _builder()
+    for row in NODES:
+        single.add_node(*row)
+    for row in FLOWS:
+        single.add_flow(*row)
+    for row in SHAPES:
+        single.add_shape(*row)
+    for flow_id, points in EDGES.items():
+        single.add_edge(flow_id, points)
+
+    bulk = _builder()
+    bulk.add_nodes(NODES).add_flows(FLOWS).add_shapes(SHAPES).add_edges(EDGES)
+
+    assert bulk.to_string() == single.to_string()
+    task = bulk.get_element("Task_1")
+    assert task.get("name") == 'Check "A" & <B>\nthen C'
+    assert task.getparent() is bulk._current_process
+    assert bulk.get_di("End").find("dc:Bounds", bulk._namespaces).get("x") == "400"
+    assert bulk.get_di("Flow_2").get("id") == "Flow_2_di"
+
+
+def test_bulk_accepts_columns():
+    builder = _builder()
+    types, ids, names = ["task"] * 3, ["A", "B", "C"], ["a", "b", None]
+
+    builder.add_nodes(zip(types, ids, names))
+
+    assert [builder.get_element(i).get("name") for i in ids] == ["a", "b", None]
+
+
+@pytest.mark.parametrize(
+    "nodes",
+    [
+        [("task foo='x'", "A", None)],
+        [("task", "A", "bad \x01 char")],
+    ],
+)
+def test_bulk_rejects_invalid_data(nodes):
+    builder = _builder()
+
+    with pytest.raises(ValueError):
+        builder.add_nodes(nodes)
+    assert len(builder._current_process) == 0
+
+
+def test_bulk_requires_context():
+    builder = BpmnBuilder().create_definitions("Definitions_1")
+
+    with pytest.raises(ValueError, match="Start a process"):
+        builder.add_nodes(NODES)
+    with pytest.raises(ValueError, match="Init diagram"):
+        builder.add_shapes(SHAPES)
+    assert etree.QName(builder.root).localname == "definitions"
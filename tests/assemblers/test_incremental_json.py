@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from src.assemblers.json.incremental import IncrementalJsonParser
+
+
+def _feed(text: str, size: int) -> tuple[IncrementalJsonParser, list]:
+    parser, events = IncrementalJsonParser(), []
+    for i in range(0, len(text), size):
+        events += parser.feed(text[i : i + size])
+    return parser, events
+
+
+# --- FIXTURES ---
+
+DOC = {
+    "name": 'Say "hi" \\ [x]',
+    "nodes": [
+        {"id": "s,1", "type": "startEvent", "name": "}{"},
+        {"id": "e", "type": "endEvent", "name": "é"},
+    ],
+    "flows": [],
+    "meta": {"tags": [1, 2]},
+    "count": 2,
+}
+
+
+# --- TESTS ---
+
+
+@pytest.mark.parametrize("size", [1, 3, 1000])
+def test_items_and_members_in_order(size):
+    """Strings with structural characters and escapes split at any chunk"""
+    parser, events = _feed("```json\n" + json.dumps(DOC) + "\n```", size)
+
+    parser.close()
+    assert events == [
+        ("name", None, DOC["name"]),
+        ("nodes", 0, DOC["nodes"][0]),
+        ("nodes", 1, DOC["nodes"][1]),
+        ("meta", None, DOC["meta"]),
+        ("count", None, 2),
+    ]
+    assert parser.members == ["name", "nodes", "flows", "meta", "count"]
+
+
+def test_item_emitted_when_it_closes():
+    parser = IncrementalJsonParser()
+
+    assert parser.feed('{"nodes": [{"id": "a"}, {"id"') == [("nodes", 0, {"id": "a"})]
+    assert parser.feed(': "b"}') == []
+    assert parser.feed("]") == [("nodes", 1, {"id": "b"})]
+    with pytest.raises(ValueError, match="incomplete"):
+        parser.close()
+
+
+def test_invalid_item_raises():
+    with pytest.raises(ValueError):
+        IncrementalJsonParser().feed('{"nodes": [{"id": a}]}')
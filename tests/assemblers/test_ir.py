@@ -0,0 +1,130 @@
+import json
+import pytest
+from lxml import etree
+from src.assemblers.json.ir import (
+    IRValidationError,
+    IrStreamAssembler,
+    ir_to_director_data,
+    ir_to_xml,
+)
+
+NS = {
+    "bpmn": "http://www.omg.org/spec/BPMN/20100524/MODEL",
+    "bpmndi": "http://www.omg.org/spec/BPMN/20100524/DI",
+    "di": "http://www.omg.org/spec/DD/20100524/DI",
+}
+
+
+# --- FIXTURES ---
+
+
+@pytest.fixture
+def ir() -> dict:
+    return {
+        "name": "Approval",
+        "nodes": [
+            {"id": "s1", "type": "startEvent", "name": "Start"},
+            {"id": "t1", "type": "userTask", "name": "Approve"},
+            {"id": "g1", "type": "exclusiveGateway", "name": "Approved?"},
+            {"id": "e1", "type": "endEvent", "name": "Done"},
+        ],
+        "flows": [
+            {"from": "s1", "to": "t1", "name": ""},
+            {"from": "t1", "to": "g1", "name": ""},
+            {"from": "g1", "to": "e1", "name": "Yes"},
+            {"from": "g1", "to": "t1", "name": "No"},
+        ],
+    }
+
+
+# --- TESTS ---
+
+
+def test_ir_assembled_with_layout(ir):
+    """Every node gets a shape and every flow an edge with waypoints"""
+    xml = ir_to_xml("```json\n" + json.dumps(ir) + "\n```")  # fences tolerated
+
+    root = etree.fromstring(xml.encode("utf-8"))
+    flows = root.findall(".//bpmn:sequenceFlow", NS)
+    shapes = root.findall(".//bpmndi:BPMNShape", NS)
+    edges = root.findall(".//bpmndi:BPMNEdge", NS)
+
+    assert [f.get("id") for f in flows] == ["Flow_1", "Flow_2", "Flow_3", "Flow_4"]
+    assert flows[2].get("name") == "Yes"
+    assert {s.get("bpmnElement") for s in shapes} == {"s1", "t1", "g1", "e1"}
+    assert [e.get("bpmnElement") for e in edges] == [f.get("id") for f in flows]
+    assert all(len(e.findall("di:waypoint", NS)) >= 2 for e in edges)
+
+
+def test_ir_ids_made_xml_safe(ir):
+    ir["nodes"][1]["id"] = "1 approve"
+    for flow in ir["flows"]:
+        for key in ("from", "to"):
+            if flow[key] == "t1":
+                flow[key] = "1 approve"
+
+    data = ir_to_director_data(ir)
+
+    assert data["process"]["nodes"][1]["id"] == "Node_1_approve"
+    assert data["flow"]["flows"][0]["targetRef"] == "Node_1_approve"
+
+
+def test_ir_ids_clashing_with_generated_ids_renamed(ir):
+    """Node ids like Flow_1 would be duplicated by the generated ids"""
+    renames = {"t1": "Flow_1", ir["nodes"][0]["id"]: "Process_1"}
+    for node in ir["nodes"]:
+        node["id"] = renames.get(node["id"], node["id"])
+    for flow in ir["flows"]:
+        for key in ("from", "to"):
+            flow[key] = renames.get(flow[key], flow[key])
+    ir["nodes"].append({"id": "Flow_1_di", "type": "task", "name": "DI"})
+
+    root = etree.fromstring(ir_to_xml(json.dumps(ir)).encode("utf-8"))
+
+    ids = [element.get("id") for element in root.iter() if element.get("id")]
+    assert len(ids) == len(set(ids))
+    assert {"Flow_1_node", "Process_1_node", "Flow_1_di_node"} <= set(ids)
+
+
+@pytest.mark.parametrize(
+    "broken",
+    [
+        lambda ir: ir["flows"].append({"from": "t1", "to": "missing", "name": ""}),
+        lambda ir: ir["nodes"].append({"id": "t1", "type": "task", "name": "Dup"}),
+        lambda ir: ir["nodes"][1].update(type="lane"),
+        lambda ir: ir["nodes"].pop(0),
+    ],
+)
+def test_invalid_ir_rejected(ir, broken):
+    broken(ir)
+
+    with pytest.raises(IRValidationError):
+        ir_to_xml(json.dumps(ir))
+
+
+def test_not_json_rejected():
+    with pytest.raises(IRValidationError):
+        ir_to_xml("<bpmn:definitions/>")
+
+
+def test_stream_assembly_matches_batch(ir):
+    """Flows listed before their nodes are added once the nodes arrive"""
+    for document in (ir, {"flows": ir["flows"], **ir}):
+        text = json.dumps(document)
+        assembler = IrStreamAssembler()
+        for i in range(0, len(text), 7):
+            assembler.feed(text[i : i + 7])
+
+        assert assembler.finish() == ir_to_xml(text)
+
+
+def test_stream_rejects_invalid_ir(ir):
+    assembler = IrStreamAssembler()
+    with pytest.raises(IRValidationError, match="Duplicate node id 's1'"):
+        assembler.feed(json.dumps({"nodes": ir["nodes"] + ir["nodes"][:1]}))
+
+    ir["flows"].append({"from": "s1", "to": "ghost", "name": ""})
+    assembler = IrStreamAssembler()
+    assembler.feed(json.dumps(ir))
+    with pytest.raises(IRValidationError, match="s1 -> ghost references no node"):
+        assembler.finish()
@@ -0,0 +1,117 @@
+import time
+
+import pytest
+
+from benchmarks.layout_benchmark import make_process_graph
+from src.assemblers.xml.layout import LayeredLayout, layout_process
+
+
+def _node(node_id: str, node_type: str = "task") -> dict:
+    return {"id": node_id, "type": node_type}
+
+
+def _flows(*pairs: tuple[str, str]) -> list[dict]:
+    return [
+        {"id": f"Flow_{i}", "sourceRef": s, "targetRef": t}
+        for i, (s, t) in enumerate(pairs, start=1)
+    ]
+
+
+def _overlap(a, b) -> bool:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    return ax < bx + bw and bx < ax + aw and ay < by + bh and by < ay + ah
+
+
+# --- FIXTURES ---
+
+
+@pytest.fixture
+def review_process() -> tuple[list[dict], list[dict]]:
+    """Split, two branches, join and a rework loop"""
+    nodes = [
+        _node("start", "startEvent"),
+        _node("draft"),
+        _node("split", "exclusiveGateway"),
+        _node("legal"),
+        _node("finance"),
+        _node("join", "exclusiveGateway"),
+        _node("end", "endEvent"),
+    ]
+    flows = _flows(
+        ("start", "draft"),
+        ("draft", "split"),
+        ("split", "legal"),
+        ("split", "finance"),
+        ("legal", "join"),
+        ("finance", "join"),
+        ("join", "end"),
+        ("join", "draft"),
+    )
+    return nodes, flows
+
+
+# --- TESTS ---
+
+
+def test_layout_left_to_right_without_overlaps(review_process):
+    """Flows point right except the loop, shapes never overlap"""
+    nodes, flows = review_process
+    layout = LayeredLayout(nodes, flows)
+    bounds = layout.compute()
+
+    assert set(bounds) == {n["id"] for n in nodes}
+    assert layout.reversed_flows == {"Flow_8"}  # join -> draft closes the loop
+    for flow in flows[:7]:
+        assert bounds[flow["sourceRef"]][0] < bounds[flow["targetRef"]][0]
+    boxes = list(bounds.values())
+    assert not any(_overlap(a, b) for i, a in enumerate(boxes) for b in boxes[i + 1 :])
+    # Branches of the split share a column
+    assert bounds["legal"][0] == bounds["finance"][0]
+    assert bounds["start"][2:] == (36, 36)
+
+
+def test_layout_reduces_crossings():
+    """Barycenter ordering untangles branches given in crossed order"""
+    nodes = [_node(i) for i in ("a", "b", "c", "x", "y", "z")]
+    flows = _flows(("a", "z"), ("b", "y"), ("c", "x"))
+
+    layout = LayeredLayout(nodes, flows)
+    bounds = layout.compute()
+
+    assert layout.crossings == 0
+    assert bounds["z"][1] < bounds["y"][1] < bounds["x"][1]
+
+
+def test_long_flows_get_bend_points():
+    """A flow skipping layers passes dummy nodes, reversed flows included"""
+    nodes = [_node(i) for i in ("a", "b", "c", "d")]
+    flows = _flows(("a", "b"), ("b", "c"), ("c", "d"), ("a", "d"), ("d", "a"))
+
+    layout = LayeredLayout(nodes, flows)
+    bounds = layout.compute()
+
+    points = layout.bend_points["Flow_4"]  # both edges of the b and c columns
+    xs = [x for x, _ in points]
+    assert len(points) == 4 and xs == sorted(xs)
+    assert bounds["a"][0] + bounds["a"][2] < xs[0] and xs[-1] < bounds["d"][0]
+    loop = [x for x, _ in layout.bend_points["Flow_5"]]  # d -> a, in flow direction
+    assert loop == sorted(loop, reverse=True)
+
+
+def test_layout_ignores_dangling_and_self_flows():
+    bounds = layout_process(
+        [_node("a"), _node("b")], _flows(("a", "a"), ("a", "missing"), ("a", "b"))
+    )
+    assert bounds["a"][0] < bounds["b"][0]
+
+
+def test_layout_scales_to_thousands_of_nodes():
+    nodes, flows = make_process_graph(3000)
+
+    started = time.perf_counter()
+    bounds = layout_process(nodes, flows)
+    elapsed = time.perf_counter() - started
+
+    assert len(bounds) == 3000
+    assert elapsed < 1.0
@@ -0,0 +1,96 @@
+import pytest
+
+from src.assemblers.xml.director import BpmnDirector
+from src.assemblers.xml.model import ModelError, ProcessGraph
+
+
+def _codes(issues) -> set[tuple[str, str]]:
+    return {(issue.code, issue.element_id) for issue in issues}
+
+
+# --- FIXTURES ---
+
+
+@pytest.fixture
+def data() -> dict:
+    """start -> gateway -> (a | b) -> end"""
+    return {
+        "process": {
+            "id": "Process_1",
+            "nodes": [
+                {"id": "Start", "type": "startEvent"},
+                {"id": "Split", "type": "exclusiveGateway"},
+                {"id": "A", "type": "task", "name": "A"},
+                {"id": "B", "type": "task", "name": "B"},
+                {"id": "End", "type": "endEvent"},
+            ],
+        },
+        "flow": {
+            "flows": [
+                {"id": "Flow_1", "sourceRef": "Start", "targetRef": "Split"},
+                {"id": "Flow_2", "sourceRef": "Split", "targetRef": "A"},
+                {"id": "Flow_3", "sourceRef": "Split", "targetRef": "B"},
+                {"id": "Flow_4", "sourceRef": "A", "targetRef": "End"},
+                {"id": "Flow_5", "sourceRef": "B", "targetRef": "End"},
+            ]
+        },
+    }
+
+
+# --- TESTS ---
+
+
+def test_graph_indexes_elements_and_adjacency(data):
+    graph = ProcessGraph.from_director_data(data)
+
+    split = graph.node("Split")
+    assert [f.target for f in split.outgoing] == ["A", "B"]
+    assert [f.id for f in graph.node("End").incoming] == ["Flow_4", "Flow_5"]
+    assert graph.get("Flow_1").source == "Start"
+    assert graph.node("Flow_1") is None
+    assert graph.validate() == []
+    with pytest.raises(AttributeError):
+        split.color = "red"
+
+
+def test_missing_key_named_before_building(data):
+    data["flow"]["flows"][2] = {"id": "Flow_3", "source": "Split", "targetRef": "B"}
+
+    with pytest.raises(ModelError, match="Flow #2 has no 'sourceRef'"):
+        ProcessGraph.from_director_data(data)
+    graph = ProcessGraph("P")
+    graph.add_node("A", "task")
+    with pytest.raises(ModelError, match="Duplicate id 'A'"):
+        graph.add_node("A", "task")
+
+
+def test_integrity_issues(data):
+    data["process"]["nodes"].append({"id": "Lonely", "type": "task"})
+    data["process"]["nodes"].append({"id": "Sink", "type": "task"})
+    data["flow"]["flows"] += [
+        {"id": "Flow_6", "sourceRef": "A", "targetRef": "Sink"},
+        {"id": "Flow_7", "sourceRef": "B", "targetRef": "Ghost"},
+    ]
+    data["flow"]["flows"][0]["targetRef"] = "A"
+
+    issues = ProcessGraph.from_director_data(data).validate()
+
+    assert _codes(issues) == {
+        ("dangling_flow", "Flow_7"),
+        ("orphan", "Lonely"),
+        ("unreachable", "Split"),
+        ("unreachable", "B"),
+        ("dead_end", "Sink"),
+    }
+
+
+def test_director_builds_from_graph(data):
+    graph = ProcessGraph.from_director_data(data)
+    director = BpmnDirector()
+
+    director.construct(graph)
+
+    from_json = BpmnDirector()
+    from_json.construct_from_json(data)
+    assert director.to_string() == from_json.to_string()
+    assert director.builder.get_di("Flow_5") is not None
@@ -0,0 +1,176 @@
+from unittest.mock import Mock
+
+import pytest
+from lxml import etree
+
+from src.assemblers.xml import patch
+from src.assemblers.xml.director import BpmnDirector
+from src.assemblers.xml.patch import DiagramPatcher, PatchError
+
+NS = {
+    "bpmn": "http://www.omg.org/spec/BPMN/20100524/MODEL",
+    "bpmndi": "http://www.omg.org/spec/BPMN/20100524/DI",
+    "dc": "http://www.omg.org/spec/DD/20100524/DC",
+}
+
+
+def _op(op: str, **fields) -> dict:
+    return {"op": op, "id": "", "type": "", "name": "", "from": "", "to": "", **fields}
+
+
+def _root(xml: str) -> etree._Element:
+    return etree.fromstring(xml.encode("utf-8"))
+
+
+def _flows(root) -> set[tuple[str, str]]:
+    return {
+        (flow.get("sourceRef"), flow.get("targetRef"))
+        for flow in root.findall(".//bpmn:sequenceFlow", NS)
+    }
+
+
+def _bounds(root, element_id: str) -> tuple:
+    shape = root.find(f".//bpmndi:BPMNShape[@bpmnElement='{element_id}']", NS)
+    box = shape.find("dc:Bounds", NS)
+    return tuple(float(box.get(key)) for key in ("x", "y", "width", "height"))
+
+
+# --- FIXTURES ---
+
+
+@pytest.fixture
+def xml() -> str:
+    """start -> task -> end with full DI"""
+    director = BpmnDirector()
+    director.construct_from_json(
+        {
+            "process": {
+                "id": "Process_1",
+                "nodes": [
+                    {"id": "Start", "type": "startEvent"},
+                    {"id": "Task", "type": "task", "name": "Work"},
+                    {"id": "End", "type": "endEvent"},
+                ],
+            },
+            "flow": {
+                "flows": [
+                    {"id": "Flow_1", "sourceRef": "Start", "targetRef": "Task"},
+                    {"id": "Flow_2", "sourceRef": "Task", "targetRef": "End"},
+                ]
+            },
+        }
+    )
+    return director.to_string()
+
+
+# --- TESTS ---
+
+
+def test_outline_lists_nodes_and_flows(xml):
+    outline = DiagramPatcher(xml).outline()
+
+    assert outline.splitlines() == [
+        "Nodes:",
+        'Start startEvent ""',
+        'Task task "Work"',
+        'End endEvent ""',
+        "Flows:",
+        'Flow_1: Start -> Task ""',
+        'Flow_2: Task -> End ""',
+    ]
+
+
+def test_insert_node_into_flow(xml):
+    """Only the new node is placed, the other shapes keep their bounds"""
+    patched = (
+        DiagramPatcher(xml)
+        .apply(
+            [
+                _op("add_node", id="Review", type="userTask", name="Review"),
+                _op("reconnect_flow", id="Flow_2", to="Review"),
+                _op("add_flow", **{"from": "Review", "to": "End"}),
+            ]
+        )
+        .to_string()
+    )
+
+    before, root = _root(xml), _root(patched)
+    assert _flows(root) == {("Start", "Task"), ("Task", "Review"), ("Review", "End")}
+    for node_id in ("Start", "Task", "End"):
+        assert _bounds(root, node_id) == _bounds(before, node_id)
+    task = _bounds(root, "Task")
+    review = _bounds(root, "Review")
+    assert review[0] > task[0] + task[2]
+    review_node = root.find(".//bpmn:userTask[@id='Review']", NS)
+    assert [child.text for child in review_node] == ["Flow_2", "Flow_3"]
+    assert len(root.findall(".//bpmndi:BPMNEdge", NS)) == 3
+
+
+def test_remove_node_bridges_flow(xml):
+    patched = DiagramPatcher(xml).apply([_op("remove_node", id="Task")]).to_string()
+
+    root = _root(patched)
+    assert _flows(root) == {("Start", "End")}
+    assert root.find(".//*[@id='Task']") is None
+    assert root.find(".//*[@bpmnElement='Task']") is None
+    assert root.find(".//*[@bpmnElement='Flow_2']") is None
+    assert root.find(".//bpmndi:BPMNEdge[@bpmnElement='Flow_1']", NS) is not None
+
+
+def test_rename_and_remove_flow(xml):
+    patcher = DiagramPatcher(xml).apply(
+        [
+            _op("rename_node", id="Task", name="Approve"),
+            _op("add_flow", **{"from": "Start", "to": "End", "name": "Skip"}),
+            _op("remove_flow", **{"from": "Start", "to": "Task"}),
+        ]
+    )
+
+    root = _root(patcher.to_string())
+    assert root.find(".//bpmn:task", NS).get("name") == "Approve"
+    assert _flows(root) == {("Task", "End"), ("Start", "End")}
+    start = root.find(".//bpmn:startEvent", NS)
+    assert [child.text for child in start] == ["Flow_3"]
+
+
+def test_new_flow_numbered_after_highest(xml):
+    xml = xml.replace("Flow_2", "Flow_9")
+    patcher = DiagramPatcher(xml).apply(
+        [_op("add_flow", **{"from": "Start", "to": "End"})]
+    )
+
+    root = _root(patcher.to_string())
+    assert (
+        root.find(".//bpmn:sequenceFlow[@id='Flow_10']", NS).get("targetRef") == "End"
+    )
+
+
+def test_routing_failure_rejected(xml, monkeypatch):
+    """A router error is a rejected patch, not a server error"""
+    monkeypatch.setattr(
+        patch.EdgeRouter, "route", Mock(side_effect=ValueError("no way"))
+    )
+
+    with pytest.raises(PatchError, match="Flow_3' cannot be routed"):
+        DiagramPatcher(xml).apply([_op("add_flow", **{"from": "Start", "to": "End"})])
+
+
+@pytest.mark.parametrize(
+    "operations, message",
+    [
+        ([_op("rename_node", id="Ghost")], "does not exist"),
+        ([_op("add_node", id="Task", type="task")], "already exists"),
+        ([_op("add_node", id="New", type="lane")], "Unknown node type"),
+        ([_op("move_node", id="Task")], "Unknown operation"),
+        ([_op("remove_flow", id="Task")], "Flow 'Task' does not exist"),
+        ([_op("remove_node", id="Start")], "no start event"),
+    ],
+)
+def test_invalid_patch_rejected(xml, operations, message):
+    with pytest.raises(PatchError, match=message):
+        DiagramPatcher(xml).apply(operations).to_string()
+
+
+def test_invalid_diagram_rejected():
+    with pytest.raises(PatchError):
+        DiagramPatcher("<not xml")
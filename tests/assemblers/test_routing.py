@@ -0,0 +1,198 @@
+import pytest
+from lxml import etree
+
+from benchmarks.layout_benchmark import make_process_graph
+from src.assemblers.xml.bpmn import BpmnBuilder
+from src.assemblers.xml.director import BpmnDirector
+from src.assemblers.xml.layout import LayeredLayout
+from src.assemblers.xml.routing import EdgeRouter, SpatialIndex, route_edges
+
+NS = {
+    "bpmndi": "http://www.omg.org/spec/BPMN/20100524/DI",
+    "di": "http://www.omg.org/spec/DD/20100524/DI",
+}
+
+
+def _is_orthogonal(path) -> bool:
+    return all(a[0] == b[0] or a[1] == b[1] for a, b in zip(path, path[1:]))
+
+
+def _crosses(path, box) -> bool:
+    """Some segment passes through the inside of the box"""
+    x, y, w, h = box
+    for (x1, y1), (x2, y2) in zip(path, path[1:]):
+        if (
+            min(x1, x2) < x + w
+            and max(x1, x2) > x
+            and min(y1, y2) < y + h
+            and max(y1, y2) > y
+        ):
+            return True
+    return False
+
+
+# --- FIXTURES ---
+
+
+@pytest.fixture
+def bounds() -> dict:
+    """a and b on one row with c in between, d below c"""
+    return {
+        "a": (0, 0, 100, 80),
+        "c": (200, 0, 100, 80),
+        "b": (400, 0, 100, 80),
+        "d": (200, 150, 100, 80),
+        "g": (0, 300, 50, 50),
+        "e": (150, 400, 100, 80),
+    }
+
+
+# --- TESTS ---
+
+
+def test_spatial_index_query(bounds):
+    index = SpatialIndex(bounds, cell_size=100)
+
+    assert index.query(190, 10, 20, 20) == {"c"}
+    assert index.query(0, 85, 500, 60) == set()
+    assert index.query(-50, -50, 1000, 1000) == set(bounds)
+
+
+def test_forward_route_avoids_shapes(bounds):
+    """Straight line a -> b is blocked by c, the route goes around it"""
+    path = EdgeRouter(bounds).route("a", "b")
+
+    assert path[0] == (100, 40) and path[-1] == (400, 40)
+    assert _is_orthogonal(path)
+    assert not any(_crosses(path, bounds[i]) for i in ("c", "d"))
+
+
+def test_gateway_branch_leaves_from_bottom(bounds):
+    path = EdgeRouter(bounds, gateways=["g"]).route("g", "e")
+
+    assert path == [(25, 350), (25, 440), (150, 440)]
+
+
+def test_back_route_loops_around(bounds):
+    path = EdgeRouter(bounds).route("b", "a")
+
+    assert _is_orthogonal(path)
+    assert not any(_crosses(path, box) for box in bounds.values())
+
+
+def test_self_loop():
+    path = EdgeRouter({"a": (0, 0, 100, 80)}).route("a", "a")
+
+    assert path[0] == (100, 40) and path[-1] == (50, 0)
+    assert _is_orthogonal(path)
+
+
+def test_layered_routes_are_clear():
+    """Routes through LayeredLayout bend points stay orthogonal and off other shapes"""
+    nodes, flows = make_process_graph(300)
+    layout = LayeredLayout(nodes, flows)
+    bounds = layout.compute()
+
+    waypoints = route_edges(bounds, flows, bend_points=layout.bend_points)
+
+    assert set(waypoints) == {f["id"] for f in flows}
+    index = SpatialIndex(bounds)
+    for flow in flows:
+        path = waypoints[flow["id"]]
+        assert _is_orthogonal(path)
+        others = {flow["sourceRef"], flow["targetRef"]}
+        for a, b in zip(path, path[1:]):
+            x, y = min(a[0], b[0]), min(a[1], b[1])
+            hits = index.query(x, y, abs(a[0] - b[0]) or 1, abs(a[1] - b[1]) or 1)
+            assert hits <= others
+
+
+@pytest.mark.parametrize(
+    "target",
+    [(100, 0, 100, 80), (50, 0, 100, 80), (0, 0, 100, 80)],
+    ids=["touching", "overlapping", "same-place"],
+)
+def test_coinciding_ports_get_two_points(target):
+    """Touching or overlapping shapes still get a route over them"""
+    path = EdgeRouter({"a": (0, 0, 100, 80), "b": target}).route("a", "b")
+
+    assert len(path) >= 2
+    assert all(a != b for a, b in zip(path, path[1:]))
+    assert _is_orthogonal(path)
+
+
+def test_builder_edge_needs_two_waypoints():
+    builder = BpmnBuilder().create_definitions("Definitions_1")
+    builder.init_diagram("Process_1")
+
+    with pytest.raises(ValueError):
+        builder.add_edge("Flow_1", [(0, 0)])
+
+
+def test_director_routes_flows_of_given_layout():
+    """Only positions come from the layout, edges are computed"""
+    data = {
+        "process": {
+            "id": "Process_1",
+            "nodes": [
+                {"id": "Start", "type": "startEvent"},
+                {"id": "Task", "type": "task", "name": "Work"},
+            ],
+        },
+        "flow": {
+            "flows": [{"id": "Flow_1", "sourceRef": "Start", "targetRef": "Task"}]
+        },
+        "layout": {
+            "positions": [
+                {
+                    "elementId": "Start",
+                    "bounds": {"x": 100, "y": 122, "width": 36, "height": 36},
+                },
+                {
+                    "elementId": "Task",
+                    "bounds": {"x": 200, "y": 100, "width": 100, "height": 80},
+                },
+            ]
+        },
+    }
+    director = BpmnDirector()
+    director.construct_from_json(data)
+
+    root = etree.fromstring(director.to_string().encode("utf-8"))
+    edge = root.find(".//bpmndi:BPMNEdge", NS)
+    points = [
+        (float(p.get("x")), float(p.get("y"))) for p in edge.findall("di:waypoint", NS)
+    ]
+    assert edge.get("bpmnElement") == "Flow_1"
+    assert points == [(136, 140), (200, 140)]
+
+
+def test_director_routes_flow_between_touching_shapes():
+    data = {
+        "process": {
+            "id": "Process_1",
+            "nodes": [
+                {"id": "A", "type": "task", "name": "A"},
+                {"id": "B", "type": "task", "name": "B"},
+            ],
+        },
+        "flow": {"flows": [{"id": "Flow_1", "sourceRef": "A", "targetRef": "B"}]},
+        "layout": {
+            "positions": [
+                {
+                    "elementId": "A",
+                    "bounds": {"x": 0, "y": 100, "width": 100, "height": 80},
+                },
+                {
+                    "elementId": "B",
+                    "bounds": {"x": 100, "y": 100, "width": 100, "height": 80},
+                },
+            ]
+        },
+    }
+    director = BpmnDirector()
+    director.construct_from_json(data)
+
+    root = etree.fromstring(director.to_string().encode("utf-8"))
+    points = root.findall(".//bpmndi:BPMNEdge/di:waypoint", NS)
+    assert len(points) >= 2
@@ -0,0 +1,155 @@
+import asyncio
+import gzip
+import zlib
+
+import brotli
+import pytest
+from lxml import etree
+
+from src.assemblers.xml.director import BpmnDirector
+from src.assemblers.xml.streaming import (
+    compress,
+    compress_stream,
+    negotiate_encoding,
+    parse_xml,
+    stream_xml,
+)
+
+
+async def _collect(chunks) -> list[bytes]:
+    return [chunk async for chunk in chunks]
+
+
+# --- FIXTURES ---
+
+
+@pytest.fixture
+def director() -> BpmnDirector:
+    """start -> 50 tasks -> end"""
+    nodes = [{"id": "Start", "type": "startEvent"}]
+    nodes += [{"id": f"Task_{i}", "type": "task", "name": "Work"} for i in range(50)]
+    nodes += [{"id": "End", "type": "endEvent"}]
+    director = BpmnDirector()
+    director.construct_from_json(
+        {
+            "process": {"id": "Process_1", "nodes": nodes},
+            "flow": {
+                "flows": [
+                    {
+                        "id": f"Flow_{i}",
+                        "sourceRef": nodes[i]["id"],
+                        "targetRef": nodes[i + 1]["id"],
+                    }
+                    for i in range(len(nodes) - 1)
+                ]
+            },
+        }
+    )
+    return director
+
+
+# --- TESTS ---
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("gzip, deflate", "gzip"),
+        ("deflate", None),
+        ("gzip;q=0", None),
+        ("gzip, br", "br"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("*", "br"),
+        (None, None),
+    ],
+)
+def test_negotiate_encoding(header, expected):
+    assert negotiate_encoding(header) == expected
+
+
+def test_compact_stream_in_chunks(director):
+    chunks = asyncio.run(_collect(director.builder.stream(chunk_size=1024)))
+
+    document = b"".join(chunks)
+    assert len(chunks) > 1
+    assert document.startswith(b"<?xml")
+    assert b"\n  <" not in document
+    assert etree.tostring(etree.fromstring(document)) == etree.tostring(
+        director.builder.root
+    )
+
+
+def test_gzip_stream_matches_pretty_output(director):
+    xml = director.to_string()
+
+    chunks = asyncio.run(_collect(stream_xml(xml, "gzip", pretty_print=True)))
+
+    document = gzip.decompress(b"".join(chunks)).decode("utf-8")
+    assert document.split("\n", 1)[1] == xml.split("\n", 1)[1]
+
+
+def test_brotli_stream_matches_compact_output(director):
+    chunks = asyncio.run(_collect(director.builder.stream("br", chunk_size=1024)))
+
+    document = brotli.decompress(b"".join(chunks))
+    assert etree.tostring(etree.fromstring(document)) == etree.tostring(
+        director.builder.root
+    )
+
+
+def test_compress_whole_body():
+    data = b"<definitions/>" * 100
+
+    assert brotli.decompress(compress(data, "br", 5)) == data
+    assert gzip.decompress(compress(data, "gzip")) == data
+    assert compress(data, None) is data
+    with pytest.raises(ValueError):
+        compress(data, "deflate")
+
+
+def test_non_xml_rejected():
+    """Text that is not a document is rejected, not sent as compressed junk"""
+    with pytest.raises(ValueError):
+        parse_xml("Sorry, tech problem")
+    with pytest.raises(ValueError):
+        asyncio.run(_collect(stream_xml("Sorry, tech problem", "gzip")))
+
+
+def test_compressed_frames_decode_as_they_arrive():
+    """Every frame of a compressed event stream is decodable on its own"""
+
+    async def frames():
+        for i in range(3):
+            yield f"event: token\ndata: {i}\n\n".encode("utf-8")
+
+    chunks = asyncio.run(_collect(compress_stream(frames(), "gzip")))
+    decoder = zlib.decompressobj(31)
+
+    assert [decoder.decompress(chunk) for chunk in chunks[:3]] == [
+        f"event: token\ndata: {i}\n\n".encode("utf-8") for i in range(3)
+    ]
+    assert gzip.decompress(b"".join(chunks)).count(b"event: token") == 3
+
+
+def test_brotli_frames_decode_as_they_arrive():
+    async def frames():
+        for i in range(3):
+            yield f"event: token\ndata: {i}\n\n".encode("utf-8")
+
+    chunks = asyncio.run(_collect(compress_stream(frames(), "br", 5)))
+    decoder = brotli.Decompressor()
+
+    assert [decoder.process(chunk) for chunk in chunks[:3]] == [
+        f"event: token\ndata: {i}\n\n".encode("utf-8") for i in range(3)
+    ]
+    assert brotli.decompress(b"".join(chunks)).count(b"event: token") == 3
+
+
+def test_closed_stream_stops_serialization(director):
+    async def first_chunk():
+        chunks = director.builder.stream("gzip", chunk_size=1024)
+        async for chunk in chunks:
+            await chunks.aclose()
+            return chunk
+
+    assert asyncio.run(asyncio.wait_for(first_chunk(), timeout=5))
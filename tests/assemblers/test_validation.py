@@ -0,0 +1,173 @@
+import re
+from unittest.mock import Mock
+
+import pytest
+from lxml import etree
+
+from src.assemblers.xml import validation
+from src.assemblers.xml.director import BpmnDirector
+from src.assemblers.xml.validation import load_profile, repair_bpmn, validate_bpmn
+
+NS = {
+    "bpmn": "http://www.omg.org/spec/BPMN/20100524/MODEL",
+    "bpmndi": "http://www.omg.org/spec/BPMN/20100524/DI",
+}
+
+
+def _codes(result) -> set[str]:
+    return {issue.code for issue in result.issues}
+
+
+# --- FIXTURES ---
+
+
+@pytest.fixture
+def xml() -> str:
+    """Valid document: start -> task -> end with full DI"""
+    director = BpmnDirector()
+    director.construct_from_json(
+        {
+            "process": {
+                "id": "Process_1",
+                "nodes": [
+                    {"id": "Start", "type": "startEvent"},
+                    {"id": "Task", "type": "task", "name": "Work"},
+                    {"id": "End", "type": "endEvent"},
+                ],
+            },
+            "flow": {
+                "flows": [
+                    {"id": "Flow_1", "sourceRef": "Start", "targetRef": "Task"},
+                    {"id": "Flow_2", "sourceRef": "Task", "targetRef": "End"},
+                ]
+            },
+        }
+    )
+    return director.to_string()
+
+
+# --- TESTS ---
+
+
+def test_profile_compiled_once_from_template():
+    profile = load_profile()
+
+    assert load_profile() is profile
+    assert profile.namespaces["dc"] == "http://www.omg.org/spec/DD/20100524/DC"
+    assert profile.namespace_of("BPMNEdge") == NS["bpmndi"]
+    assert profile.namespace_of("userTask") == NS["bpmn"]
+
+
+def test_valid_document_unchanged(xml):
+    result = repair_bpmn(xml)
+
+    assert result.valid and result.repairs == []
+    assert result.xml is xml
+
+
+def test_fences_and_undeclared_prefix_repaired(xml):
+    broken = "Here you go:\n```xml\n" + xml.replace(
+        ' xmlns:dc="http://www.omg.org/spec/DD/20100524/DC"', ""
+    )
+    result = repair_bpmn(broken + "\n```")
+
+    assert result.valid
+    assert result.repairs == ["fences", "namespace"]
+    assert result.xml.startswith("<?xml")
+
+
+def test_wrong_namespace_moved(xml):
+    broken = xml.replace(
+        "http://www.omg.org/spec/BPMN/20100524/MODEL",
+        "http://www.omg.org/spec/BPMN/20100524/MODEL/",
+    )
+    result = repair_bpmn(broken)
+
+    assert result.valid and "namespace" in result.repairs
+    root = etree.fromstring(result.xml.encode("utf-8"))
+    assert len(root.findall("bpmn:process/bpmn:task", NS)) == 1
+
+
+def test_dangling_flow_and_di_removed(xml):
+    broken = xml.replace(
+        "</bpmn:process>",
+        '<bpmn:sequenceFlow id="Flow_3" sourceRef="Task" targetRef="Ghost"/>'
+        "</bpmn:process>",
+    ).replace(
+        "</bpmndi:BPMNPlane>",
+        '<bpmndi:BPMNShape id="Ghost_di" bpmnElement="Ghost">'
+        '<dc:Bounds x="0" y="0" width="10" height="10"/></bpmndi:BPMNShape>'
+        "</bpmndi:BPMNPlane>",
+    )
+    result = repair_bpmn(broken)
+
+    assert result.valid
+    assert result.repairs == ["dangling_flow", "dangling_di"]
+    assert "Flow_3" not in result.xml and "Ghost" not in result.xml
+
+
+def test_missing_di_computed(xml):
+    """Shapes and edges missing from the answer are laid out and routed"""
+    broken = re.sub(r"<bpmndi:BPMNDiagram[\s\S]*</bpmndi:BPMNDiagram>", "", xml)
+    result = repair_bpmn(broken)
+
+    assert result.valid
+    assert result.repairs == ["missing_diagram", "missing_shape", "missing_edge"]
+    root = etree.fromstring(result.xml.encode("utf-8"))
+    assert len(root.findall(".//bpmndi:BPMNShape", NS)) == 3
+    assert len(root.findall(".//bpmndi:BPMNEdge", NS)) == 2
+
+
+def test_missing_edge_between_touching_shapes(xml):
+    """Start event ends where the task begins, its flow is still routed"""
+    touching = xml.replace('x="150.0" y="122.0"', 'x="200.0" y="122.0"')
+    broken = re.sub(
+        r"<bpmndi:BPMNEdge [^>]*Flow_1[\s\S]*?</bpmndi:BPMNEdge>", "", touching
+    )
+    result = repair_bpmn(broken)
+
+    assert touching != xml
+    assert result.valid and result.repairs == ["missing_edge"]
+
+
+def test_unroutable_edge_reported(xml, monkeypatch):
+    """A routing failure leaves that flow without an edge instead of raising"""
+    monkeypatch.setattr(
+        validation.EdgeRouter, "route", Mock(side_effect=ValueError("no way"))
+    )
+    broken = re.sub(r"<bpmndi:BPMNEdge [^>]*Flow_1[\s\S]*?</bpmndi:BPMNEdge>", "", xml)
+    result = repair_bpmn(broken)
+
+    assert not result.valid
+    assert [(i.code, i.element_id) for i in result.issues] == [
+        ("unroutable_edge", "Flow_1"),
+        ("missing_edge", "Flow_1"),
+    ]
+
+
+def test_truncated_document_recovered(xml):
+    """A cut off answer is recovered, the lost DI is rebuilt"""
+    result = repair_bpmn(xml[: xml.index("<bpmndi:BPMNDiagram")])
+
+    assert result.valid
+    assert result.repairs[0] == "syntax"
+
+
+def test_unrepairable_faults_reported(xml):
+    no_start = repair_bpmn(xml.replace("startEvent", "intermediateThrowEvent"))
+    duplicate = repair_bpmn(xml.replace('id="End"', 'id="Task"'))
+
+    assert not no_start.valid and _codes(no_start) == {"no_start_event"}
+    assert not duplicate.valid and "duplicate_id" in _codes(duplicate)
+    assert _codes(repair_bpmn("Sorry, I cannot help")) == {"syntax"}
+    assert _codes(repair_bpmn("")) == {"empty"}
+
+
+def test_validate_reports_integrity(xml):
+    root = etree.fromstring(
+        xml.replace('targetRef="End"', 'targetRef="Nowhere"').encode("utf-8")
+    )
+
+    issues = validate_bpmn(root)
+
+    assert [(i.code, i.element_id) for i in issues] == [("dangling_flow", "Flow_2")]
@@ -0,0 +1,59 @@
+import asyncio
+import httpx
+from fastapi import FastAPI, HTTPException
+from benchmarks.load_test import LoadGenerator, percentile, summarize
+
+
+# --- FIXTURES ---
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    calls = {"n": 0}
+
+    @app.get("/api/generate")
+    async def generate(user_input: str, use_cache: bool = True):
+        calls["n"] += 1
+        if calls["n"] % 4 == 0:
+            raise HTTPException(status_code=503)
+        return {"output": user_input}
+
+    return app
+
+
+def make_generator(**kwargs) -> LoadGenerator:
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=make_app()), base_url="http://app"
+    )
+    return LoadGenerator(client, **kwargs)
+
+
+# --- TESTS ---
+
+
+def test_percentile_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 95) == 0.0
+
+
+def test_fixed_concurrency_counts_requests_and_errors():
+    generator = make_generator(unique_prompts=True)
+
+    result = asyncio.run(generator.run_concurrency(concurrency=4, requests=20))
+    summary = summarize(result)
+
+    assert summary["requests"] == 20
+    assert summary["statuses"] == {"200": 15, "503": 5}
+    assert summary["error_rate"] == 0.25
+
+
+def test_fixed_rate_sends_requested_number():
+    generator = make_generator()
+
+    result = asyncio.run(generator.run_rate(rps=200, requests=10))
+
+    assert result.total == 10
+    assert summarize(result)["throughput_rps"] > 0
@@ -0,0 +1,130 @@
+import asyncio
+import httpx
+import openai
+import pytest
+from openai import AsyncOpenAI
+from benchmarks.mock_openrouter import LatencySampler, MockConfig, create_mock_app
+
+
+# --- FIXTURES ---
+
+
+def make_client(config: MockConfig) -> AsyncOpenAI:
+    http_client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=create_mock_app(config)),
+        base_url="http://mock/v1",
+    )
+    return AsyncOpenAI(
+        api_key="test",
+        base_url="http://mock/v1",
+        http_client=http_client,
+        max_retries=0,
+    )
+
+
+@pytest.fixture
+def fast_config():
+    return MockConfig(latency="fixed", latency_mean=0, tokens_per_second=0, seed=1)
+
+
+# --- TESTS ---
+
+
+def test_non_stream_completion_is_openai_compatible(fast_config):
+    """The openai SDK parses the mock answer, XML stage gets a BPMN document"""
+
+    async def scenario():
+        client = make_client(fast_config)
+        response = await client.chat.completions.create(
+            model="mock",
+            messages=[
+                {"role": "system", "content": "Return BPMN 2.0 XML"},
+                {"role": "user", "content": "Order process"},
+            ],
+        )
+        await client.close()
+        return response
+
+    response = asyncio.run(scenario())
+
+    assert "</bpmn:definitions>" in response.choices[0].message.content
+    assert response.usage.completion_tokens > 0
+
+
+def test_stream_completion_yields_tokens_and_usage(fast_config):
+    async def scenario():
+        client = make_client(fast_config)
+        stream = await client.chat.completions.create(
+            model="mock",
+            messages=[{"role": "user", "content": "Describe a process"}],
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        text, usage = "", None
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                text += chunk.choices[0].delta.content
+            usage = chunk.usage or usage
+        await client.close()
+        return text, usage
+
+    text, usage = asyncio.run(scenario())
+
+    assert text.startswith("1. DOMAIN")
+    assert usage.completion_tokens > 0
+
+
+def test_rate_limit_injection():
+    """error_rate=1 answers every request with 429 and Retry-After"""
+    config = MockConfig(latency="fixed", latency_mean=0, error_rate=1, retry_after=2)
+
+    async def scenario():
+        client = make_client(config)
+        try:
+            await client.chat.completions.create(
+                model="mock", messages=[{"role": "user", "content": "hi"}]
+            )
+        finally:
+            await client.close()
+
+    with pytest.raises(openai.RateLimitError) as exc:
+        asyncio.run(scenario())
+
+    assert exc.value.response.headers["retry-after"] == "2"
+
+
+@pytest.mark.parametrize("latency", ["fixed", "uniform", "normal", "lognormal"])
+def test_latency_distributions_are_non_negative(latency):
+    sampler = LatencySampler(
+        MockConfig(latency=latency, latency_mean=0.5, latency_spread=1.0, seed=3)
+    )
+
+    delays = [sampler.first_token_delay() for _ in range(200)]
+
+    assert all(d >= 0 for d in delays)
+
+
+def test_cache_control_prefix_reported_as_cached(fast_config):
+    """Second request with the same cache_control prefix reports cached tokens"""
+    system = {
+        "role": "system",
+        "content": [
+            {"type": "text", "text": "R" * 400, "cache_control": {"type": "ephemeral"}}
+        ],
+    }
+
+    async def scenario():
+        client = make_client(fast_config)
+        usages = []
+        for text in ("first", "second"):
+            response = await client.chat.completions.create(
+                model="mock", messages=[system, {"role": "user", "content": text}]
+            )
+            usages.append(response.usage)
+        await client.close()
+        return usages
+
+    cold, warm = asyncio.run(scenario())
+
+    assert cold.prompt_tokens_details.cached_tokens == 0
+    assert warm.prompt_tokens_details.cached_tokens == 100
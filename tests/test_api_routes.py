@@ -0,0 +1,56 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from src.ai_generation.upstream_scheduler import UpstreamQueueFull, UpstreamThrottled
+
+AGENT = "src.ai_generation.bpmn_agent.simple.agent"
+
+
+# --- FIXTURES ---
+
+
+@pytest.fixture
+def client() -> TestClient:
+    # Without the context manager the lifespan (prewarm, job workers) is not run
+    return TestClient(app)
+
+
+# --- TESTS ---
+
+
+@pytest.mark.parametrize(
+    "error, retry_after",
+    [
+        (UpstreamQueueFull("Upstream queue is full (64)"), "5"),
+        (UpstreamThrottled("Upstream asks to retry in 42s", retry_after=41.2), "42"),
+    ],
+)
+def test_upstream_rejection_forwards_retry_after(client, mocker, error, retry_after):
+    mocker.patch(AGENT + ".invoke_agent", side_effect=error)
+
+    response = client.get("/api/generate", params={"user_input": "Order"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == retry_after
+
+
+def test_batch_reports_retry_after_in_line(client, mocker):
+    """The batch already streams when an input is rejected, the line says when to retry"""
+
+    async def results(inputs, concurrency, use_cache=True):
+        yield 0, None, UpstreamThrottled("Upstream asks to retry in 42s", 41.2)
+        yield 1, None, RuntimeError("boom")
+
+    mocker.patch(AGENT + ".invoke_agent_batch", side_effect=results)
+
+    response = client.post(
+        "/api/generate/batch", json=[{"user_input": "a"}, {"user_input": "b"}]
+    )
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert response.status_code == 200
+    assert lines[0]["retry_after"] == 42
+    assert "retry_after" not in lines[1]
@@ -0,0 +1,85 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from src.jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, JobQueue, JobStore
+from src.schemas import SUserInputData
+
+SCRIPT_DIR = "src.jobs"
+
+
+# --- FIXTURES ---
+
+
+@pytest.fixture
+def store():
+    return JobStore(":memory:")
+
+
+# --- TESTS ---
+
+
+def test_store_requeues_interrupted_jobs(tmp_path):
+    """Queued and running jobs are queued again after a restart"""
+    db_path = str(tmp_path / "jobs.sqlite3")
+    store = JobStore(db_path)
+    first = store.create("first")
+    second = store.create("second")
+    second.status = RUNNING
+    second.started_at = second.created_at
+    store.save(second)
+    store.close()
+
+    reopened = JobStore(db_path)
+
+    assert reopened.recover() == [first.id, second.id]
+    assert reopened.get(second.id).status == QUEUED
+    assert reopened.get(second.id).started_at is None
+
+
+def test_queue_runs_jobs_and_reports_status(mocker, store):
+    """Workers run the agent, a failed job does not stop the queue"""
+
+    async def answer(user_input, use_cache=True):
+        await asyncio.sleep(0.01)
+        if user_input.user_input == "boom":
+            raise RuntimeError("upstream failed")
+        return {"previous_answer": f"<xml>{user_input.user_input}</xml>"}
+
+    mocker.patch(SCRIPT_DIR + ".invoke_agent", AsyncMock(side_effect=answer))
+
+    async def scenario():
+        queue = JobQueue(store, workers=1)
+        await queue.start()
+        bad = await queue.submit(SUserInputData(user_input="boom"))
+        good = await queue.submit(SUserInputData(user_input="order"))
+        statuses = [job.status async for job in queue.watch(good.id)]
+        await queue.stop()
+        return store.get(bad.id), store.get(good.id), statuses
+
+    bad, good, statuses = asyncio.run(scenario())
+
+    assert statuses == [QUEUED, RUNNING, SUCCEEDED]
+    assert good.output == "<xml>order</xml>"
+    assert good.wait_time >= 0 and good.run_time > 0
+    assert bad.status == FAILED
+    assert bad.error == "upstream failed"
+
+
+def test_queue_picks_up_stored_jobs_on_start(mocker, store):
+    mock_invoke = mocker.patch(
+        SCRIPT_DIR + ".invoke_agent",
+        AsyncMock(return_value={"previous_answer": "done"}),
+    )
+    job = store.create("left from last run", use_cache=False)
+
+    async def scenario():
+        queue = JobQueue(store, workers=2)
+        await queue.start()
+        [*_, last] = [j async for j in queue.watch(job.id)]
+        await queue.stop()
+        return last
+
+    assert asyncio.run(scenario()).status == SUCCEEDED
+    mock_invoke.assert_awaited_once_with(
+        SUserInputData(user_input="left from last run"), use_cache=False
+    )
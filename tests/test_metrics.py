@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from src.ai_generation.hedging import Hedger
+from src.metrics import (
+    CACHED_PROMPT_TOKENS,
+    HTTP_REQUEST_DURATION,
+    PROMPT_TOKENS,
+    MetricsRegistry,
+    get_metrics_registry,
+    record_usage,
+)
+
+# --- TESTS ---
+
+
+def test_histogram_exposition():
+    """Histogram should render cumulative buckets, sum and count"""
+    registry = MetricsRegistry()
+    histogram = registry.histogram(
+        "node_seconds", "Node duration", ("node",), buckets=(1, 5)
+    )
+    histogram.observe(0.5, node="imagine")
+    histogram.observe(3, node="imagine")
+
+    lines = registry.render().splitlines()
+
+    assert lines == [
+        "# HELP node_seconds Node duration",
+        "# TYPE node_seconds histogram",
+        'node_seconds_bucket{node="imagine",le="1"} 1',
+        'node_seconds_bucket{node="imagine",le="5"} 2',
+        'node_seconds_bucket{node="imagine",le="+Inf"} 2',
+        'node_seconds_sum{node="imagine"} 3.5',
+        'node_seconds_count{node="imagine"} 2',
+    ]
+
+
+def test_counter_and_gauge_exposition():
+    """Counter values accumulate, gauges are read at render time"""
+    registry = MetricsRegistry()
+    counter = registry.counter("tokens_total", "Tokens", ("model",))
+    counter.inc(10, model="m")
+    counter.inc(5, model="m")
+    registry.gauge("queue", "Queue depth", lambda: {(): 3})
+
+    text = registry.render()
+
+    assert 'tokens_total{model="m"} 15' in text
+    assert "queue 3" in text
+
+
+def test_broken_gauge_does_not_break_scrape():
+    """Failing gauge callback should be skipped"""
+    registry = MetricsRegistry()
+
+    def broken():
+        raise RuntimeError("boom")
+
+    registry.gauge("broken", "Broken gauge", broken)
+    registry.counter("ok_total", "Ok").inc()
+
+    assert "ok_total 1" in registry.render()
+
+
+def test_broken_gauge_warned_once_per_interval(caplog):
+    registry = MetricsRegistry()
+
+    def broken():
+        raise RuntimeError("boom")
+
+    registry.gauge("broken", "Broken gauge", broken)
+
+    with caplog.at_level(logging.WARNING, logger="src.metrics"):
+        registry.render()
+        registry.render()
+
+    assert [r.getMessage() for r in caplog.records] == [
+        "Metric broken skipped in scrape: RuntimeError('boom')"
+    ]
+
+
+def test_event_streams_not_in_request_duration(mocker):
+    """An SSE response would only be timed to its headers, it is left out"""
+    from main import app
+
+    async def events(user_input, use_cache=True):
+        yield {"event": "done", "output": ""}
+
+    mocker.patch(
+        "src.ai_generation.bpmn_agent.simple.agent.stream_agent", side_effect=events
+    )
+    client = TestClient(app)
+    labels = {"method": "GET", "status": "200"}
+    health_before = HTTP_REQUEST_DURATION.count(route="/health", **labels)
+    stream_before = HTTP_REQUEST_DURATION.count(route="/generate/stream", **labels)
+
+    client.get("/health")
+    client.get("/api/generate/stream", params={"user_input": "Order"})
+
+    assert HTTP_REQUEST_DURATION.count(route="/health", **labels) == health_before + 1
+    assert (
+        HTTP_REQUEST_DURATION.count(route="/generate/stream", **labels) == stream_before
+    )
+
+
+def test_record_usage_counts_cached_prompt_tokens():
+    """Cached prompt tokens are read from prompt_tokens_details"""
+    usage = SimpleNamespace(
+        prompt_tokens=1200,
+        completion_tokens=30,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=1000),
+    )
+    before = CACHED_PROMPT_TOKENS.value(model="cache-test")
+
+    record_usage("cache-test", usage)
+    record_usage("cache-test", SimpleNamespace(prompt_tokens=5, completion_tokens=1))
+
+    assert CACHED_PROMPT_TOKENS.value(model="cache-test") - before == 1000
+    assert PROMPT_TOKENS.value(model="cache-test") >= 1205
+
+
+def test_hedging_stats_exported(mocker):
+    """Hedge rate, wins per model and latency saved appear in the scrape"""
+
+    async def answer(delay, value):
+        await asyncio.sleep(delay)
+        return value
+
+    hedger = Hedger("fallback", default_delay=0.01)
+    asyncio.run(hedger.race("primary", lambda: answer(1, "p"), lambda: answer(0, "h")))
+    mocker.patch("src.ai_generation.hedging.get_hedger", return_value=hedger)
+
+    text = get_metrics_registry().render()
+
+    assert 'llm_hedging{kind="hedge_rate"} 1' in text
+    assert 'llm_hedging{kind="latency_saved_seconds"} 0' in text
+    assert 'llm_hedge_wins{model="fallback"} 1' in text
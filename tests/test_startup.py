@@ -0,0 +1,50 @@
+import json
+import subprocess
+import sys
+
+# Modules the app only loads in handlers or in the background prewarm
+DEFERRED_MODULES = (
+    "src.ai_generation.bpmn_agent.simple.agent",
+    "langgraph",
+    "langchain_core",
+    "openai",
+    "numpy",
+    "scipy",
+)
+
+
+def _loaded_after(code: str) -> set[str]:
+    """Top-level and full names in sys.modules of a fresh interpreter after the code"""
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"{code}\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    names = json.loads(completed.stdout.splitlines()[-1])
+    return set(names) | {name.split(".")[0] for name in names}
+
+
+# --- TESTS ---
+
+
+def test_app_import_defers_agent_stack():
+    loaded = _loaded_after("import main")
+
+    assert "src.api_routes" in loaded
+    assert [name for name in DEFERRED_MODULES if name in loaded] == []
+
+
+def test_metrics_scrape_does_not_load_agent():
+    """Rendering /metrics before the prewarm must not import the agent stack"""
+    loaded = _loaded_after(
+        "import main\n"
+        "from src.metrics import get_metrics_registry\n"
+        "get_metrics_registry().render()"
+    )
+
+    assert [name for name in DEFERRED_MODULES if name in loaded] == []